@@ -8,6 +8,28 @@ class Settings(BaseSettings):
     DATA_DIR: Path = BASE_DIR / "data"
     TEAMS_DIR: Path = DATA_DIR / "teams"
     GAMES_DIR: Path = DATA_DIR / "games"
+    REPOSITORY_CACHE_SIZE: int = 256
+    # fsync every flushed file, and group writes made within this many seconds
+    REPOSITORY_FSYNC: bool = False
+    REPOSITORY_COMMIT_WINDOW: float = 0.0
+    # Threads used by the async repositories to keep storage off the UI
+    STORAGE_WORKERS: int = 4
+    # Ids: "sortable" (timestamp, sequence and node) or "timestamp" (legacy),
+    # NODE_ID tells devices apart and is random per process when unset
+    ID_GENERATOR: str = "sortable"
+    NODE_ID: int | None = None
+    # Finished games older than this many days can be moved to compressed
+    # archives ("gzip" or "lzma"), see database.tiering
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_COMPRESSION: str = "gzip"
+    # Point capture journal, fsync'd at most this often (0 syncs every action)
+    JOURNAL_SYNC_INTERVAL: float = 0.5
+    # Storage backend for the domain repositories: "json" or "sqlite"
+    STORAGE_BACKEND: str = "json"
+    # Time and count repository calls (see database.instrumentation), and
+    # write the metrics on exit: Prometheus format for a .prom file, else JSON
+    REPOSITORY_METRICS: bool = False
+    REPOSITORY_METRICS_FILE: Path | None = None
 
     class Config:
         env_file: str = ".env"
@@ -0,0 +1,200 @@
+"""
+This module contains the compressed cold storage used by the JSON repositories.
+
+Rarely read entities (typically the games and points of a past tournament) are
+packed into one compressed archive per group, next to an index that maps every
+archived id to its archive and keeps its summary. Archived entities stay
+readable by id, and listings can be served from the index alone.
+"""
+
+import copy
+import gzip
+import json
+import lzma
+import os
+import tempfile
+import threading
+from typing import Any
+
+# Compression name -> (module, archive file suffix)
+COMPRESSIONS: dict[str, tuple[Any, str]] = {
+    "gzip": (gzip, ".json.gz"),
+    "lzma": (lzma, ".json.xz"),
+}
+
+
+class ArchiveStore:
+    """
+    Compressed archives of entities, grouped by name, with an id index.
+    Archives are rewritten as a whole, they are meant for data that no longer
+    changes.
+    """
+
+    index_file_name: str = "index.json"
+
+    def __init__(self, directory_path: str, compression: str = "gzip"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.directory_path: str = directory_path
+        self.compression: str = compression
+        self._lock = threading.RLock()
+        self._index: dict | None = None
+        self._index_mtime: int | None = None
+        # The last archive read, archives are usually read one group at a time
+        self._open_archive: tuple[str, int, dict] | None = None
+
+    def _get_index_path(self) -> str:
+        """Get the path of the archive index"""
+        return os.path.join(self.directory_path, self.index_file_name)
+
+    def _get_archive_path(self, filename: str) -> str:
+        """Get the path of an archive file"""
+        return os.path.join(self.directory_path, filename)
+
+    def _archive_filename(self, name: str) -> str:
+        """Get the archive file name of a group"""
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        return safe_name + COMPRESSIONS[self.compression][1]
+
+    @staticmethod
+    def _open(file_path: str):
+        """Get the compression module of an archive file from its suffix"""
+        for module, suffix in COMPRESSIONS.values():
+            if file_path.endswith(suffix):
+                return module
+        raise ValueError(f"Not an archive: {file_path}")
+
+    def _replace(self, file_path: str, data: bytes):
+        """Write a file atomically through a temporary file"""
+        os.makedirs(self.directory_path, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.directory_path, prefix=".archive.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _load_index(self) -> dict:
+        """Load the archive index, re-reading it when the file changed"""
+        with self._lock:
+            try:
+                mtime = os.stat(self._get_index_path()).st_mtime_ns
+            except FileNotFoundError:
+                self._index, self._index_mtime = {"entries": {}}, None
+                return self._index
+            if self._index is not None and self._index_mtime == mtime:
+                return self._index
+            with open(self._get_index_path(), "r") as f:
+                index = json.load(f)
+            self._index, self._index_mtime = index, mtime
+            return index
+
+    def _save_index(self, index: dict):
+        """Persist the archive index"""
+        self._replace(self._get_index_path(), json.dumps(index).encode())
+        self._index = index
+        self._index_mtime = os.stat(self._get_index_path()).st_mtime_ns
+
+    def _read_archive(self, filename: str) -> dict:
+        """Read and decompress a whole archive"""
+        file_path = self._get_archive_path(filename)
+        with self._lock:
+            mtime = os.stat(file_path).st_mtime_ns
+            if self._open_archive is not None and self._open_archive[:2] == (
+                filename,
+                mtime,
+            ):
+                return self._open_archive[2]
+            with self._open(file_path).open(file_path, "rt") as f:
+                items = json.load(f)
+            self._open_archive = (filename, mtime, items)
+            return items
+
+    def ids(self) -> list[str]:
+        """List the archived ids"""
+        return list(self._load_index()["entries"])
+
+    def contains(self, id: str) -> bool:
+        """Check whether an entity is archived"""
+        return id in self._load_index()["entries"]
+
+    def summary(self, id: str) -> dict | None:
+        """Get the summary kept in the index for an archived entity"""
+        entry = self._load_index()["entries"].get(id)
+        return None if entry is None else entry["summary"]
+
+    def read(self, id: str) -> dict:
+        """Read an archived entity"""
+        entry = self._load_index()["entries"].get(id)
+        if entry is None:
+            raise FileNotFoundError(f"Not archived: {id}")
+        return copy.deepcopy(self._read_archive(entry["archive"])[id])
+
+    def write(self, name: str, items: list[dict], summaries: dict[str, dict]) -> str:
+        """
+        Add entities to the archive of a group, returning its file name.
+
+        Entities already in the archive are kept unless they were removed from
+        the index since (restored or deleted), so the archive only grows with
+        live data.
+        """
+        filename = self._archive_filename(name)
+        file_path = self._get_archive_path(filename)
+        with self._lock:
+            index = self._load_index()
+            entries = index["entries"]
+            archived: dict = {}
+            if os.path.exists(file_path):
+                archived = {
+                    id: item
+                    for id, item in self._read_archive(filename).items()
+                    if entries.get(id, {}).get("archive") == filename
+                }
+            archived.update({item["id"]: item for item in items})
+
+            module = COMPRESSIONS[self.compression][0]
+            self._replace(file_path, module.compress(json.dumps(archived).encode()))
+            new_entries = dict(entries)
+            for item in items:
+                new_entries[item["id"]] = {
+                    "archive": filename,
+                    "summary": summaries.get(item["id"], {}),
+                }
+            self._save_index({**index, "entries": new_entries})
+        return filename
+
+    def remove(self, ids: list[str]):
+        """
+        Drop entities from the index, deleting archives left without any live
+        entity
+        """
+        with self._lock:
+            index = self._load_index()
+            entries = dict(index["entries"])
+            touched = {entries.pop(id)["archive"] for id in ids if id in entries}
+            if not touched:
+                return
+            self._save_index({**index, "entries": entries})
+            live = {entry["archive"] for entry in entries.values()}
+            for filename in touched - live:
+                try:
+                    os.remove(self._get_archive_path(filename))
+                except FileNotFoundError:
+                    pass
+
+    def disk_usage(self) -> int:
+        """Total size of the archives and their index in bytes"""
+        try:
+            with os.scandir(self.directory_path) as entries:
+                return sum(entry.stat().st_size for entry in entries if entry.is_file())
+        except FileNotFoundError:
+            return 0
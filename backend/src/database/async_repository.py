@@ -0,0 +1,218 @@
+"""
+This module contains awaitable wrappers around the repositories.
+
+Repository calls block on disk I/O. Running them directly inside Flet event
+handlers freezes the UI on slow storage, so these wrappers hand every call to a
+small, bounded thread pool and let the handler await the result.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generic, TypeVar
+
+from config.settings import settings
+from .domain_repositories import (
+    GameRepository,
+    PlayerRepository,
+    PointRepository,
+    TeamRepository,
+)
+
+T = TypeVar("T")
+
+_storage_executor: ThreadPoolExecutor | None = None
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Get the bounded executor shared by all async repositories"""
+    global _storage_executor
+    if _storage_executor is None:
+        _storage_executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_WORKERS, thread_name_prefix="storage"
+        )
+    return _storage_executor
+
+
+class AsyncJsonRepository(Generic[T]):
+    """
+    Awaitable wrapper around a repository.
+    Every method runs the wrapped repository's method on the storage executor.
+    """
+
+    def __init__(self, repository: Any, executor: ThreadPoolExecutor | None = None):
+        self.repository = repository
+        self._executor = executor or get_storage_executor()
+
+    async def _run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run a blocking repository call on the storage executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def find_all(self, fields: list[str] | None = None) -> list[dict]:
+        """Retrieve all records"""
+        return await self._run(self.repository.find_all, fields)
+
+    async def ids(self) -> list[str]:
+        """List the ids of all records"""
+        return await self._run(self.repository.ids)
+
+    async def iter_all(
+        self,
+        order_by: str = "id",
+        limit: int | None = None,
+        after: str | None = None,
+        fields: list[str] | None = None,
+    ) -> list[dict]:
+        """Retrieve one page of records"""
+        return await self._run(
+            lambda: list(self.repository.iter_all(order_by, limit, after, fields))
+        )
+
+    async def find_by_id(self, id: str, fields: list[str] | None = None) -> dict | None:
+        """Find a record by ID"""
+        return await self._run(self.repository.find_by_id, id, fields)
+
+    async def find_header(self, id: str) -> dict:
+        """Find a record by ID without its log fields"""
+        return await self._run(self.repository.find_header, id)
+
+    async def find_many(
+        self, ids: list[str], fields: list[str] | None = None
+    ) -> tuple[list[dict], list[str]]:
+        """Find several records by ID"""
+        return await self._run(self.repository.find_many, ids, fields)
+
+    async def find_by_field(self, field: str, value: Any) -> list[dict]:
+        """Find records by field value"""
+        return await self._run(self.repository.find_by_field, field, value)
+
+    async def create(self, item: dict) -> dict:
+        """Create a new record"""
+        return await self._run(self.repository.create, item)
+
+    async def create_many(self, items: list[dict]) -> list[dict]:
+        """Create several records"""
+        return await self._run(self.repository.create_many, items)
+
+    async def update(self, id: str, item: dict) -> dict | None:
+        """Update an existing record"""
+        return await self._run(self.repository.update, id, item)
+
+    async def update_many(self, items: dict[str, dict]) -> tuple[list[dict], list[str]]:
+        """Update several records"""
+        return await self._run(self.repository.update_many, items)
+
+    async def patch(
+        self, id: str, changes: dict, expected_version: int | None = None
+    ) -> dict | None:
+        """Update only the given top-level fields of a record"""
+        return await self._run(self.repository.patch, id, changes, expected_version)
+
+    async def modify(
+        self, id: str, function: Callable[[dict], dict | None], retries: int = 3
+    ) -> dict | None:
+        """Read, change and write a record, retrying on concurrent updates"""
+        return await self._run(self.repository.modify, id, function, retries)
+
+    async def append_to_log(self, id: str, field: str, record: Any) -> bool:
+        """Append a record to a log field of an entity"""
+        return await self._run(self.repository.append_to_log, id, field, record)
+
+    async def compact(self, id: str) -> dict | None:
+        """Fold the logs of an entity back into a single document"""
+        return await self._run(self.repository.compact, id)
+
+    async def delete(self, id: str) -> bool:
+        """Delete a record"""
+        return await self._run(self.repository.delete, id)
+
+    async def flush(self):
+        """Write out all pending writes"""
+        await self._run(self.repository.flush)
+
+
+class AsyncTeamRepository(AsyncJsonRepository[dict]):
+    def __init__(self, repository: TeamRepository | None = None):
+        self.repository: TeamRepository
+        super().__init__(repository or TeamRepository())
+
+    async def create_team(self, name: str, city: str) -> dict:
+        """Create a new team"""
+        return await self._run(self.repository.create_team, name, city)
+
+    async def add_player_to_team(self, team_id: str, player_id: str) -> dict | None:
+        """Add a player to a team"""
+        return await self._run(self.repository.add_player_to_team, team_id, player_id)
+
+    async def remove_player_from_team(
+        self, team_id: str, player_id: str
+    ) -> dict | None:
+        """Remove a player from a team"""
+        return await self._run(
+            self.repository.remove_player_from_team, team_id, player_id
+        )
+
+
+class AsyncPlayerRepository(AsyncJsonRepository[dict]):
+    def __init__(self, repository: PlayerRepository | None = None):
+        self.repository: PlayerRepository
+        super().__init__(repository or PlayerRepository())
+
+    async def create_player(self, name: str, number: int, role: str) -> dict:
+        """Create a new player"""
+        return await self._run(self.repository.create_player, name, number, role)
+
+    async def find_by_team_id(self, team_id: str) -> list[dict]:
+        """Find all players on a specific team"""
+        return await self._run(self.repository.find_by_team_id, team_id)
+
+
+class AsyncGameRepository(AsyncJsonRepository[dict]):
+    def __init__(self, repository: GameRepository | None = None):
+        self.repository: GameRepository
+        super().__init__(repository or GameRepository())
+
+    async def create_game(self, team1_id: str, team2_id: str) -> dict:
+        """Create a new game"""
+        return await self._run(self.repository.create_game, team1_id, team2_id)
+
+    async def add_point(self, game_id: str, point_data: dict) -> dict | None:
+        """Add a point to the game"""
+        return await self._run(self.repository.add_point, game_id, point_data)
+
+    async def finish_game(self, game_id: str) -> dict | None:
+        """Mark the game as finished"""
+        return await self._run(self.repository.finish_game, game_id)
+
+    async def load_game(self, game_id: str) -> dict | None:
+        """Load a game with its points resolved"""
+        return await self._run(self.repository.load_game, game_id)
+
+
+class AsyncPointRepository(AsyncJsonRepository[dict]):
+    def __init__(self, repository: PointRepository | None = None):
+        self.repository: PointRepository
+        super().__init__(repository or PointRepository())
+
+    async def create_point(
+        self, game_id: str, team1_players: list[str], team2_players: list[str]
+    ) -> dict:
+        """Create a new point"""
+        return await self._run(
+            self.repository.create_point, game_id, team1_players, team2_players
+        )
+
+    async def find_by_game_id(self, game_id: str) -> list[dict]:
+        """Find all points of a specific game"""
+        return await self._run(self.repository.find_by_game_id, game_id)
+
+    async def add_event(self, point_id: str, event_data: dict) -> dict | None:
+        """Add an event to the point"""
+        return await self._run(self.repository.add_event, point_id, event_data)
+
+    async def finish_point(self, point_id: str, **result) -> dict | None:
+        """Mark the point as finished"""
+        return await self._run(self.repository.finish_point, point_id, **result)
@@ -2,34 +2,65 @@
 This module contains the domain repositories for the ultimate frisbee database.
 """
 
-from .repository import JsonRepository
 import os
+from datetime import datetime
 from config.settings import settings
+from models.stats import PlayerStats, TeamStats
 
+if settings.STORAGE_BACKEND == "sqlite":
+    from .sqlite_repository import SqliteRepository as StorageRepository
+else:
+    from .repository import JsonRepository as StorageRepository  # type: ignore[assignment]
 
-class TeamRepository(JsonRepository[dict]):
+
+class TeamRepository(StorageRepository[dict]):
     def __init__(self):
-        super().__init__(directory_path=str(settings.TEAMS_DIR))
+        super().__init__(
+            directory_path=str(settings.TEAMS_DIR),
+            cache_size=settings.REPOSITORY_CACHE_SIZE,
+            fsync=settings.REPOSITORY_FSYNC,
+            commit_window=settings.REPOSITORY_COMMIT_WINDOW,
+        )
 
     def create_team(self, name: str, city: str) -> dict:
         """Create a new team"""
-        return self.create({"name": name, "city": city, "players": []})
+        return self.create(
+            {
+                "name": name,
+                "city": city,
+                "players": [],
+                "stats": TeamStats().model_dump(),
+            }
+        )
 
     def add_player_to_team(self, team_id: str, player_id: str) -> dict | None:
-        """Add a player to a team"""
-        team = self.find_by_id(team_id)
-        if team:
-            if "players" not in team:
-                team["players"] = []
+        """Add a player to a team, safe against concurrent roster changes"""
+
+        def add_player(team: dict):
+            team.setdefault("players", [])
             if player_id not in team["players"]:
                 team["players"].append(player_id)
-            return self.update(team_id, team)
-        return None
 
+        return self.modify(team_id, add_player)
 
-class PlayerRepository(JsonRepository[dict]):
+    def remove_player_from_team(self, team_id: str, player_id: str) -> dict | None:
+        """Remove a player from a team, safe against concurrent roster changes"""
+
+        def remove_player(team: dict):
+            if player_id in team.get("players", []):
+                team["players"].remove(player_id)
+
+        return self.modify(team_id, remove_player)
+
+
+class PlayerRepository(StorageRepository[dict]):
     def __init__(self):
-        super().__init__(directory_path=os.path.join(settings.DATA_DIR, "players"))
+        super().__init__(
+            directory_path=os.path.join(settings.DATA_DIR, "players"),
+            cache_size=settings.REPOSITORY_CACHE_SIZE,
+            fsync=settings.REPOSITORY_FSYNC,
+            commit_window=settings.REPOSITORY_COMMIT_WINDOW,
+        )
 
     def create_player(self, name: str, number: int, role: str) -> dict:
         """Create a new player"""
@@ -38,32 +69,43 @@ class PlayerRepository(JsonRepository[dict]):
                 "name": name,
                 "number": number,
                 "role": role,
-                "stats": {
-                    "games_played": 0,
-                    "points_played": 0,
-                    "goals": 0,
-                    "assists": 0,
-                    "blocks": 0,
-                },
+                "stats": PlayerStats().model_dump(),
             }
         )
 
     def find_by_team_id(self, team_id: str) -> list[dict]:
         """Find all players on a specific team"""
-        results = []
         team_repo = TeamRepository()
         team = team_repo.find_by_id(team_id)
         if team and "players" in team:
-            for player_id in team["players"]:
-                player = self.find_by_id(player_id)
-                if player:
-                    results.append(player)
-        return results
+            players, _ = self.find_many(team["players"])
+            return players
+        return []
+
 
+class GameRepository(StorageRepository[dict]):
+    indexed_fields = ("team1_id", "team2_id", "status")
+    log_fields = ("points",)
+    summary_fields = (
+        "team1_id",
+        "team2_id",
+        "team1_score",
+        "team2_score",
+        "status",
+        "tournament_id",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    )
 
-class GameRepository(JsonRepository[dict]):
     def __init__(self):
-        super().__init__(directory_path=str(settings.GAMES_DIR))
+        super().__init__(
+            directory_path=str(settings.GAMES_DIR),
+            cache_size=settings.REPOSITORY_CACHE_SIZE,
+            fsync=settings.REPOSITORY_FSYNC,
+            commit_window=settings.REPOSITORY_COMMIT_WINDOW,
+            archive_compression=settings.ARCHIVE_COMPRESSION,
+        )
 
     def create_game(self, team1_id: str, team2_id: str) -> dict:
         """Create a new game"""
@@ -79,24 +121,88 @@ class GameRepository(JsonRepository[dict]):
         )
 
     def add_point(self, game_id: str, point_data: dict) -> dict | None:
-        """Add a point to the game"""
-        game = self.find_by_id(game_id)
+        """
+        Add a point to the game.
+
+        The game only keeps a reference to the point, appended to its points log,
+        and the score header is patched, so every goal costs the same no matter
+        how many points were played before. Returns the updated game header.
+        """
+        game = self.find_header(game_id)
         if game:
-            if "points" not in game:
-                game["points"] = []
-            game["points"].append(point_data)
+            if "id" not in point_data:
+                point_data = PointRepository().create(
+                    {**point_data, "game_id": game_id}
+                )
+            self.append_to_log(
+                game_id,
+                "points",
+                {
+                    "point_id": point_data["id"],
+                    "scoring_team": point_data["scoring_team"],
+                },
+            )
             # Update score based on point outcome
-            if point_data["scoring_team"] == game["team1_id"]:
-                game["team1_score"] += 1
-            else:
-                game["team2_score"] += 1
-            return self.update(game_id, game)
+            score_field = (
+                "team1_score"
+                if point_data["scoring_team"] == game["team1_id"]
+                else "team2_score"
+            )
+
+            def score(game: dict):
+                # Re-read on every attempt, another scorekeeper may have scored
+                game[score_field] = game.get(score_field, 0) + 1
+
+            return self.modify(game_id, score)
         return None
 
+    def finish_game(self, game_id: str) -> dict | None:
+        """Mark the game as finished and fold its points log into the game"""
+        changes = {"status": "finished", "finished_at": datetime.now().isoformat()}
+        if self.patch(game_id, changes) is None:
+            return None
+        return self.compact(game_id)
+
+    def load_game(self, game_id: str) -> dict | None:
+        """Load a game with its point references resolved into full points"""
+        game = self.find_by_id(game_id)
+        if game:
+            point_refs = game.get("points", [])
+            found, _ = PointRepository().find_many(
+                [ref["point_id"] for ref in point_refs if "point_id" in ref]
+            )
+            points_by_id = {point["id"]: point for point in found}
+            points = []
+            for point_ref in point_refs:
+                # Games recorded before point references embed the whole point
+                if "point_id" not in point_ref:
+                    points.append(point_ref)
+                elif point_ref["point_id"] in points_by_id:
+                    points.append(points_by_id[point_ref["point_id"]])
+            game["points"] = points
+        return game
+
+
+class PointRepository(StorageRepository[dict]):
+    indexed_fields = ("game_id",)
+    log_fields = ("events",)
+    summary_fields = (
+        "game_id",
+        "status",
+        "scoring_team",
+        "start_time",
+        "end_time",
+        "created_at",
+    )
 
-class PointRepository(JsonRepository[dict]):
     def __init__(self):
-        super().__init__(directory_path=os.path.join(settings.DATA_DIR, "points"))
+        super().__init__(
+            directory_path=os.path.join(settings.DATA_DIR, "points"),
+            cache_size=settings.REPOSITORY_CACHE_SIZE,
+            fsync=settings.REPOSITORY_FSYNC,
+            commit_window=settings.REPOSITORY_COMMIT_WINDOW,
+            archive_compression=settings.ARCHIVE_COMPRESSION,
+        )
 
     def create_point(
         self, game_id: str, team1_players: list[str], team2_players: list[str]
@@ -114,12 +220,38 @@ class PointRepository(JsonRepository[dict]):
             }
         )
 
+    def find_by_game_id(self, game_id: str) -> list[dict]:
+        """Find all points of a specific game"""
+        return self.find_by_field("game_id", game_id)
+
     def add_event(self, point_id: str, event_data: dict) -> dict | None:
-        """Add an event to the point"""
+        """Add an event to the point by appending it to the point's event log"""
+        if self.append_to_log(point_id, "events", event_data):
+            return event_data
+        return None
+
+    def finish_point(self, point_id: str, **result) -> dict | None:
+        """Mark the point as finished and fold its event log into the point"""
         point = self.find_by_id(point_id)
         if point:
-            if "events" not in point:
-                point["events"] = []
-            point["events"].append(event_data)
-            return self.update(point_id, point)
+            point.update(result)
+            point["status"] = "finished"
+            point["end_time"] = datetime.now().isoformat()
+            self.update(point_id, point)
+            return self.compact(point_id)
         return None
+
+
+class StatsStateRepository(StorageRepository[dict]):
+    """
+    Bookkeeping of the stats projection: one record per game with the points
+    already applied to the player and team stats, plus a "schema" record
+    """
+
+    def __init__(self):
+        super().__init__(
+            directory_path=os.path.join(settings.DATA_DIR, "stats"),
+            cache_size=settings.REPOSITORY_CACHE_SIZE,
+            fsync=settings.REPOSITORY_FSYNC,
+            commit_window=settings.REPOSITORY_COMMIT_WINDOW,
+        )
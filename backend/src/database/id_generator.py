@@ -0,0 +1,121 @@
+"""
+This module contains the ID generators used by the repositories.
+
+Ids are strings that sort lexicographically in creation order, so listing and
+paginating a repository only needs the file names. Every id starts with the
+13-digit millisecond timestamp the repositories always used, which keeps old
+records sorting correctly among new ones.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+# Sequence numbers available within one millisecond of one node
+SEQUENCE_LIMIT = 0x10000
+NODE_LIMIT = 0x10000
+
+
+class IdGenerator(ABC):
+    """Base class for ID generators, call an instance to get a new id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+
+    def _next_timestamp(self) -> int:
+        """Current time in milliseconds, never behind the last id handed out"""
+        return max(time.time_ns() // 1_000_000, self._last_timestamp)
+
+    @abstractmethod
+    def generate(self) -> str:
+        """Generate a new id"""
+
+    def __call__(self) -> str:
+        return self.generate()
+
+
+class TimestampIdGenerator(IdGenerator):
+    """
+    Plain millisecond timestamps, as the repositories used to create.
+    Two ids in the same millisecond borrow the next millisecond, so they
+    never collide within a process.
+    """
+
+    def generate(self) -> str:
+        """Generate a new id"""
+        with self._lock:
+            timestamp = self._next_timestamp()
+            if timestamp == self._last_timestamp:
+                timestamp += 1
+            self._last_timestamp = timestamp
+            return f"{timestamp:013d}"
+
+
+class SortableIdGenerator(IdGenerator):
+    """
+    Snowflake-style ids: a 13-digit millisecond timestamp followed by a
+    4-hex-digit sequence and a 4-hex-digit node.
+
+    The sequence restarts every millisecond and is bumped for every id created
+    within the same one, so ids are monotonic within a process. The node tells
+    devices apart, so ids created on two phones at the same time cannot collide.
+    """
+
+    def __init__(self, node: int | None = None):
+        super().__init__()
+        if node is None:
+            node = int.from_bytes(os.urandom(2), "big")
+        if not 0 <= node < NODE_LIMIT:
+            raise ValueError(f"Node must be between 0 and {NODE_LIMIT - 1}")
+        self.node = node
+        self._sequence = 0
+
+    def generate(self) -> str:
+        """Generate a new id"""
+        with self._lock:
+            timestamp = self._next_timestamp()
+            if timestamp == self._last_timestamp:
+                self._sequence += 1
+                if self._sequence == SEQUENCE_LIMIT:
+                    # Sequence exhausted, borrow the next millisecond
+                    timestamp += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_timestamp = timestamp
+            return f"{timestamp:013d}{self._sequence:04x}{self.node:04x}"
+
+
+def id_timestamp(id: str) -> datetime:
+    """Get the creation time encoded in an id"""
+    return datetime.fromtimestamp(int(id[:13]) / 1000)
+
+
+_id_generator: IdGenerator | None = None
+_id_generator_lock = threading.Lock()
+
+
+def get_id_generator() -> IdGenerator:
+    """Get the ID generator shared by all repositories, set up from the settings"""
+    global _id_generator
+    with _id_generator_lock:
+        if _id_generator is None:
+            from config.settings import settings
+
+            if settings.ID_GENERATOR == "timestamp":
+                _id_generator = TimestampIdGenerator()
+            elif settings.ID_GENERATOR == "sortable":
+                _id_generator = SortableIdGenerator(settings.NODE_ID)
+            else:
+                raise ValueError(f"Unknown ID generator: {settings.ID_GENERATOR}")
+        return _id_generator
+
+
+def set_id_generator(generator: IdGenerator):
+    """Replace the ID generator shared by all repositories"""
+    global _id_generator
+    with _id_generator_lock:
+        _id_generator = generator
@@ -0,0 +1,405 @@
+"""
+This module contains the optional instrumentation of the repositories.
+
+When enabled, every public repository method (`find_all`, `find_by_id`,
+`update`, ... and the domain methods such as `add_point`) is timed into a
+latency histogram and counted, tagged by repository class. The file reads and
+writes made while it runs are added to the bytes and files of that call; when
+a method calls another one (`update_many` calls `update`), the I/O is charged
+to the outermost call, the one the UI actually made.
+
+Instrumentation works by wrapping the repository classes in place, so nothing
+is measured and nothing costs anything until `enable_instrumentation` runs.
+The collected metrics can be exported as a JSON snapshot or in the Prometheus
+text format (for node_exporter's textfile collector).
+"""
+
+import atexit
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+from . import repository as repository_module
+from .repository import JsonRepository
+from .sqlite_repository import SqliteRepository
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+# Public methods that are not storage operations
+EXCLUDED_METHODS = ("batch", "cache_info", "clear_cache")
+
+# Low-level I/O of each backend: method -> "read", "write" or "stream"
+IO_METHODS: dict[type, dict[str, str]] = {
+    JsonRepository: {
+        "_read_text": "read",
+        "_iter_log_lines": "stream",
+        "_write_now": "write",
+        "_append_now": "write",
+    },
+    # Every statement that changes rows counts as one file written
+    SqliteRepository: {
+        "_query": "read",
+        "_execute": "write",
+        "_execute_many": "write",
+    },
+}
+
+METRIC_PREFIX = "ultistats_repository"
+
+
+class OperationStats:
+    """Counters and latency histogram of one method of one repository class"""
+
+    def __init__(self):
+        self.calls: int = 0
+        self.errors: int = 0
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+        self.files_read: int = 0
+        self.files_written: int = 0
+        self.latency_sum: float = 0.0
+        # One count per bucket, plus the overflow bucket
+        self.latency_counts: list[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def to_dict(self) -> dict:
+        """Snapshot the counters"""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "files_read": self.files_read,
+            "files_written": self.files_written,
+            "latency": {
+                "sum": self.latency_sum,
+                "buckets": dict(
+                    zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.latency_counts)
+                ),
+            },
+        }
+
+
+class Metrics:
+    """Registry of the operation stats, keyed by repository class and method"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: dict[tuple[str, str], OperationStats] = {}
+
+    def operation(self, repository: str, method: str) -> OperationStats:
+        """Get the stats of a method, creating them on first use"""
+        key = (repository, method)
+        stats = self._operations.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._operations.setdefault(key, OperationStats())
+        return stats
+
+    def record_call(self, stats: OperationStats, seconds: float, failed: bool):
+        """Count a finished call and its latency"""
+        with self._lock:
+            stats.calls += 1
+            stats.errors += failed
+            stats.latency_sum += seconds
+            stats.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def record_io(self, stats: OperationStats, kind: str, size: int):
+        """Count a file read or written during a call"""
+        with self._lock:
+            if kind == "write":
+                stats.files_written += 1
+                stats.bytes_written += size
+            else:
+                stats.files_read += 1
+                stats.bytes_read += size
+
+    def snapshot(self) -> dict:
+        """Get all stats as {repository: {method: counters}}"""
+        with self._lock:
+            result: dict[str, dict[str, dict]] = {}
+            for (repository, method), stats in sorted(self._operations.items()):
+                result.setdefault(repository, {})[method] = stats.to_dict()
+            return result
+
+    def reset(self):
+        """Forget everything collected so far"""
+        with self._lock:
+            self._operations.clear()
+
+    def to_json(self) -> str:
+        """Export the stats as a JSON snapshot"""
+        return json.dumps(
+            {"time": time.time(), "repositories": self.snapshot()}, indent=2
+        )
+
+    def to_prometheus(self) -> str:
+        """Export the stats in the Prometheus text exposition format"""
+        counters = (
+            ("calls", "calls_total", "Repository method calls"),
+            ("errors", "errors_total", "Repository method calls that raised"),
+            ("bytes_read", "read_bytes_total", "Bytes read by repository methods"),
+            (
+                "bytes_written",
+                "written_bytes_total",
+                "Bytes written by repository methods",
+            ),
+            ("files_read", "files_read_total", "Files read by repository methods"),
+            (
+                "files_written",
+                "files_written_total",
+                "Files written by repository methods",
+            ),
+        )
+        snapshot = self.snapshot()
+        rows = [
+            (f'repository="{repository}",method="{method}"', stats)
+            for repository, methods in snapshot.items()
+            for method, stats in methods.items()
+        ]
+        lines: list[str] = []
+        for key, name, description in counters:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            for labels, stats in rows:
+                lines.append(f"{METRIC_PREFIX}_{name}{{{labels}}} {stats[key]}")
+
+        name = f"{METRIC_PREFIX}_latency_seconds"
+        lines.append(f"# HELP {name} Repository method latency")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, stats in rows:
+            cumulative = 0
+            for bound, count in stats["latency"]["buckets"].items():
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {stats['latency']['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {stats['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: str):
+        """
+        Write the stats to a file, in the Prometheus format for a `.prom` file
+        and as JSON otherwise. The file is replaced atomically, so a collector
+        never reads half of it.
+        """
+        text = self.to_prometheus() if file_path.endswith(".prom") else self.to_json()
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(temp_path, file_path)
+
+
+metrics = Metrics()
+
+# The outermost repository call running in the current thread or task
+_current_operation: contextvars.ContextVar[OperationStats | None] = (
+    contextvars.ContextVar("current_operation", default=None)
+)
+
+# (class, name) -> original attribute, for disable_instrumentation
+_originals: dict[tuple[type, str], Any] = {}
+_originals_lock = threading.Lock()
+
+
+def _timed(method: str, function: Callable) -> Callable:
+    """Wrap a public repository method to count and time its calls"""
+
+    if inspect.isgeneratorfunction(function):
+
+        @functools.wraps(function)
+        def generator_wrapper(self, *args, **kwargs):
+            # Only the time spent producing items is counted, not the consumer's
+            stats = metrics.operation(type(self).__name__, method)
+            iterator = function(self, *args, **kwargs)
+            elapsed, failed = 0.0, False
+            try:
+                while True:
+                    token = _current_operation.set(_current_operation.get() or stats)
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    except BaseException:
+                        failed = True
+                        raise
+                    finally:
+                        elapsed += time.perf_counter() - start
+                        _current_operation.reset(token)
+                    yield item
+            finally:
+                metrics.record_call(stats, elapsed, failed)
+
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        stats = metrics.operation(type(self).__name__, method)
+        token = _current_operation.set(_current_operation.get() or stats)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return function(self, *args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            metrics.record_call(stats, time.perf_counter() - start, failed)
+            _current_operation.reset(token)
+
+    return wrapper
+
+
+def _current_stats(repository: Any) -> OperationStats:
+    """Get the stats I/O is charged to, outside of any call the internal ones"""
+    stats = _current_operation.get()
+    if stats is None:
+        stats = metrics.operation(type(repository).__name__, "<internal>")
+    return stats
+
+
+def _payload_size(value: Any) -> int:
+    """Count the characters of the strings in a value, rows or parameters"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_payload_size(item) for item in value)
+    return 0
+
+
+def _counted(kind: str, function: Callable) -> Callable:
+    """Wrap a low-level I/O method to count the files and bytes it moves"""
+
+    if kind == "stream":
+
+        @functools.wraps(function)
+        def stream_wrapper(self, *args, **kwargs):
+            size = 0
+            try:
+                for line in function(self, *args, **kwargs):
+                    size += len(line)
+                    yield line
+            finally:
+                if size:
+                    metrics.record_io(_current_stats(self), "read", size)
+
+        return stream_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        result = function(self, *args, **kwargs)
+        if kind == "write":
+            # (file_path, text, ...) for file writes, (sql, parameters) for
+            # statements: what is written is the text or the parameters
+            written = args[1] if len(args) > 1 else None
+            for name in ("text", "parameters", "rows"):
+                written = kwargs.get(name, written)
+            size = _payload_size(written)
+        elif isinstance(result, str):
+            size = len(result)
+        else:
+            # Rows of a query
+            size = _payload_size(result)
+        metrics.record_io(_current_stats(self), kind, size)
+        return result
+
+    return wrapper
+
+
+def _parallel_map(function: Callable, items: list) -> list:
+    """parallel_map that charges the I/O of its worker threads to the caller"""
+    # Each item gets its own copy, a context cannot be entered by two threads
+    contexts = [contextvars.copy_context() for _ in items]
+    return _original_parallel_map(
+        lambda pair: pair[0].run(function, pair[1]), list(zip(contexts, items))
+    )
+
+
+_original_parallel_map = repository_module.parallel_map
+
+
+def _repository_classes(base: type) -> list[type]:
+    """Get a repository base class and all its subclasses"""
+    classes: list[type] = [base]
+    for subclass in base.__subclasses__():
+        classes.extend(_repository_classes(subclass))
+    return classes
+
+
+def _patch(cls: type, name: str, value: Any):
+    """Replace a class attribute, remembering the original"""
+    _originals.setdefault((cls, name), cls.__dict__[name])
+    setattr(cls, name, value)
+
+
+def enable_instrumentation():
+    """
+    Start collecting metrics on all repository classes defined so far,
+    including the domain repositories. Calling it again is a no-op.
+    """
+    with _originals_lock:
+        if _originals:
+            return
+        for base in (JsonRepository, SqliteRepository):
+            for cls in _repository_classes(base):
+                for name, attribute in list(vars(cls).items()):
+                    if (
+                        name.startswith("_")
+                        or name in EXCLUDED_METHODS
+                        or not inspect.isfunction(attribute)
+                    ):
+                        continue
+                    _patch(cls, name, _timed(name, attribute))
+            for name, kind in IO_METHODS[base].items():
+                _patch(base, name, _counted(kind, vars(base)[name]))
+        repository_module.parallel_map = _parallel_map
+
+
+def disable_instrumentation():
+    """Stop collecting metrics and restore the repository classes"""
+    with _originals_lock:
+        for (cls, name), original in _originals.items():
+            setattr(cls, name, original)
+        _originals.clear()
+        repository_module.parallel_map = _original_parallel_map
+
+
+def instrumentation_enabled() -> bool:
+    """Check whether the repositories are instrumented"""
+    return bool(_originals)
+
+
+def enable_from_settings():
+    """
+    Enable the instrumentation if REPOSITORY_METRICS is set, writing the
+    metrics to REPOSITORY_METRICS_FILE (if set) when the process exits
+    """
+    from config.settings import settings
+
+    if not settings.REPOSITORY_METRICS or instrumentation_enabled():
+        return
+    enable_instrumentation()
+    if settings.REPOSITORY_METRICS_FILE:
+        atexit.register(metrics.write, str(settings.REPOSITORY_METRICS_FILE))
@@ -0,0 +1,206 @@
+"""
+This module contains the write-ahead journal of live point capture.
+
+Every UI-level capture action (point started, player moved, turnover, score)
+is appended to a single journal file as one JSON line before it is applied.
+Lines reach the OS right away and are fsync'd in batches, so recording an
+action costs one small append instead of rewriting documents. When the app is
+killed mid-point, `recover` replays the journal at the next start: scored
+points that were not saved yet are written to the repositories, and points
+still in progress are handed back so the capture can resume.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Iterator
+
+# Actions that close a capture: its point is stored, or it was abandoned
+COMPLETED_ACTIONS = ("point_saved", "capture_discarded")
+
+
+class CaptureJournal:
+    """
+    Append-only journal of capture actions, grouped by capture id (one per
+    point being captured). fsync runs at most every `sync_interval` seconds.
+    """
+
+    def __init__(self, file_path: str, sync_interval: float = 0.5):
+        self.file_path: str = file_path
+        self.sync_interval: float = sync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._dirty: bool = False
+        self._sync_timer: threading.Timer | None = None
+
+    def _open(self):
+        """Open the journal file for appending"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            self._file = open(self.file_path, "a")
+        return self._file
+
+    def record(self, capture_id: str, action: str, **data: Any):
+        """Append an action to the journal, durable after the next sync"""
+        line = json.dumps(
+            {
+                "capture_id": capture_id,
+                "action": action,
+                "time": datetime.now().isoformat(),
+                "data": data,
+            }
+        )
+        with self._lock:
+            f = self._open()
+            f.write(line + "\n")
+            # In the OS page cache now: survives the app being killed
+            f.flush()
+            self._dirty = True
+            if self.sync_interval <= 0:
+                self._sync_locked()
+            elif self._sync_timer is None:
+                self._sync_timer = threading.Timer(self.sync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def _sync_locked(self):
+        """fsync the journal, the lock must be held"""
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+        if self._dirty and self._file is not None:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def sync(self):
+        """Make every recorded action durable"""
+        with self._lock:
+            self._sync_locked()
+
+    def entries(self) -> Iterator[dict]:
+        """Read the journal, skipping a torn last line"""
+        try:
+            with open(self.file_path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def open_captures(self) -> dict[str, list[dict]]:
+        """Group the journal by capture, leaving out the completed ones"""
+        captures: dict[str, list[dict]] = {}
+        for entry in self.entries():
+            captures.setdefault(entry["capture_id"], []).append(entry)
+        return {
+            capture_id: entries
+            for capture_id, entries in captures.items()
+            if entries[-1]["action"] not in COMPLETED_ACTIONS
+        }
+
+    def checkpoint(self):
+        """
+        Drop completed captures from the journal, once their points are saved.
+        Open captures are rewritten to a fresh journal.
+        """
+        with self._lock:
+            self._sync_locked()
+            remaining = [
+                entry for entries in self.open_captures().values() for entry in entries
+            ]
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+
+    def close(self):
+        """Sync and close the journal"""
+        with self._lock:
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def capture_state(entries: list[dict]) -> dict:
+    """Fold the journaled actions of one capture into its latest state"""
+    state: dict = {"player_positions": {}}
+    for entry in entries:
+        action, data = entry["action"], entry["data"]
+        if action == "point_started":
+            state.update(data)
+            state["player_positions"] = {}
+        elif action == "player_moved":
+            state["player_positions"][data["player_id"]] = data["position_id"]
+        elif action == "positions_reset":
+            state["player_positions"] = {}
+        elif action == "turnover":
+            state["offensive_team"] = data["offensive_team"]
+        elif action == "point_scored":
+            state["point"] = data["point"]
+    return state
+
+
+def _game_has_point(game_repository, point: dict) -> bool:
+    """Check whether the game of a point references it in its points log"""
+    game = game_repository.find_by_id(point["game_id"])
+    return any(ref.get("point_id") == point["id"] for ref in game.get("points", []))
+
+
+def save_point(game_repository, point_repository, point: dict, projection=None) -> bool:
+    """
+    Store a scored point and add it to its game, unless that already happened,
+    then apply it to the stats through `projection` (a StatsProjection).
+
+    The point id is assigned when the score is journaled, which makes saving
+    it again during recovery a no-op.
+    """
+    game = game_repository.find_header(point["game_id"])
+    found, _ = point_repository.find_many([point["id"]], fields=["id"])
+    saved = False
+    # The point is stored before its game references it, so only a point that
+    # exists already needs the (longer) points log of its game checked
+    if not found or not _game_has_point(game_repository, point):
+        if not found:
+            point_repository.create(dict(point))
+        game_repository.add_point(point["game_id"], point)
+        saved = True
+    # Applying is idempotent too, a crash may have come between the two
+    if projection is not None:
+        projection.apply_point(point, game)
+    return saved
+
+
+def recover(
+    journal: CaptureJournal, game_repository, point_repository, projection=None
+) -> list[dict]:
+    """
+    Replay the journal into the repositories.
+
+    Scored points are saved, and the states of the points still being captured
+    are returned, most recent last, so the app can resume them.
+    """
+    in_progress: list[dict] = []
+    for capture_id, entries in journal.open_captures().items():
+        state = capture_state(entries)
+        if "point" in state:
+            try:
+                save_point(
+                    game_repository, point_repository, state["point"], projection
+                )
+            except FileNotFoundError:
+                # The game is gone, there is nothing to attach the point to
+                pass
+            journal.record(capture_id, "point_saved", point_id=state["point"]["id"])
+        elif "game_id" in state:
+            in_progress.append({"capture_id": capture_id, **state})
+    journal.checkpoint()
+    return in_progress
@@ -0,0 +1,49 @@
+"""
+This module contains the advisory file locks used to share the data directory
+between processes.
+
+Several scorekeepers (or a scorekeeper and a maintenance script) may write to
+the same entities at once. Writers take an exclusive `flock` on a small lock
+file per entity; readers never lock, since documents are replaced atomically.
+On platforms without `fcntl` the locks are no-ops and only threads of one
+process are kept apart (by the repository's own lock).
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterator
+
+fcntl: ModuleType | None
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Lock files each thread holds, so taking one again is a no-op
+_held = threading.local()
+
+
+@contextmanager
+def file_lock(lock_path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on a lock file while in the block.
+    A thread already holding the lock just enters the block.
+    """
+    held: set[str] = _held.__dict__.setdefault("paths", set())
+    if fcntl is None or lock_path in held:
+        yield
+        return
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        held.add(lock_path)
+        try:
+            yield
+        finally:
+            held.discard(lock_path)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,76 @@
+"""
+One-shot migration of a JSON `data/` tree into the SQLite storage backend.
+
+Usage (from backend/src):
+    python -m database.migrate [--data-dir DIR] [--database FILE]
+"""
+
+import argparse
+import os
+
+from .repository import JsonRepository
+from .sqlite_repository import DATABASE_FILE_NAME, SqliteRepository
+
+
+def migrate_json_to_sqlite(
+    data_dir: str, database_path: str | None = None
+) -> dict[str, dict[str, int]]:
+    """
+    Import every entity directory under data_dir into a SQLite database.
+
+    Each subdirectory holding JSON entity files becomes a table of the same name;
+    hidden directories (such as the event store's) hold no entities and are
+    left out. Records are copied as-is (ids and timestamps are kept) with their
+    field logs folded in, one transaction per table, so re-running the
+    migration simply overwrites the rows. Records without an id are skipped.
+    Returns the imported and skipped counts by table.
+    """
+    database_path = database_path or os.path.join(data_dir, DATABASE_FILE_NAME)
+    imported: dict[str, dict[str, int]] = {}
+    for name in sorted(os.listdir(data_dir)):
+        directory_path = os.path.join(data_dir, name)
+        if name.startswith(".") or not os.path.isdir(directory_path):
+            continue
+        source: JsonRepository = JsonRepository(directory_path, cache_size=0)
+        # Pick up the `<id>.<field>.jsonl` logs so appended records are included
+        source.log_fields = tuple(
+            sorted(
+                {
+                    filename.split(".")[1]
+                    for filename in os.listdir(directory_path)
+                    if filename.endswith(".jsonl") and filename.count(".") == 2
+                }
+            )
+        )
+        items = source.find_all()
+        if not items:
+            continue
+        target: SqliteRepository = SqliteRepository(
+            directory_path, database_path=database_path
+        )
+        count = target.import_records(items)
+        imported[target.table] = {"imported": count, "skipped": len(items) - count}
+    return imported
+
+
+def main():
+    from config.settings import settings
+
+    parser = argparse.ArgumentParser(
+        description="Import a JSON data directory into the SQLite storage backend"
+    )
+    parser.add_argument("--data-dir", default=str(settings.DATA_DIR))
+    parser.add_argument("--database", default=None)
+    args = parser.parse_args()
+
+    imported = migrate_json_to_sqlite(args.data_dir, args.database)
+    for table, counts in imported.items():
+        print(f"{table}: {counts['imported']} records")
+        if counts["skipped"]:
+            print(f"{table}: skipped {counts['skipped']} records without an id")
+    if not imported:
+        print("Nothing to migrate")
+
+
+if __name__ == "__main__":
+    main()
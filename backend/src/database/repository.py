@@ -2,23 +2,159 @@
 This module contains a generic repository class for JSON-based data storage.
 """
 
+import atexit
+import copy
 import json
 import os
-from typing import TypeVar, Generic, Any
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import TypeVar, Generic, Any, Callable, Iterator
 from datetime import datetime
 
+from .archive import ArchiveStore
+from .id_generator import get_id_generator
+from .locking import file_lock
+
 T = TypeVar("T")
+R = TypeVar("R")
+
+# Below this many items the thread pool costs more than it saves
+PARALLEL_THRESHOLD = 4
+
+# Index journal lines kept before they are folded into the index side file,
+# at least; past this the journal is folded once it holds more lines than half
+# the indexed entities, so rewriting the side file stays O(1) per write
+INDEX_JOURNAL_MIN_LINES = 1000
+
+_io_executor: ThreadPoolExecutor | None = None
+_io_executor_lock = threading.Lock()
+
+
+def parallel_map(function: Callable[[Any], R], items: list) -> list[R]:
+    """Apply a blocking I/O function to all items in a shared thread pool"""
+    global _io_executor
+    if len(items) < PARALLEL_THRESHOLD:
+        return [function(item) for item in items]
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(thread_name_prefix="repository-io")
+    return list(_io_executor.map(function, items))
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a record was changed by another writer since it was read"""
+
+    def __init__(self, id: str, expected_version: int, current_version: int):
+        super().__init__(
+            f"Record {id} was changed by another writer "
+            f"(read version {expected_version}, stored version {current_version})"
+        )
+        self.id = id
+        self.expected_version = expected_version
+        self.current_version = current_version
 
 
 class JsonRepository(Generic[T]):
     """
     Generic repository class for JSON-based data storage.
     Stores each entity in a separate JSON file.
+
+    Parsed entities are kept in a bounded LRU cache keyed by id. Each entry
+    remembers the mtime and size of the file it was read from, so a file
+    changed behind the repository's back is read again instead of served stale.
+
+    Subclasses can declare `indexed_fields`; those fields get a secondary index
+    stored in a side file, so `find_by_field` only opens the matching files.
+    Writes that change an indexed value append one line to a journal next to
+    it, under a lock, and the journal is folded into the side file once it
+    grows past half its size. Instances sharing the directory read the lines
+    they missed.
+
+    List fields declared in `log_fields` can grow through `append_to_log`, which
+    appends one JSON line to `<id>.<field>.jsonl` instead of rewriting the
+    document. Readers rebuild the list by streaming the log after the document,
+    and `compact` folds the log back into the document once it stops growing.
+
+    Documents are written to a temporary file and renamed over the target, so
+    an interrupted write never leaves a truncated file behind (`fsync=True`
+    also flushes them to the device). Inside `batch()`, or for `commit_window`
+    seconds after a write, writes and appends are held in memory and flushed
+    together; reads see the pending state in the meantime.
+
+    Queries take an optional `fields` projection. Fields listed in
+    `summary_fields` are also kept in a small `<id>.summary` sidecar, so
+    projections on them never open the full document or its logs.
+
+    `archive` moves entities into compressed archives under `archive/`. They
+    are still listed and found by id, and writing to one restores it first.
+
+    New ids come from `id_generator` (the shared one by default) and sort in
+    creation order, so `iter_all` can order by id on file names alone.
+
+    Several processes can share the directory. Writers of an entity hold an
+    advisory lock on `.locks/<id>.lock` while they read and rewrite it, reads
+    take no lock. Documents carry a `_version` stamp bumped on every update;
+    `update` and `patch` refuse to overwrite a newer version than the one
+    they were given with ConcurrentUpdateError, and `modify` retries such
+    read-modify-write cycles on its own. Grouped writes (`batch`, or a commit
+    window) are checked again when they are flushed: if another writer
+    changed one of their documents meanwhile, the whole group is dropped and
+    the flush raises ConcurrentUpdateError.
     """
 
-    def __init__(self, directory_path: str):
+    indexed_fields: tuple[str, ...] = ()
+    index_file_name: str = ".indexes"
+    index_journal_file_name: str = ".indexes.jsonl"
+    log_fields: tuple[str, ...] = ()
+    summary_fields: tuple[str, ...] = ()
+    archive_dir_name: str = "archive"
+    lock_dir_name: str = ".locks"
+
+    def __init__(
+        self,
+        directory_path: str,
+        cache_size: int = 256,
+        fsync: bool = False,
+        commit_window: float = 0.0,
+        id_generator: Callable[[], str] | None = None,
+        archive_compression: str = "gzip",
+    ):
         self.directory_path: str = directory_path
+        self.archive_store = ArchiveStore(
+            os.path.join(directory_path, self.archive_dir_name), archive_compression
+        )
+        self.id_generator: Callable[[], str] = id_generator or get_id_generator()
+        self.cache_size: int = cache_size
+        self.fsync: bool = fsync
+        self.commit_window: float = commit_window
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self._cache: OrderedDict[str, tuple[tuple[int, ...], dict]] = OrderedDict()
+        self._indexes: dict | None = None
+        self._indexes_dir_mtime: int | None = None
+        # Signatures of the side file and journal the in-memory indexes match
+        self._indexes_signature: tuple | None = None
+        # Bytes and lines of the journal applied to the in-memory indexes
+        self._index_journal_offset: int = 0
+        self._index_journal_lines: int = 0
+        # Built from the documents and not written to the side file yet
+        self._indexes_unsaved: bool = False
+        self._lock = threading.RLock()
+        self._batch_depth: int = 0
+        self._pending_writes: dict[str, tuple[str, bool]] = {}
+        self._pending_appends: dict[str, list[str]] = {}
+        # Document path -> version stored on disk when its first grouped
+        # write was queued (None for a new document), checked on flush
+        self._pending_bases: dict[str, int | None] = {}
+        self._pending_generation: int = 0
+        self._flush_timer: threading.Timer | None = None
         self._ensure_directory_exists()
+        _open_repositories.add(self)
 
     def _ensure_directory_exists(self):
         """Ensure the directory exists"""
@@ -30,66 +166,1281 @@ class JsonRepository(Generic[T]):
 
     def _read_file(self, file_path: str) -> dict:
         """Read data from a specific JSON file"""
-        if os.path.exists(file_path):
-            with open(file_path, "r") as f:
-                return json.load(f)
-        raise FileNotFoundError(f"File not found: {file_path}")
+        with self._lock:
+            pending = self._pending_writes.get(file_path)
+        if pending is not None:
+            return json.loads(pending[0])
+        # Flushes remove pending writes only once they are on disk
+        try:
+            return json.loads(self._read_text(file_path))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+
+    def _read_text(self, file_path: str) -> str:
+        """Read a whole file from disk"""
+        with open(file_path, "r") as f:
+            return f.read()
 
     def _write_file(self, file_path: str, data: dict):
         """Write data to a specific JSON file"""
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=2)
+        self._write_text(file_path, json.dumps(data, indent=2))
+
+    def _write_text(self, file_path: str, text: str, atomic: bool = True):
+        """Write a file now, or queue it while writes are being grouped"""
+        with self._lock:
+            if self._batch_depth == 0 and self.commit_window <= 0:
+                self._write_now(file_path, text, atomic)
+                return
+            if file_path not in self._pending_writes and self._is_document(file_path):
+                self._pending_bases[file_path] = self._stored_version(file_path)
+            self._pending_generation += 1
+            self._pending_writes[file_path] = (text, atomic)
+            self._schedule_flush()
+
+    def _is_document(self, file_path: str) -> bool:
+        """Check whether a path is the document of an entity"""
+        directory, filename = os.path.split(file_path)
+        return (
+            directory == self.directory_path
+            and filename.endswith(".json")
+            and not filename.startswith(".")
+        )
+
+    def _stored_version(self, file_path: str) -> int | None:
+        """Get the version of a document on disk, None if it is not there"""
+        try:
+            return json.loads(self._read_text(file_path)).get("_version", 0)
+        except FileNotFoundError:
+            return None
+
+    def _write_now(self, file_path: str, text: str, atomic: bool = True):
+        """Write a file, replacing it atomically through a temporary file"""
+        if not atomic:
+            with open(file_path, "w") as f:
+                f.write(text)
+            return
+        directory, filename = os.path.split(file_path)
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{filename}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _fsync_directory(self):
+        """Make renames in the directory durable"""
+        if not self.fsync or os.name != "posix":
+            return
+        fd = os.open(self.directory_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _exists(self, file_path: str) -> bool:
+        """Check whether a file exists on disk or is waiting to be flushed"""
+        return (
+            file_path in self._pending_writes
+            or file_path in self._pending_appends
+            or os.path.exists(file_path)
+        )
+
+    def _remove_file(self, file_path: str) -> bool:
+        """Remove a file together with any pending writes to it"""
+        with self._lock:
+            self._pending_bases.pop(file_path, None)
+            pending = self._pending_writes.pop(file_path, None) is not None
+            pending = self._pending_appends.pop(file_path, None) is not None or pending
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            return pending
+        return True
+
+    def _schedule_flush(self):
+        """Start the commit window timer outside of an explicit batch"""
+        if self._batch_depth > 0 or self._flush_timer is not None:
+            return
+        self._flush_timer = threading.Timer(self.commit_window, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    @contextmanager
+    def batch(self) -> Iterator["JsonRepository[T]"]:
+        """Group all writes made inside the block into a single flush"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def flush(self):
+        """
+        Write out all pending writes and appends.
+
+        Raises ConcurrentUpdateError, dropping them all, if another writer
+        changed one of their documents since it was first written to.
+        """
+        with self._lock, ExitStack() as locks:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            writes, appends = self._pending_writes, self._pending_appends
+            if not writes and not appends:
+                return
+            # Held until the group is on disk; taken in id order, so two
+            # processes flushing overlapping groups never wait on each other
+            bases = self._pending_bases
+            ids = sorted(os.path.basename(path)[: -len(".json")] for path in bases)
+            for id in ids:
+                locks.enter_context(file_lock(self._get_lock_path(id)))
+            if self.indexed_fields:
+                # Journal lines of other writers must not land between these
+                locks.enter_context(self._index_lock())
+            for file_path, base in bases.items():
+                stored = self._stored_version(file_path)
+                if stored != base:
+                    self._discard_pending()
+                    id = os.path.basename(file_path)[: -len(".json")]
+                    raise ConcurrentUpdateError(id, base or 0, stored or 0)
+            indexes_fresh = self._indexes_fresh()
+
+            # Log appends go first, like they do for unbatched updates
+            for file_path, chunks in appends.items():
+                self._append_now(file_path, "".join(chunks))
+            for file_path, (text, atomic) in writes.items():
+                self._write_now(file_path, text, atomic)
+            self._fsync_directory()
+            self._pending_writes, self._pending_appends = {}, {}
+            self._pending_bases = {}
+
+            # Cached entries of flushed entities now match the files on disk
+            for file_path in [*writes, *appends]:
+                filename = os.path.basename(file_path)
+                if filename in (self.index_file_name, self.index_journal_file_name):
+                    continue
+                id = filename.split(".")[0]
+                entry = self._cache.get(id)
+                signature = self._entity_signature(id)
+                if entry is not None and signature is not None:
+                    self._cache[id] = (signature, entry[1])
+            if indexes_fresh:
+                self._indexes_dir_mtime = self._directory_mtime()
+                self._indexes_signature = self._index_files_signature()
+                self._compact_indexes()
+            elif self._get_index_journal_path() in appends:
+                # Read again: the offsets of the lines just appended are unknown
+                self._indexes = None
+                self._indexes_signature = None
+
+    def _discard_pending(self):
+        """Drop all pending writes and appends, and what was read from them"""
+        paths = [*self._pending_writes, *self._pending_appends]
+        self._pending_writes, self._pending_appends = {}, {}
+        self._pending_bases = {}
+        for file_path in paths:
+            self._cache.pop(os.path.basename(file_path).split(".")[0], None)
+        self._indexes = None
+        self._indexes_signature = None
+
+    def _file_signature(self, file_path: str) -> tuple[int, int] | None:
+        """Get the (mtime, size) pair used to validate cache entries"""
+        with self._lock:
+            if file_path in self._pending_writes:
+                return -1, self._pending_generation
+            pending_appends = self._pending_appends.get(file_path)
+            pending_size = sum(len(chunk) for chunk in pending_appends or [])
+        try:
+            stat = os.stat(file_path)
+            mtime, size = stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            if pending_appends is None:
+                return None
+            mtime, size = -1, 0
+        return mtime, size + pending_size
+
+    def _get_summary_path(self, id: str) -> str:
+        """Get the summary sidecar path of an entity"""
+        return os.path.join(self.directory_path, f"{id}.summary")
+
+    def _summary_of(self, id: str, item: dict) -> dict:
+        """Build the summary of an entity from its document"""
+        summary = {"id": id}
+        summary.update(
+            {field: item[field] for field in self.summary_fields if field in item}
+        )
+        return summary
+
+    def _write_summary(self, id: str, item: dict) -> dict | None:
+        """Write the summary sidecar of an entity from its document"""
+        if not self.summary_fields:
+            return None
+        summary = self._summary_of(id, item)
+        self._write_text(self._get_summary_path(id), json.dumps(summary))
+        return summary
+
+    def _read_summary(self, id: str) -> dict | None:
+        """
+        Read the summary sidecar of an entity, or None if it is missing or older
+        than the document (which was then written without it)
+        """
+        document = self._file_signature(self._get_file_path(id))
+        if document is None:
+            raise FileNotFoundError(f"File not found: {self._get_file_path(id)}")
+        summary = self._file_signature(self._get_summary_path(id))
+        if summary is None:
+            return None
+        # Pending writes have no mtime yet: a pending summary was written after
+        # the document, a pending document is only covered by a pending summary
+        if summary[0] != -1 and (document[0] == -1 or summary[0] < document[0]):
+            return None
+        try:
+            return self._read_file(self._get_summary_path(id))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _project(item: dict, fields: list[str] | None) -> dict:
+        """Keep only the requested fields of a record"""
+        if fields is None:
+            return item
+        return {field: item.get(field) for field in fields}
+
+    def _load_fields(self, id: str, fields: list[str] | None) -> dict:
+        """
+        Load an entity, reading no more than the requested fields need:
+        the summary sidecar, then the document without its logs, then everything.
+        """
+        if fields is None:
+            return self._load(id)
+        wanted = set(fields) - {"id"}
+        if not self._exists(self._get_file_path(id)) and self.archive_store.contains(
+            id
+        ):
+            archived = self.archive_store.summary(id) or {}
+            if wanted <= set(archived) | {"id"}:
+                return self._project({"id": id, **archived}, fields)
+            return self._project(self._load(id), fields)
+        if self.summary_fields and wanted <= set(self.summary_fields):
+            summary = self._read_summary(id)
+            if summary is None:
+                # Written before summaries existed, or edited by hand
+                header = self.find_header(id)
+                summary = self._write_summary(id, header) or header
+            return self._project(summary, fields)
+        if not wanted & set(self.log_fields):
+            return self._project(self.find_header(id), fields)
+        return self._project(self._load(id), fields)
+
+    def _get_log_path(self, id: str, field: str) -> str:
+        """Get the append-only log path for a list field of an entity"""
+        return os.path.join(self.directory_path, f"{id}.{field}.jsonl")
+
+    def _entity_signature(self, id: str) -> tuple[int, ...] | None:
+        """Get the signature of an entity: its file's mtime and size plus log sizes"""
+        signature = self._file_signature(self._get_file_path(id))
+        if signature is None:
+            return None
+        log_sizes = []
+        for field in self.log_fields:
+            log_signature = self._file_signature(self._get_log_path(id, field))
+            log_sizes.append(-1 if log_signature is None else log_signature[1])
+        return (*signature, *log_sizes)
+
+    def _iter_log_lines(self, id: str, field: str) -> Iterator[str]:
+        """Stream the lines of a field log, including pending appends"""
+        log_path = self._get_log_path(id, field)
+        # Only the snapshot is taken under the lock, the file is streamed
+        # without it; appends flushed meanwhile land past `size` and are
+        # yielded from `pending` instead
+        with self._lock:
+            pending = list(self._pending_appends.get(log_path, []))
+            try:
+                f = open(log_path, "rb")
+            except FileNotFoundError:
+                f = None
+            size = os.fstat(f.fileno()).st_size if f is not None else 0
+        if f is not None:
+            with f:
+                read = 0
+                for line in f:
+                    if read >= size:
+                        break
+                    read += len(line)
+                    yield line.decode("utf-8")
+        for chunk in pending:
+            yield from chunk.splitlines(keepends=True)
+
+    def _read_log(self, id: str, field: str, skip: int = 0) -> list:
+        """Stream the records of a field log, skipping already folded records"""
+        records: list = []
+        for position, line in enumerate(self._iter_log_lines(id, field)):
+            if position < skip:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn line from an interrupted append
+                continue
+        return records
+
+    def _count_log_lines(self, id: str, field: str) -> int:
+        """Count the lines of a field log"""
+        return sum(1 for _ in self._iter_log_lines(id, field))
+
+    def _merge_logs(self, id: str, data: dict) -> dict:
+        """Extend the log fields of a stored document with their logs"""
+        folded = data.pop("_folded", {})
+        for field in self.log_fields:
+            records = self._read_log(id, field, skip=folded.get(field, 0))
+            if records:
+                data[field] = data.get(field, []) + records
+        return data
+
+    def _cache_get(self, id: str, signature: tuple[int, ...]) -> dict | None:
+        """Return a copy of the cached entity if it matches the file signature"""
+        with self._lock:
+            entry = self._cache.get(id)
+            if entry is None or entry[0] != signature:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(id)
+            self.cache_hits += 1
+            return copy.deepcopy(entry[1])
+
+    def _cache_put(self, id: str, data: dict, signature: tuple[int, ...] | None = None):
+        """Store a copy of the entity together with its file signature"""
+        if self.cache_size <= 0:
+            return
+        if signature is None:
+            signature = self._entity_signature(id)
+        with self._lock:
+            if signature is None:
+                self._cache.pop(id, None)
+                return
+            self._cache[id] = (signature, copy.deepcopy(data))
+            self._cache.move_to_end(id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _load(self, id: str) -> dict:
+        """Load an entity through the cache"""
+        file_path = self._get_file_path(id)
+        signature = self._entity_signature(id)
+        if signature is None:
+            with self._lock:
+                self._cache.pop(id, None)
+            if self.archive_store.contains(id):
+                return self.archive_store.read(id)
+            raise FileNotFoundError(f"File not found: {file_path}")
+        cached = self._cache_get(id, signature)
+        if cached is not None:
+            return cached
+        data = self._read_file(file_path)
+        if self.log_fields:
+            data = self._merge_logs(id, data)
+        self._cache_put(id, data, signature)
+        return data
+
+    def _list_ids(self) -> list[str]:
+        """List the ids of all entities stored in the directory"""
+        with os.scandir(self.directory_path) as entries:
+            filenames = {entry.name for entry in entries}
+        filenames.update(os.path.basename(path) for path in list(self._pending_writes))
+        ids = {
+            filename[: -len(".json")]
+            for filename in filenames
+            if filename.endswith(".json") and not filename.startswith(".")
+        }
+        ids.update(self.archive_store.ids())
+        return list(ids)
+
+    @staticmethod
+    def _index_key(value: Any) -> str:
+        """Turn a field value into a stable index key"""
+        return json.dumps(value, sort_keys=True)
+
+    def _get_index_path(self) -> str:
+        """Get the file path of the secondary index side file"""
+        return os.path.join(self.directory_path, self.index_file_name)
+
+    def _get_index_journal_path(self) -> str:
+        """Get the file path of the index changes made since the side file"""
+        return os.path.join(self.directory_path, self.index_journal_file_name)
+
+    def _index_files_signature(self) -> tuple:
+        """Get the signatures of the index side file and its journal"""
+        return (
+            self._file_signature(self._get_index_path()),
+            self._file_signature(self._get_index_journal_path()),
+        )
+
+    def _directory_mtime(self) -> int:
+        """Get the mtime of the repository directory"""
+        return os.stat(self.directory_path).st_mtime_ns
+
+    def _entity_mtimes(self) -> dict[str, int]:
+        """Get the mtime of every entity document in the directory, by id"""
+        mtimes = {}
+        with os.scandir(self.directory_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and not entry.name.startswith("."):
+                    try:
+                        mtimes[entry.name[: -len(".json")]] = entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+        return mtimes
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Keep other threads and processes from writing the indexes meanwhile"""
+        with self._lock, file_lock(self._get_lock_path(self.index_file_name)):
+            yield
+
+    def _load_indexes(self) -> dict:
+        """
+        Load the secondary indexes, repairing them if they went stale.
+
+        The side file holds the indexes as of its last compaction and every
+        change since is appended to a journal; an instance that is behind only
+        reads the journal lines it has not applied yet. Any file created,
+        renamed or removed in the directory changes its mtime; when the
+        recorded mtime no longer matches, the ids on disk are compared with
+        the indexed ids and only the difference, plus the documents changed
+        since the last repair, is (re)indexed.
+        """
+        indexes = self._indexes
+        if indexes is not None and self._indexes_fresh():
+            return indexes
+        with self._index_lock():
+            return self._reload_indexes()
+
+    def _reload_indexes(self) -> dict:
+        """Catch up with the side file and its journal and repair them, under the index lock"""
+        signature = self._index_files_signature()
+        if self._indexes is None or self._indexes_signature != signature:
+            caught_up = (
+                self._indexes is not None
+                and not self._indexes_unsaved
+                and self._indexes_signature is not None
+                and self._indexes_signature[0] == signature[0]
+                and self._get_index_journal_path() not in self._pending_appends
+                and self._replay_index_journal()
+            )
+            if not caught_up:
+                self._read_indexes()
+            self._indexes_signature = self._index_files_signature()
+        indexes = self._indexes
+        assert indexes is not None
+
+        if indexes["dir_mtime"] != self._directory_mtime():
+            # Taken before the scan: documents written during it are newer
+            started = time.time_ns()
+            indexed_at = indexes.get("indexed_at") or 0
+            mtimes = self._entity_mtimes()
+            on_disk = set(self._list_ids())
+            indexed = set(indexes["entries"])
+            changed = [id for id in indexed - on_disk if self._index_remove(id)]
+            for id in on_disk:
+                # Documents rewritten in place keep the directory mtime
+                if id in indexed and mtimes.get(id, 0) < indexed_at:
+                    continue
+                try:
+                    if self._index_put(id, self._load(id)):
+                        changed.append(id)
+                except FileNotFoundError:
+                    continue
+            indexes["indexed_at"] = started
+            self._journal_index_changes(
+                [{"id": id, "keys": indexes["entries"].get(id)} for id in changed]
+                + [{"indexed_at": started}]
+            )
+            self._compact_indexes()
+        self._indexes_dir_mtime = self._directory_mtime()
+        return indexes
+
+    def _read_indexes(self):
+        """Read the side file and its whole journal, or start over without them"""
+        try:
+            indexes = json.loads(self._read_text(self._get_index_path()))
+        except (FileNotFoundError, json.JSONDecodeError):
+            indexes = None
+        self._index_journal_offset = 0
+        self._index_journal_lines = 0
+        if indexes is None or indexes.get("fields") != list(self.indexed_fields):
+            # The journal only makes sense on top of its side file
+            self._indexes = {
+                "fields": list(self.indexed_fields),
+                "dir_mtime": None,
+                "values": {field: {} for field in self.indexed_fields},
+                "entries": {},
+            }
+            self._indexes_unsaved = True
+            return
+        self._indexes = indexes
+        self._indexes_unsaved = False
+        self._replay_index_journal()
+
+    def _replay_index_journal(self) -> bool:
+        """
+        Apply the journal lines appended since the ones already applied.
+        Returns False if the journal is shorter than those, i.e. was reset.
+        """
+        indexes = self._indexes
+        if indexes is None:
+            return False
+        try:
+            with open(self._get_index_journal_path(), "rb") as f:
+                if os.fstat(f.fileno()).st_size < self._index_journal_offset:
+                    return False
+                f.seek(self._index_journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return self._index_journal_offset == 0
+        # A line still being written is applied once it is complete
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line torn by a crash: what it held is found by a repair
+                indexes["dir_mtime"] = None
+                continue
+            self._apply_index_record(record)
+            self._index_journal_lines += 1
+        self._index_journal_offset += end
+        return True
+
+    def _apply_index_record(self, record: dict):
+        """Apply a journal line to the in-memory indexes"""
+        indexes = self._indexes
+        if indexes is None:
+            return
+        if "id" in record:
+            self._index_remove(record["id"])
+            if record["keys"] is not None:
+                self._index_set(
+                    record["id"],
+                    {
+                        field: key
+                        for field, key in record["keys"].items()
+                        if field in self.indexed_fields
+                    },
+                )
+        for key in ("dir_mtime", "indexed_at"):
+            if key in record:
+                indexes[key] = record[key]
+
+    def _journal_index_changes(self, records: list[dict]):
+        """
+        Append index changes, already made in memory, to the journal. The last
+        record gets the directory mtime the indexes now account for.
+        """
+        indexes = self._indexes
+        if indexes is None:
+            return
+        path = self._get_index_journal_path()
+        grouped = self._batch_depth > 0 or self.commit_window > 0
+        if not grouped and not os.path.exists(path):
+            # Created first, so the mtime recorded below already includes it
+            open(path, "a").close()
+        records[-1]["dir_mtime"] = indexes["dir_mtime"] = self._directory_mtime()
+        if self._indexes_unsaved:
+            # Not on disk at all yet, the next compaction writes it whole
+            return
+        text = "".join(json.dumps(record) + "\n" for record in records)
+        self._append_text(path, text)
+        self._index_journal_offset += len(text)
+        self._index_journal_lines += len(records)
+        self._indexes_signature = self._index_files_signature()
+
+    def _compact_indexes(self):
+        """
+        Write the indexes whole to the side file and empty the journal, once it
+        is due (see INDEX_JOURNAL_MIN_LINES). Never while writes are grouped:
+        the side file must not get ahead of them.
+        """
+        if (
+            self._indexes is None
+            or self._pending_writes
+            or self._pending_appends
+            or not (
+                self._indexes_unsaved
+                or self._index_journal_lines
+                > max(INDEX_JOURNAL_MIN_LINES, len(self._indexes["entries"]) // 2)
+            )
+        ):
+            return
+        index_path, journal_path = (
+            self._get_index_path(),
+            self._get_index_journal_path(),
+        )
+        for path in (index_path, journal_path):
+            if not os.path.exists(path):
+                # Created first, so the mtime recorded below already includes it
+                open(path, "a").close()
+        self._indexes["dir_mtime"] = self._directory_mtime()
+        # Written in place: a torn side file only means a rebuild, and not
+        # creating a temporary file keeps the directory mtime stable. Lines
+        # left in the journal by a crash in between are applied again, in order.
+        self._write_now(index_path, json.dumps(self._indexes), atomic=False)
+        self._write_now(journal_path, "", atomic=False)
+        self._index_journal_offset = 0
+        self._index_journal_lines = 0
+        self._indexes_unsaved = False
+        self._indexes_dir_mtime = self._directory_mtime()
+        self._indexes_signature = self._index_files_signature()
+
+    def _index_keys(self, item: dict) -> dict[str, str]:
+        """Get the index keys of an entity, by indexed field"""
+        return {
+            field: self._index_key(item[field])
+            for field in self.indexed_fields
+            if field in item
+        }
+
+    def _index_put(self, id: str, item: dict) -> bool:
+        """Index (or re-index) an entity, returning True if anything changed"""
+        if self._indexes is None:
+            return False
+        keys = self._index_keys(item)
+        if self._indexes["entries"].get(id) == keys:
+            return False
+        self._index_remove(id)
+        self._index_set(id, keys)
+        return True
+
+    def _index_set(self, id: str, keys: dict[str, str]):
+        """Add an entity that is not indexed yet under its keys"""
+        if self._indexes is None:
+            return
+        for field, key in keys.items():
+            self._indexes["values"][field].setdefault(key, []).append(id)
+        self._indexes["entries"][id] = keys
+
+    def _index_remove(self, id: str) -> bool:
+        """Remove an entity from the indexes, returning True if it was indexed"""
+        if self._indexes is None:
+            return False
+        keys = self._indexes["entries"].pop(id, None)
+        if keys is None:
+            return False
+        for field, key in keys.items():
+            ids = self._indexes["values"][field].get(key, [])
+            if id in ids:
+                ids.remove(id)
+            if not ids:
+                self._indexes["values"][field].pop(key, None)
+        return True
 
-    def find_all(self) -> list[dict]:
+    def _indexes_fresh(self) -> bool:
+        """Check whether the in-memory indexes still match the directory"""
+        return (
+            bool(self.indexed_fields)
+            and self._indexes is not None
+            and self._indexes_dir_mtime == self._directory_mtime()
+            and self._indexes_signature == self._index_files_signature()
+        )
+
+    def _index_changed(self, id: str, item: dict | None, was_fresh: bool):
+        """Keep the indexes in step with a create, update or delete"""
+        if not self.indexed_fields:
+            return
+        with self._index_lock():
+            # Catch up with what other instances did first
+            if (
+                not was_fresh
+                or self._indexes_signature != self._index_files_signature()
+            ):
+                self._reload_indexes()
+            keys = None if item is None else self._index_keys(item)
+            changed = (
+                self._index_remove(id) if item is None else self._index_put(id, item)
+            )
+            # Nothing is written when the indexed values stay the same; other
+            # instances only see the directory mtime move and check the
+            # documents changed since their last repair
+            if changed:
+                self._journal_index_changes([{"id": id, "keys": keys}])
+                self._compact_indexes()
+            self._indexes_dir_mtime = self._directory_mtime()
+
+    def rebuild_indexes(self):
+        """Rebuild the secondary indexes from scratch"""
+        with self._index_lock():
+            self._indexes = None
+            self._indexes_dir_mtime = None
+            self._indexes_signature = None
+            self._remove_file(self._get_index_path())
+            self._remove_file(self._get_index_journal_path())
+            if self.indexed_fields:
+                self._reload_indexes()
+
+    def cache_info(self) -> dict:
+        """Return cache statistics"""
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+        }
+
+    def clear_cache(self):
+        """Drop all cached entities"""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _sort_key(value: Any) -> tuple:
+        """Order mixed field values: numbers, then strings, then the rest"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (0, value)
+        if isinstance(value, str):
+            return (1, value)
+        if value is None:
+            return (3, "")
+        return (2, json.dumps(value, sort_keys=True))
+
+    def _ordered_ids(self, order_by: str) -> list[str]:
+        """
+        Sort the entity ids for `iter_all` without parsing the documents.
+
+        Ids sort on the file names alone and indexed fields on the index. Any
+        other field has to read every document.
+        """
+        field = order_by.lstrip("-")
+        reverse = order_by.startswith("-")
+        ids = self._list_ids()
+        if field == "id":
+            return sorted(ids, reverse=reverse)
+
+        if field in self.indexed_fields:
+            entries = self._load_indexes()["entries"]
+
+            def value(id: str) -> Any:
+                key = entries.get(id, {}).get(field)
+                return None if key is None else json.loads(key)
+
+        else:
+
+            def value(id: str) -> Any:
+                try:
+                    return self._load(id).get(field)
+                except FileNotFoundError:
+                    return None
+
+        keys = {id: (self._sort_key(value(id)), id) for id in ids}
+        return sorted(ids, key=keys.__getitem__, reverse=reverse)
+
+    def iter_all(
+        self,
+        order_by: str = "id",
+        limit: int | None = None,
+        after: str | None = None,
+        fields: list[str] | None = None,
+    ) -> Iterator[dict]:
+        """
+        Iterate over the records one page at a time.
+
+        `order_by` is "id" or a field name, prefixed with "-" for descending
+        order. `after` is the id of the last record of the previous page
+        (keyset pagination), and only the records that are actually yielded
+        are read and parsed. `fields` limits each record to those fields.
+        """
+        ids = self._ordered_ids(order_by)
+        if after is not None:
+            if order_by.lstrip("-") == "id":
+                if order_by.startswith("-"):
+                    ids = [id for id in ids if id < after]
+                else:
+                    ids = [id for id in ids if id > after]
+            elif after in ids:
+                ids = ids[ids.index(after) + 1 :]
+        yielded = 0
+        for id in ids:
+            if limit is not None and yielded >= limit:
+                return
+            try:
+                data = self._load_fields(id, fields)
+            except FileNotFoundError:
+                continue
+            if data:
+                yielded += 1
+                yield data
+
+    def find_all(self, fields: list[str] | None = None) -> list[dict]:
         """Retrieve all records"""
-        results = []
-        for filename in os.listdir(self.directory_path):
-            if filename.endswith(".json"):
-                file_path: str = os.path.join(self.directory_path, filename)
-                data = self._read_file(file_path)
-                if data:
-                    results.append(data)
-        if results:
-            return sorted(results, key=lambda x: x.get("id"))
-        return []
-
-    def find_by_id(self, id: str) -> dict | None:
+        return list(self.iter_all(fields=fields))
+
+    def ids(self) -> list[str]:
+        """List the ids of all records, in id order, without reading them"""
+        return sorted(self._list_ids())
+
+    def find_by_id(self, id: str, fields: list[str] | None = None) -> dict | None:
         """Find a record by ID"""
-        file_path = self._get_file_path(id)
-        return self._read_file(file_path)
+        return self._load_fields(id, fields)
+
+    def find_header(self, id: str) -> dict:
+        """Find a record by ID without its log fields, skipping the log reads"""
+        signature = self._entity_signature(id)
+        if signature is None:
+            if not self.archive_store.contains(id):
+                raise FileNotFoundError(f"File not found: {self._get_file_path(id)}")
+            data = self.archive_store.read(id)
+        else:
+            entry = self._cache.get(id)
+            if entry is not None and entry[0] == signature:
+                data = entry[1]
+            else:
+                data = self._read_file(self._get_file_path(id))
+        return {
+            key: copy.deepcopy(value)
+            for key, value in data.items()
+            if key not in self.log_fields and key != "_folded"
+        }
+
+    def find_many(
+        self, ids: list[str], fields: list[str] | None = None
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Find several records by ID, reading the files in parallel.
+
+        Returns the records found, in the order of `ids`, and the missing ids.
+        """
+
+        def load(id: str) -> dict | None:
+            try:
+                return self._load_fields(id, fields)
+            except FileNotFoundError:
+                return None
+
+        loaded = parallel_map(load, list(ids))
+        found = [item for item in loaded if item is not None]
+        missing = [id for id, item in zip(ids, loaded) if item is None]
+        return found, missing
 
     def find_by_field(self, field: str, value: Any) -> list[dict]:
         """Find records by field value"""
-        return [item for item in self.find_all() if item.get(field) == value]
+        if field not in self.indexed_fields:
+            return [item for item in self.find_all() if item.get(field) == value]
+
+        indexes = self._load_indexes()
+        results = []
+        for id in sorted(indexes["values"][field].get(self._index_key(value), [])):
+            try:
+                item = self._load(id)
+            except FileNotFoundError:
+                continue
+            # The file may have been edited in place since it was indexed
+            if item.get(field) == value:
+                results.append(item)
+        return results
+
+    def _get_lock_path(self, id: str) -> str:
+        """Get the advisory lock file of an entity"""
+        return os.path.join(self.directory_path, self.lock_dir_name, f"{id}.lock")
+
+    @contextmanager
+    def _entity_lock(self, id: str) -> Iterator[None]:
+        """Keep other threads and processes from writing an entity meanwhile"""
+        # Always the thread lock first, so two threads never wait on each other
+        with self._lock, file_lock(self._get_lock_path(id)):
+            yield
+
+    @staticmethod
+    def _next_version(id: str, stored: dict, expected_version: int | None) -> int:
+        """Check the version a write was based on and get the one to store"""
+        current_version = stored.get("_version", 0)
+        if expected_version is not None and expected_version != current_version:
+            raise ConcurrentUpdateError(id, expected_version, current_version)
+        return current_version + 1
 
     def create(self, item: dict) -> dict:
         """Create a new record"""
         if "id" not in item:
-            # Generate a timestamp-based ID for better uniqueness
-            item["id"] = str(int(datetime.now().timestamp() * 1000))
+            item["id"] = self.id_generator()
         item["created_at"] = datetime.now().isoformat()
+        item["_version"] = 1
 
         file_path = self._get_file_path(item["id"])
-        self._write_file(file_path, item)
+        with self._entity_lock(item["id"]):
+            indexes_fresh = self._indexes_fresh()
+            self._write_file(file_path, item)
+            self._write_summary(item["id"], item)
+            self._cache_put(item["id"], item)
+            self._index_changed(item["id"], item, indexes_fresh)
         return item
 
+    def archive(self, ids: list[str], name: str) -> list[str]:
+        """
+        Move entities into the compressed archive `name`, returning the ids moved.
+
+        Their documents, logs and summaries leave the directory, the archive
+        index keeps their summaries so they can still be listed.
+        """
+        with self._lock:
+            self.flush()
+            items = []
+            for id in ids:
+                if self._exists(self._get_file_path(id)):
+                    items.append(self._load(id))
+            if not items:
+                return []
+            self.archive_store.write(
+                name,
+                items,
+                {item["id"]: self._summary_of(item["id"], item) for item in items},
+            )
+            # Removed only once the archive is safely written
+            for item in items:
+                id = item["id"]
+                with self._entity_lock(id):
+                    self._cache.pop(id, None)
+                    self._remove_file(self._get_file_path(id))
+                    self._remove_file(self._get_summary_path(id))
+                    for field in self.log_fields:
+                        self._remove_file(self._get_log_path(id, field))
+        return [item["id"] for item in items]
+
+    def _restore_archived(self, id: str) -> bool:
+        """Move an archived entity back into the directory before writing to it"""
+        if self._exists(self._get_file_path(id)) or not self.archive_store.contains(id):
+            return False
+        with self._entity_lock(id):
+            # Another process may have restored it meanwhile
+            if self._exists(self._get_file_path(id)):
+                return False
+            try:
+                item = self.archive_store.read(id)
+            except FileNotFoundError:
+                return False
+            # Written right away: the archive entry is dropped just after
+            self._write_now(self._get_file_path(id), json.dumps(item, indent=2))
+            if self.summary_fields:
+                self._write_now(
+                    self._get_summary_path(id), json.dumps(self._summary_of(id, item))
+                )
+            self.archive_store.remove([id])
+        return True
+
+    def _fold_logs(self, id: str, item: dict, fields: list[str], folded: dict):
+        """
+        Write the document with the given log fields folded in and drop their logs.
+
+        The document is first written with a `_folded` marker holding the number
+        of log lines already included, so a crash before the logs are removed
+        cannot make readers count those records twice.
+        """
+        file_path = self._get_file_path(id)
+        markers = {field: folded[field] for field in folded if field not in fields}
+        for field in fields:
+            markers[field] = self._count_log_lines(id, field)
+        with self._lock:
+            # The steps must reach the disk in order, so they are never grouped
+            self.flush()
+            self._write_now(file_path, json.dumps({**item, "_folded": markers}))
+            for field in fields:
+                self._remove_file(self._get_log_path(id, field))
+                markers.pop(field)
+            document = {**item, "_folded": markers} if markers else item
+            self._write_now(file_path, json.dumps(document, indent=2))
+            if self.summary_fields:
+                self._write_now(
+                    self._get_summary_path(id), json.dumps(self._summary_of(id, item))
+                )
+
+    def _write_entity(self, id: str, item: dict, existing: dict):
+        """
+        Write an updated entity.
+
+        When a log field only grew, the new records are appended to its log and
+        the document keeps its stored part; any other change is folded into
+        the document.
+        """
+        file_path = self._get_file_path(id)
+        if not self.log_fields:
+            self._write_file(file_path, item)
+            return
+
+        stored = self._read_file(file_path)
+        folded = stored.get("_folded", {})
+        document = dict(item)
+        appends: dict[str, list] = {}
+        to_fold: list[str] = []
+        for field in self.log_fields:
+            old = existing.get(field, [])
+            new = item.get(field)
+            if isinstance(new, list) and new[: len(old)] == old:
+                appends[field] = new[len(old) :]
+                document[field] = stored.get(field, [])
+            else:
+                to_fold.append(field)
+
+        for field, records in appends.items():
+            self._append_lines(id, field, records)
+        if to_fold:
+            self._fold_logs(id, document, to_fold, folded)
+        else:
+            self._write_file(
+                file_path, {**document, "_folded": folded} if folded else document
+            )
+
+    def _append_now(self, file_path: str, text: str):
+        """Append text to a file on disk"""
+        with open(file_path, "a") as f:
+            f.write(text)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _append_text(self, file_path: str, text: str):
+        """Append text to a file now, or queue it while writes are being grouped"""
+        with self._lock:
+            if self._batch_depth == 0 and self.commit_window <= 0:
+                self._append_now(file_path, text)
+                return
+            self._pending_appends.setdefault(file_path, []).append(text)
+            self._schedule_flush()
+
+    def _append_lines(self, id: str, field: str, records: list):
+        """Append records to a field log, one JSON document per line"""
+        if not records:
+            return
+        text = "".join(json.dumps(record) + "\n" for record in records)
+        self._append_text(self._get_log_path(id, field), text)
+
+    def append_to_log(self, id: str, field: str, record: Any) -> bool:
+        """
+        Append a record to a log field of an entity without rewriting it.
+
+        Returns False if the entity does not exist.
+        """
+        if field not in self.log_fields:
+            raise ValueError(f"{field} is not a log field of {type(self).__name__}")
+        self._restore_archived(id)
+        file_path = self._get_file_path(id)
+        with self._entity_lock(id):
+            signature = self._entity_signature(id)
+            if signature is None:
+                return False
+
+            if not self._exists(self._get_log_path(id, field)):
+                # A fold interrupted after removing the log leaves a marker
+                # behind that would hide the records of a new log
+                stored = self._read_file(file_path)
+                if field in stored.get("_folded", {}):
+                    stored["_folded"].pop(field)
+                    if not stored["_folded"]:
+                        stored.pop("_folded")
+                    self._write_file(file_path, stored)
+                    self._write_summary(id, stored)
+
+            self._append_lines(id, field, [record])
+
+            # Keep an up to date cache entry current instead of dropping it
+            entry = self._cache.get(id)
+            if entry is not None and entry[0] == signature:
+                entry[1].setdefault(field, []).append(copy.deepcopy(record))
+                new_signature = self._entity_signature(id)
+                if new_signature is not None:
+                    self._cache[id] = (new_signature, entry[1])
+        return True
+
+    def compact(self, id: str) -> dict | None:
+        """Fold the logs of an entity back into a single document"""
+        if not self.log_fields:
+            return self.find_by_id(id)
+        self._restore_archived(id)
+        with self._entity_lock(id):
+            item = self._load(id)
+            fields = [
+                field
+                for field in self.log_fields
+                if self._exists(self._get_log_path(id, field))
+            ]
+            if fields:
+                stored = self._read_file(self._get_file_path(id))
+                self._fold_logs(id, item, fields, stored.get("_folded", {}))
+                self._cache_put(id, item)
+        return item
+
+    def patch(
+        self, id: str, changes: dict, expected_version: int | None = None
+    ) -> dict | None:
+        """
+        Update only the given top-level fields of a record.
+
+        Log fields are left untouched, so the cost does not depend on how long
+        they grew. With `expected_version`, raises ConcurrentUpdateError if
+        the record was changed since that version was read. Returns the
+        patched record without its log fields.
+        """
+        if any(field in self.log_fields for field in changes):
+            raise ValueError("Log fields cannot be patched, append to them instead")
+        self._restore_archived(id)
+        file_path = self._get_file_path(id)
+        with self._entity_lock(id):
+            signature = self._entity_signature(id)
+            if signature is None:
+                return None
+
+            stored = self._read_file(file_path)
+            version = self._next_version(id, stored, expected_version)
+            stored.update(changes)
+            stored["updated_at"] = datetime.now().isoformat()
+            stored["_version"] = version
+            indexes_fresh = self._indexes_fresh()
+            self._write_file(file_path, stored)
+            self._write_summary(id, stored)
+
+            entry = self._cache.get(id)
+            if entry is not None and entry[0] == signature:
+                entry[1].update(copy.deepcopy(changes))
+                entry[1]["updated_at"] = stored["updated_at"]
+                entry[1]["_version"] = version
+                new_signature = self._entity_signature(id)
+                if new_signature is not None:
+                    self._cache[id] = (new_signature, entry[1])
+            else:
+                self._cache.pop(id, None)
+
+            header = {
+                key: value
+                for key, value in stored.items()
+                if key not in self.log_fields and key != "_folded"
+            }
+            self._index_changed(id, header, indexes_fresh)
+        return header
+
     def update(self, id: str, item: dict) -> dict | None:
-        """Update an existing record"""
-        file_path: str = self._get_file_path(id=id)
-        existing = self._read_file(file_path=file_path)
+        """
+        Update an existing record.
+
+        If `item` carries the `_version` it was read at and the record has been
+        changed since, raises ConcurrentUpdateError instead of overwriting it.
+        """
+        self._restore_archived(id)
+        with self._entity_lock(id):
+            try:
+                existing = self._load(id)
+            except FileNotFoundError:
+                return None
+            if not existing:
+                return None
 
-        if existing:
+            version = self._next_version(
+                id, self._read_file(self._get_file_path(id)), item.get("_version")
+            )
             item["id"] = id
             item["updated_at"] = datetime.now().isoformat()
             item["created_at"] = existing.get("created_at")
-            self._write_file(file_path, item)
-            return item
+            item["_version"] = version
+            indexes_fresh = self._indexes_fresh()
+            self._write_entity(id, item, existing)
+            self._write_summary(id, item)
+            self._cache_put(id, item)
+            self._index_changed(id, item, indexes_fresh)
+        return item
+
+    def modify(
+        self, id: str, function: Callable[[dict], dict | None], retries: int = 3
+    ) -> dict | None:
+        """
+        Read a record, change it with `function` and write the fields it changed.
+
+        `function` gets the record without its log fields and changes it in
+        place or returns the new record. If another writer got there first, the
+        record is read again and `function` re-applied, up to `retries` times
+        before ConcurrentUpdateError is raised. Returns None if it does not exist.
+        """
+        for attempt in range(retries + 1):
+            try:
+                current = self.find_header(id)
+            except FileNotFoundError:
+                return None
+            changed = copy.deepcopy(current)
+            result = function(changed)
+            if result is not None:
+                changed = result
+            changes = {
+                key: value
+                for key, value in changed.items()
+                if key not in ("id", "_version", "updated_at")
+                and (key not in current or current[key] != value)
+            }
+            if not changes:
+                return current
+            try:
+                return self.patch(id, changes, current.get("_version", 0))
+            except ConcurrentUpdateError:
+                if attempt == retries:
+                    raise
         return None
 
+    def create_many(self, items: list[dict]) -> list[dict]:
+        """Create several records, written out together in a single flush"""
+        with self.batch():
+            return [self.create(item) for item in items]
+
+    def update_many(self, items: dict[str, dict]) -> tuple[list[dict], list[str]]:
+        """
+        Update several records, written out together in a single flush.
+
+        Returns the updated records, in the order of `items`, and the ids
+        that do not exist.
+        """
+        found, missing = self.find_many(list(items))
+        existing = {item["id"] for item in found}
+        with self.batch():
+            updated = [
+                self.update(id, item) for id, item in items.items() if id in existing
+            ]
+        return [item for item in updated if item is not None], missing
+
     def delete(self, id: str) -> bool:
         """Delete a record"""
         file_path = self._get_file_path(id)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return True
-        return False
+        with self._entity_lock(id):
+            self._cache.pop(id, None)
+            if self._exists(file_path):
+                indexes_fresh = self._indexes_fresh()
+                self._remove_file(file_path)
+                self._remove_file(self._get_summary_path(id))
+                for field in self.log_fields:
+                    self._remove_file(self._get_log_path(id, field))
+                self._index_changed(id, None, indexes_fresh)
+                removed = True
+            elif self.archive_store.contains(id):
+                indexes_fresh = self._indexes_fresh()
+                self.archive_store.remove([id])
+                self._index_changed(id, None, indexes_fresh)
+                removed = True
+            else:
+                removed = False
+        # The lock file is left behind: removing it could split two waiting
+        # writers onto different files
+        return removed
+
+
+_open_repositories: "weakref.WeakSet[JsonRepository]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_repositories():
+    """Flush grouped writes that are still pending when the process exits"""
+    for repository in list(_open_repositories):
+        repository.flush()
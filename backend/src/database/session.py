@@ -0,0 +1,207 @@
+"""
+This module contains the Session class, the storage entry point shared by all views.
+
+The app creates one session and hands it to every view, so the same team and
+roster documents are not parsed again on each screen change. Loaded entities
+live in an identity map: asking twice for the same id returns the same dict.
+Views change those dicts in place, mark them dirty, and `commit` writes all
+dirty entities out at once, one batch per repository. Live point capture goes
+through the session's journal (see database.journal).
+"""
+
+import asyncio
+import os
+import threading
+
+from config.settings import settings
+from .async_repository import (
+    AsyncGameRepository,
+    AsyncPlayerRepository,
+    AsyncPointRepository,
+    AsyncTeamRepository,
+    get_storage_executor,
+)
+from .domain_repositories import (
+    GameRepository,
+    PlayerRepository,
+    PointRepository,
+    StatsStateRepository,
+    TeamRepository,
+)
+from .instrumentation import enable_from_settings
+from .journal import CaptureJournal, recover
+from .repository import ConcurrentUpdateError
+from stats.lineup_index import LINEUP_INDEXES_DIR_NAME, LineupIndexStore
+from stats.pass_network import PASS_NETWORKS_DIR_NAME, PassNetworkStore
+from stats.projection import StatsProjection
+
+
+class Session:
+    """
+    App-scoped identity map and unit of work over the domain repositories.
+    Entities are grouped by kind: "teams", "players", "games" and "points".
+    """
+
+    def __init__(self):
+        enable_from_settings()
+        self.teams = TeamRepository()
+        self.players = PlayerRepository()
+        self.games = GameRepository()
+        self.points = PointRepository()
+        self.async_teams = AsyncTeamRepository(self.teams)
+        self.async_players = AsyncPlayerRepository(self.players)
+        self.async_games = AsyncGameRepository(self.games)
+        self.async_points = AsyncPointRepository(self.points)
+        # Player and team stats, kept current as points are saved
+        self.stats = StatsProjection(
+            self.players, self.teams, self.games, self.points, StatsStateRepository()
+        )
+        # Pass networks and lineup indexes of every team, following the
+        # points the stats get
+        self.pass_networks = PassNetworkStore(
+            os.path.join(settings.DATA_DIR, PASS_NETWORKS_DIR_NAME)
+        )
+        self.pass_networks.attach(self.stats)
+        self.lineup_indexes = LineupIndexStore(
+            os.path.join(settings.DATA_DIR, LINEUP_INDEXES_DIR_NAME)
+        )
+        self.lineup_indexes.attach(self.stats)
+        self.journal = CaptureJournal(
+            os.path.join(settings.DATA_DIR, "journal.jsonl"),
+            settings.JOURNAL_SYNC_INTERVAL,
+        )
+        self._repositories = {
+            "teams": self.teams,
+            "players": self.players,
+            "games": self.games,
+            "points": self.points,
+        }
+        self._identity_map: dict[str, dict[str, dict]] = {
+            kind: {} for kind in self._repositories
+        }
+        self._dirty: dict[str, set[str]] = {kind: set() for kind in self._repositories}
+        self._lock = threading.RLock()
+
+    def recover(self) -> list[dict]:
+        """
+        Replay the capture journal left by a previous run, after rebuilding the
+        stats if they were computed by an older version and finishing the
+        points it left half-applied.
+        Returns the points that were still being captured, most recent last.
+        """
+        if self.stats.needs_rebuild():
+            self.stats.rebuild()
+        self.stats.finish_pending()
+        in_progress = recover(self.journal, self.games, self.points, self.stats)
+        # Games and points changed outside of the identity map
+        self.clear()
+        return in_progress
+
+    def repository(self, kind: str):
+        """Get the repository of an entity kind"""
+        if kind not in self._repositories:
+            raise ValueError(f"Unknown entity kind: {kind}")
+        return self._repositories[kind]
+
+    def get(self, kind: str, id: str) -> dict | None:
+        """Get an entity, loading it only if it is not in the identity map yet"""
+        found = self.get_many(kind, [id])
+        return found[0] if found else None
+
+    def get_many(self, kind: str, ids: list[str]) -> list[dict]:
+        """Get several entities in the order of `ids`, skipping missing ones"""
+        repository = self.repository(kind)
+        with self._lock:
+            loaded = self._identity_map[kind]
+            missing = [id for id in dict.fromkeys(ids) if id not in loaded]
+        if missing:
+            found, _ = repository.find_many(missing)
+            with self._lock:
+                for entity in found:
+                    # Another thread may have loaded it meanwhile, keep the first
+                    loaded.setdefault(entity["id"], entity)
+        with self._lock:
+            return [loaded[id] for id in ids if id in loaded]
+
+    async def get_async(self, kind: str, id: str) -> dict | None:
+        """Get an entity without blocking the event loop"""
+        found = await self.get_many_async(kind, [id])
+        return found[0] if found else None
+
+    async def get_many_async(self, kind: str, ids: list[str]) -> list[dict]:
+        """Get several entities without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_storage_executor(), self.get_many, kind, list(ids)
+        )
+
+    def add(self, kind: str, entity: dict) -> dict:
+        """Put a freshly created or reloaded entity into the identity map"""
+        self.repository(kind)
+        with self._lock:
+            self._identity_map[kind][entity["id"]] = entity
+        return entity
+
+    def mark_dirty(self, kind: str, id: str):
+        """Mark an entity of the identity map as changed"""
+        with self._lock:
+            if id not in self._identity_map[kind]:
+                raise KeyError(f"{kind}/{id} is not loaded in this session")
+            self._dirty[kind].add(id)
+
+    def evict(self, kind: str, id: str):
+        """Drop an entity from the identity map, discarding unsaved changes"""
+        with self._lock:
+            self._identity_map[kind].pop(id, None)
+            self._dirty[kind].discard(id)
+
+    def commit(self) -> int:
+        """
+        Write all dirty entities, one batch per repository, and return their count.
+
+        If another process changed one of them since it was loaded, it is
+        evicted (so the next access loads the stored version), the entities not
+        written yet stay dirty and ConcurrentUpdateError is raised.
+        """
+        with self._lock:
+            pending = {
+                kind: {id: self._identity_map[kind][id] for id in ids}
+                for kind, ids in self._dirty.items()
+                if ids
+            }
+            for ids in self._dirty.values():
+                ids.clear()
+        written = 0
+        batches = list(pending.items())
+        for position, (kind, items) in enumerate(batches):
+            try:
+                updated, missing = self.repository(kind).update_many(items)
+            except ConcurrentUpdateError as error:
+                with self._lock:
+                    for unwritten_kind, unwritten in batches[position:]:
+                        loaded = self._identity_map[unwritten_kind]
+                        self._dirty[unwritten_kind].update(
+                            id for id in unwritten if id in loaded
+                        )
+                self.evict(kind, error.id)
+                raise
+            written += len(updated)
+            # Deleted behind the session's back, there is nothing to keep
+            for id in missing:
+                self.evict(kind, id)
+        return written
+
+    def rollback(self):
+        """Forget unsaved changes, dirty entities are reloaded on next access"""
+        with self._lock:
+            for kind, ids in self._dirty.items():
+                for id in ids:
+                    self._identity_map[kind].pop(id, None)
+                ids.clear()
+
+    def clear(self):
+        """Empty the identity map, dropping unsaved changes"""
+        with self._lock:
+            for kind in self._repositories:
+                self._identity_map[kind].clear()
+                self._dirty[kind].clear()
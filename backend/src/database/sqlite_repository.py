@@ -0,0 +1,532 @@
+"""
+This module contains a generic repository class for SQLite-based data storage.
+"""
+
+import copy
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import TypeVar, Generic, Any, Callable, Iterator
+from datetime import datetime
+
+from .id_generator import get_id_generator
+from .repository import ConcurrentUpdateError
+
+T = TypeVar("T")
+
+DATABASE_FILE_NAME = "ultistats.db"
+
+# How long a writer waits for another process to release the database
+BUSY_TIMEOUT_MS = 5000
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+_connections: dict[str, tuple[sqlite3.Connection, threading.RLock]] = {}
+_connections_lock = threading.Lock()
+
+
+def get_connection(database_path: str) -> tuple[sqlite3.Connection, threading.RLock]:
+    """
+    Get the shared connection for a database file.
+
+    All repositories pointing at the same file share one connection, opened in
+    WAL mode so readers are never blocked by the single writer. Writers of
+    other processes are waited for up to BUSY_TIMEOUT_MS.
+    """
+    database_path = os.path.abspath(database_path)
+    with _connections_lock:
+        if database_path not in _connections:
+            os.makedirs(os.path.dirname(database_path), exist_ok=True)
+            connection = sqlite3.connect(
+                database_path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            _connections[database_path] = (connection, threading.RLock())
+        return _connections[database_path]
+
+
+class SqliteRepository(Generic[T]):
+    """
+    Generic repository class for SQLite-based data storage.
+    Drop-in replacement for JsonRepository: every directory becomes a table
+    in a single database file that sits next to the directories.
+
+    Each entity is stored as a JSON document. Fields listed in `indexed_fields`
+    get an expression index on `json_extract`, so `find_by_field` is an index
+    lookup instead of a table scan. Records appended to `log_fields` go to a
+    companion `<table>_log` table as single-row inserts.
+
+    Queries take an optional `fields` projection, extracted inside SQLite so
+    the rest of the document is never decoded. `summary_fields` is accepted
+    for compatibility with JsonRepository.
+
+    Documents carry the same `_version` stamp as JsonRepository, checked and
+    bumped inside the write transaction. Transactions take the write lock
+    up front, so a writer never fails half-way because of another process.
+    """
+
+    indexed_fields: tuple[str, ...] = ()
+    log_fields: tuple[str, ...] = ()
+    summary_fields: tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        directory_path: str,
+        cache_size: int = 256,
+        fsync: bool = False,
+        commit_window: float = 0.0,
+        database_path: str | None = None,
+        id_generator: Callable[[], str] | None = None,
+        archive_compression: str = "gzip",
+    ):
+        # cache_size, commit_window and archive_compression are accepted for
+        # compatibility with JsonRepository, SQLite keeps its own page cache,
+        # groups writes through transactions (see batch) and is not tiered
+        self.directory_path: str = directory_path
+        self.id_generator: Callable[[], str] = id_generator or get_id_generator()
+        self.table: str = os.path.basename(os.path.normpath(directory_path))
+        if not _IDENTIFIER.fullmatch(self.table):
+            raise ValueError(f"Invalid table name: {self.table}")
+        self.database_path: str = database_path or os.path.join(
+            os.path.dirname(os.path.normpath(directory_path)), DATABASE_FILE_NAME
+        )
+        self._connection, self._lock = get_connection(self.database_path)
+        if fsync:
+            self._connection.execute("PRAGMA synchronous=FULL")
+        self._ensure_table_exists()
+
+    def _ensure_table_exists(self):
+        """Ensure the table and its field indexes exist"""
+        with self._lock:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL CHECK (json_valid(data)))"
+            )
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table}_log ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "id TEXT NOT NULL, "
+                "field TEXT NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_log_id_idx "
+                f"ON {self.table}_log (id, field, seq)"
+            )
+            for field in self.indexed_fields:
+                if not _IDENTIFIER.fullmatch(field):
+                    raise ValueError(f"Invalid indexed field name: {field}")
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_{field}_idx "
+                    f"ON {self.table} (json_extract(data, '$.{field}'))"
+                )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the block in a transaction, or a savepoint when one is open"""
+        with self._lock:
+            if self._connection.in_transaction:
+                self._connection.execute("SAVEPOINT nested")
+                try:
+                    yield
+                except BaseException:
+                    self._connection.execute("ROLLBACK TO nested")
+                    self._connection.execute("RELEASE nested")
+                    raise
+                self._connection.execute("RELEASE nested")
+            else:
+                # IMMEDIATE: the version read inside the block stays valid
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    yield
+                except BaseException:
+                    self._connection.execute("ROLLBACK")
+                    raise
+                self._connection.execute("COMMIT")
+
+    @contextmanager
+    def batch(self) -> Iterator["SqliteRepository[T]"]:
+        """Group all writes made inside the block into a single transaction"""
+        with self._transaction():
+            yield self
+
+    def flush(self):
+        """Nothing to flush, writes are committed by their transaction"""
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """Run a statement that changes rows"""
+        with self._lock:
+            return self._connection.execute(sql, parameters)
+
+    def _execute_many(self, sql: str, rows: list[tuple]) -> sqlite3.Cursor:
+        """Run a statement that changes rows once per row of parameters"""
+        with self._lock:
+            return self._connection.executemany(sql, rows)
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        """Run a read statement and fetch all rows"""
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _decode(self, rows: list[tuple]) -> list[dict]:
+        """Decode document rows and extend their log fields with the log table"""
+        items = [json.loads(data) for (data,) in rows]
+        if not self.log_fields or not items:
+            return items
+
+        by_id = {item["id"]: item for item in items}
+        if len(by_id) == 1:
+            log_rows = self._query(
+                f"SELECT id, field, data FROM {self.table}_log "
+                "WHERE id = ? ORDER BY seq",
+                (items[0]["id"],),
+            )
+        else:
+            log_rows = self._query(
+                f"SELECT id, field, data FROM {self.table}_log "
+                "WHERE id IN (SELECT value FROM json_each(?)) ORDER BY seq",
+                (json.dumps(list(by_id)),),
+            )
+        for id, field, data in log_rows:
+            if id in by_id and field in self.log_fields:
+                by_id[id].setdefault(field, []).append(json.loads(data))
+        return items
+
+    def _columns(self, fields: list[str] | None) -> str | None:
+        """
+        Build the select expression of a projection, or None when the full
+        documents are needed (no projection, log fields or odd field names)
+        """
+        if fields is None or any(
+            field in self.log_fields or not _IDENTIFIER.fullmatch(field)
+            for field in fields
+        ):
+            return None
+        pairs = ", ".join(
+            f"'{field}', json_extract(data, '$.{field}')" for field in fields
+        )
+        return f"json_object({pairs})"
+
+    def _select(self, fields: list[str] | None, rows_sql: str, parameters=()) -> list:
+        """Run a document query, applying the projection"""
+        columns = self._columns(fields)
+        if columns is not None:
+            rows = self._query(rows_sql.format(columns=columns), parameters)
+            return [json.loads(data) for (data,) in rows]
+        items = self._decode(self._query(rows_sql.format(columns="data"), parameters))
+        if fields is None:
+            return items
+        return [{field: item.get(field) for field in fields} for item in items]
+
+    def iter_all(
+        self,
+        order_by: str = "id",
+        limit: int | None = None,
+        after: str | None = None,
+        fields: list[str] | None = None,
+    ) -> Iterator[dict]:
+        """
+        Iterate over the records one page at a time.
+
+        `order_by` is "id" or a field name, prefixed with "-" for descending
+        order. `after` is the id of the last record of the previous page
+        (keyset pagination), only the requested page is fetched. `fields`
+        limits each record to those fields.
+        """
+        field = order_by.lstrip("-")
+        if not _IDENTIFIER.fullmatch(field):
+            raise ValueError(f"Invalid order field: {field}")
+        descending = order_by.startswith("-")
+        direction = "DESC" if descending else "ASC"
+        comparison = "<" if descending else ">"
+
+        if field == "id":
+            seek = f"id {comparison} ?"
+            order = f"id {direction}"
+        else:
+            # Row values order by the field first and break ties on the id
+            key = f"json_extract(data, '$.{field}'), id"
+            seek = f"({key}) {comparison} (SELECT {key} FROM {self.table} WHERE id = ?)"
+            order = f"json_extract(data, '$.{field}') {direction}, id {direction}"
+
+        sql = f"SELECT {{columns}} FROM {self.table}"
+        parameters: tuple = ()
+        if after is not None:
+            sql += f" WHERE {seek}"
+            parameters += (after,)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters += (limit,)
+        yield from self._select(fields, sql, parameters)
+
+    def find_all(self, fields: list[str] | None = None) -> list[dict]:
+        """Retrieve all records"""
+        return list(self.iter_all(fields=fields))
+
+    def ids(self) -> list[str]:
+        """List the ids of all records, in id order, without reading them"""
+        return [
+            row[0] for row in self._query(f"SELECT id FROM {self.table} ORDER BY id")
+        ]
+
+    def find_by_id(self, id: str, fields: list[str] | None = None) -> dict | None:
+        """Find a record by ID"""
+        items = self._select(
+            fields, f"SELECT {{columns}} FROM {self.table} WHERE id = ?", (id,)
+        )
+        if not items:
+            raise FileNotFoundError(f"Record not found: {self.table}/{id}")
+        return items[0]
+
+    def find_header(self, id: str) -> dict:
+        """Find a record by ID without its log fields, skipping the log reads"""
+        rows = self._query(f"SELECT data FROM {self.table} WHERE id = ?", (id,))
+        if not rows:
+            raise FileNotFoundError(f"Record not found: {self.table}/{id}")
+        data = json.loads(rows[0][0])
+        return {key: value for key, value in data.items() if key not in self.log_fields}
+
+    def find_many(
+        self, ids: list[str], fields: list[str] | None = None
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Find several records by ID in a single query.
+
+        Returns the records found, in the order of `ids`, and the missing ids.
+        """
+        # The id is always selected to match the records back to `ids`
+        selected = None if fields is None else ["id", *fields]
+        items = self._select(
+            selected,
+            f"SELECT {{columns}} FROM {self.table} "
+            "WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(ids)),),
+        )
+        by_id = {item["id"]: item for item in items}
+        found = [by_id[id] for id in ids if id in by_id]
+        if fields is not None:
+            found = [{field: item.get(field) for field in fields} for item in found]
+        missing = [id for id in ids if id not in by_id]
+        return found, missing
+
+    def find_by_field(self, field: str, value: Any) -> list[dict]:
+        """Find records by field value"""
+        if not _IDENTIFIER.fullmatch(field) or isinstance(value, (dict, list)):
+            return [item for item in self.find_all() if item.get(field) == value]
+
+        # The path is inlined so the query matches the expression index
+        if value is None:
+            rows = self._query(
+                f"SELECT data FROM {self.table} "
+                f"WHERE json_extract(data, '$.{field}') IS NULL ORDER BY id"
+            )
+        else:
+            rows = self._query(
+                f"SELECT data FROM {self.table} "
+                f"WHERE json_extract(data, '$.{field}') = ? ORDER BY id",
+                (int(value) if isinstance(value, bool) else value,),
+            )
+        # json_extract maps true/false to 1/0, so re-check the decoded value
+        items = self._decode(rows)
+        return [item for item in items if item.get(field) == value]
+
+    def create(self, item: dict) -> dict:
+        """Create a new record"""
+        if "id" not in item:
+            item["id"] = self.id_generator()
+        item["created_at"] = datetime.now().isoformat()
+        item["_version"] = 1
+
+        self._execute(
+            f"INSERT OR REPLACE INTO {self.table} (id, data) VALUES (?, ?)",
+            (item["id"], json.dumps(item)),
+        )
+        return item
+
+    def import_records(self, items: list[dict]) -> int:
+        """
+        Insert already stored records as-is in a single transaction.
+        Records without an id are skipped. Returns the number imported.
+        """
+        rows = [(item["id"], json.dumps(item)) for item in items if item.get("id")]
+        with self._transaction():
+            self._execute_many(
+                f"INSERT OR REPLACE INTO {self.table} (id, data) VALUES (?, ?)", rows
+            )
+        return len(rows)
+
+    def _next_version(self, id: str, expected_version: int | None) -> int | None:
+        """
+        Check the version a write was based on and get the one to store,
+        None if the record does not exist. Runs inside the write transaction.
+        """
+        rows = self._query(
+            f"SELECT coalesce(json_extract(data, '$._version'), 0) "
+            f"FROM {self.table} WHERE id = ?",
+            (id,),
+        )
+        if not rows:
+            return None
+        current_version = rows[0][0]
+        if expected_version is not None and expected_version != current_version:
+            raise ConcurrentUpdateError(id, expected_version, current_version)
+        return current_version + 1
+
+    def update(self, id: str, item: dict) -> dict | None:
+        """
+        Update an existing record.
+
+        If `item` carries the `_version` it was read at and the record has been
+        changed since, raises ConcurrentUpdateError instead of overwriting it.
+        """
+        with self._transaction():
+            version = self._next_version(id, item.get("_version"))
+            if version is None:
+                return None
+            existing = self.find_header(id)
+            item["id"] = id
+            item["updated_at"] = datetime.now().isoformat()
+            item["created_at"] = existing.get("created_at")
+            item["_version"] = version
+            self._execute(
+                f"UPDATE {self.table} SET data = ? WHERE id = ?",
+                (json.dumps(item), id),
+            )
+            # The document now carries the full lists
+            self._execute(f"DELETE FROM {self.table}_log WHERE id = ?", (id,))
+        return item
+
+    def patch(
+        self, id: str, changes: dict, expected_version: int | None = None
+    ) -> dict | None:
+        """
+        Update only the given top-level fields of a record.
+
+        Log fields are left untouched, so the cost does not depend on how long
+        they grew. With `expected_version`, raises ConcurrentUpdateError if
+        the record was changed since that version was read. Returns the
+        patched record without its log fields.
+        """
+        if any(field in self.log_fields for field in changes):
+            raise ValueError("Log fields cannot be patched, append to them instead")
+        changes = {**changes, "updated_at": datetime.now().isoformat()}
+        with self._transaction():
+            version = self._next_version(id, expected_version)
+            if version is None:
+                return None
+            # Fields are replaced whole: json_patch would merge nested objects
+            fields = {**changes, "_version": version}
+            paths = ", ".join("?, json(?)" for _ in fields)
+            parameters: list = []
+            for field, value in fields.items():
+                parameters += [f'$."{field}"', json.dumps(value)]
+            self._execute(
+                f"UPDATE {self.table} SET data = json_set(data, {paths}) WHERE id = ?",
+                (*parameters, id),
+            )
+            return self.find_header(id)
+
+    def modify(
+        self, id: str, function: Callable[[dict], dict | None], retries: int = 3
+    ) -> dict | None:
+        """
+        Read a record, change it with `function` and write the fields it changed.
+
+        `function` gets the record without its log fields and changes it in
+        place or returns the new record. If another writer got there first, the
+        record is read again and `function` re-applied, up to `retries` times
+        before ConcurrentUpdateError is raised. Returns None if it does not exist.
+        """
+        for attempt in range(retries + 1):
+            try:
+                current = self.find_header(id)
+            except FileNotFoundError:
+                return None
+            changed = copy.deepcopy(current)
+            result = function(changed)
+            if result is not None:
+                changed = result
+            changes = {
+                key: value
+                for key, value in changed.items()
+                if key not in ("id", "_version", "updated_at")
+                and (key not in current or current[key] != value)
+            }
+            if not changes:
+                return current
+            try:
+                return self.patch(id, changes, current.get("_version", 0))
+            except ConcurrentUpdateError:
+                if attempt == retries:
+                    raise
+        return None
+
+    def append_to_log(self, id: str, field: str, record: Any) -> bool:
+        """
+        Append a record to a log field of an entity without rewriting it.
+
+        Returns False if the entity does not exist.
+        """
+        if field not in self.log_fields:
+            raise ValueError(f"{field} is not a log field of {type(self).__name__}")
+        cursor = self._execute(
+            f"INSERT INTO {self.table}_log (id, field, data) "
+            f"SELECT id, ?, ? FROM {self.table} WHERE id = ?",
+            (field, json.dumps(record), id),
+        )
+        return cursor.rowcount > 0
+
+    def compact(self, id: str) -> dict | None:
+        """Fold the logs of an entity back into a single document"""
+        with self._lock:
+            item = self.find_by_id(id)
+            if item is not None and self.log_fields:
+                with self._transaction():
+                    self._execute(
+                        f"UPDATE {self.table} SET data = ? WHERE id = ?",
+                        (json.dumps(item), id),
+                    )
+                    self._execute(f"DELETE FROM {self.table}_log WHERE id = ?", (id,))
+        return item
+
+    def create_many(self, items: list[dict]) -> list[dict]:
+        """Create several records in a single transaction"""
+        with self.batch():
+            return [self.create(item) for item in items]
+
+    def update_many(self, items: dict[str, dict]) -> tuple[list[dict], list[str]]:
+        """
+        Update several records in a single transaction.
+
+        Returns the updated records, in the order of `items`, and the ids
+        that do not exist.
+        """
+        found, missing = self.find_many(list(items))
+        existing = {item["id"] for item in found}
+        with self.batch():
+            updated = [
+                self.update(id, item) for id, item in items.items() if id in existing
+            ]
+        return [item for item in updated if item is not None], missing
+
+    def delete(self, id: str) -> bool:
+        """Delete a record"""
+        with self._transaction():
+            cursor = self._execute(f"DELETE FROM {self.table} WHERE id = ?", (id,))
+            self._execute(f"DELETE FROM {self.table}_log WHERE id = ?", (id,))
+        return cursor.rowcount > 0
+
+    def rebuild_indexes(self):
+        """Rebuild the field indexes of the table"""
+        with self._lock:
+            self._connection.execute(f"REINDEX {self.table}")
@@ -0,0 +1,86 @@
+"""
+Cold-storage tiering of finished games.
+
+Finished games older than ARCHIVE_AFTER_DAYS are moved, together with their
+points, into one compressed archive per tournament (or per month for games
+without a tournament). They stay readable through the repositories.
+
+Usage (from backend/src):
+    python -m database.tiering [--days N]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from .domain_repositories import GameRepository, PointRepository
+from .repository import JsonRepository
+
+GAME_FIELDS = ["id", "status", "tournament_id", "created_at", "finished_at"]
+
+
+def archive_name(game: dict) -> str:
+    """Get the archive a game belongs to: its tournament, or its month"""
+    if game.get("tournament_id"):
+        return f"tournament-{game['tournament_id']}"
+    return f"month-{(game.get('created_at') or '')[:7] or 'unknown'}"
+
+
+def archive_finished_games(
+    older_than_days: int,
+    game_repository: GameRepository | None = None,
+    point_repository: PointRepository | None = None,
+    now: datetime | None = None,
+) -> dict[str, tuple[int, int]]:
+    """
+    Archive the finished games older than `older_than_days` and their points.
+
+    Returns the number of games and points moved into each archive. The SQLite
+    backend is not tiered, nothing is archived there.
+    """
+    games = game_repository or GameRepository()
+    points = point_repository or PointRepository()
+    if not isinstance(games, JsonRepository) or not isinstance(points, JsonRepository):
+        return {}
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+
+    groups: dict[str, list[str]] = {}
+    # Served from the summaries, the game documents are not opened
+    for game in games.iter_all(fields=GAME_FIELDS):
+        if game["status"] != "finished" or games.archive_store.contains(game["id"]):
+            continue
+        finished_at = game["finished_at"] or game["created_at"]
+        if finished_at and datetime.fromisoformat(finished_at) <= cutoff:
+            groups.setdefault(archive_name(game), []).append(game["id"])
+
+    archived: dict[str, tuple[int, int]] = {}
+    for name, game_ids in groups.items():
+        point_ids = [
+            point["id"]
+            for game_id in game_ids
+            for point in points.find_by_field("game_id", game_id)
+        ]
+        # Points first: a game is only archived once its points are
+        moved_points = points.archive(point_ids, name)
+        moved_games = games.archive(game_ids, name)
+        archived[name] = (len(moved_games), len(moved_points))
+    return archived
+
+
+def main():
+    from config.settings import settings
+
+    parser = argparse.ArgumentParser(
+        description="Move old finished games and their points to compressed archives"
+    )
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+
+    archived = archive_finished_games(args.days)
+    for name, (game_count, point_count) in archived.items():
+        print(f"{name}: {game_count} games, {point_count} points")
+    if not archived:
+        print("Nothing to archive")
+
+
+if __name__ == "__main__":
+    main()
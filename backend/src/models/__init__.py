@@ -183,3 +183,17 @@ class Action(BaseModel):
     It have to cover all the possible actions that can occur during a point.
     And by its id we can determine the order of the actions.
     """
+
+    id: str = Field(description="ID of the action, sorts in the order of the point")
+    event: DiscEvent
+    team_id: str | None = Field(default=None, description="ID of the acting team")
+    player_id: str | None = Field(
+        default=None, description="ID of the acting player (thrower, defender, ...)"
+    )
+    receiver_id: str | None = Field(
+        default=None, description="ID of the player the disc was thrown to"
+    )
+    throw_type: ThrowType | None = None
+    call_type: CallType | None = None
+    call_result: CallResult | None = None
+    timestamp: str | None = None
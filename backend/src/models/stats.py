@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+
+
+class PlayerStats(BaseModel):
+    """Aggregated statistics of a player, kept in the player's `stats` block"""
+
+    games_played: int = 0
+    points_played: int = 0
+    goals: int = 0
+    assists: int = 0
+    blocks: int = 0
+    turnovers: int = 0
+    drops: int = 0
+    # Goals scored minus goals conceded while on the field
+    plus_minus: int = 0
+    callahans: int = 0
+    # Pulls thrown, by how they ended up
+    pulls: int = 0
+    pulls_caught: int = 0
+    pulls_lifted: int = 0
+    pulls_out_of_bounds: int = 0
+    pulls_bricked: int = 0
+
+
+class TeamStats(BaseModel):
+    """Aggregated statistics of a team, kept in the team's `stats` block"""
+
+    games_played: int = 0
+    points_played: int = 0
+    goals_for: int = 0
+    goals_against: int = 0
+    # Points scored after receiving the pull, and after pulling
+    holds: int = 0
+    breaks: int = 0
+    # Pulls thrown, by how they ended up, and the breaks that followed each kind
+    pulls: int = 0
+    pulls_caught: int = 0
+    pulls_lifted: int = 0
+    pulls_out_of_bounds: int = 0
+    pulls_bricked: int = 0
+    breaks_after_caught: int = 0
+    breaks_after_lifted: int = 0
+    breaks_after_out_of_bounds: int = 0
+    breaks_after_bricked: int = 0
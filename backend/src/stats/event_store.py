@@ -0,0 +1,349 @@
+"""
+Columnar store of the actions of every point, for season-scale analytics.
+
+Each action becomes one row spread over fixed-width NumPy columns: ids (games,
+points, teams, players) are replaced by integer codes from dictionaries, and
+the enums (DiscEvent, ThrowType, CallType, CallResult) by their position. A
+column is a raw little-endian file that only grows, memory-mapped for reading,
+so a query over a whole season touches a few megabytes of contiguous integers
+instead of thousands of JSON documents. `meta.json` holds the dictionaries and
+the committed row count: rows past it (an interrupted append) are ignored and
+overwritten by the next append.
+
+The store is filled incrementally from the repositories (`sync` lists the
+point ids and only reads points it has not seen yet) and answers vectorized
+group-by counts.
+
+Usage (from backend/src):
+    python -m stats.event_store
+"""
+
+import json
+import os
+import tempfile
+import threading
+from enum import Enum
+from typing import Any, Iterable
+
+import numpy as np
+
+from models import CallResult, CallType, DiscEvent, ThrowType
+from .projection import point_actions
+
+# Column name -> dtype, in row order
+COLUMNS: dict[str, Any] = {
+    "game": np.dtype("<i4"),
+    "point": np.dtype("<i4"),
+    "sequence": np.dtype("<i4"),
+    "team": np.dtype("<i4"),
+    "player": np.dtype("<i4"),
+    "receiver": np.dtype("<i4"),
+    "event": np.dtype("i1"),
+    "throw_type": np.dtype("i1"),
+    "call_type": np.dtype("i1"),
+    "call_result": np.dtype("i1"),
+}
+
+# Columns coded by enum position
+ENUM_COLUMNS: dict[str, type[Enum]] = {
+    "event": DiscEvent,
+    "throw_type": ThrowType,
+    "call_type": CallType,
+    "call_result": CallResult,
+}
+
+# Columns coded through an id dictionary, and the dictionary they use
+ID_COLUMNS: dict[str, str] = {
+    "game": "games",
+    "point": "points",
+    "team": "teams",
+    "player": "players",
+    "receiver": "players",
+}
+
+# Code of a missing value in every column
+MISSING = -1
+
+# Points loaded at a time by `sync`
+SYNC_CHUNK_SIZE = 500
+
+# Under DATA_DIR; hidden, so it is not taken for a directory of entities
+EVENTS_DIR_NAME = ".events"
+
+
+class IdDictionary:
+    """Two-way mapping between string ids and dense integer codes"""
+
+    def __init__(self, values: list[str] | None = None):
+        self.values: list[str] = list(values or [])
+        self.codes: dict[str, int] = {value: i for i, value in enumerate(self.values)}
+
+    def encode(self, value: str | None) -> int:
+        """Get the code of an id, assigning the next one to a new id"""
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int | None:
+        """Get the code of an id, None if it was never seen"""
+        return self.codes.get(value)
+
+    def decode(self, code: int) -> str | None:
+        """Get the id of a code"""
+        return None if code == MISSING else self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.codes
+
+
+def _enum_codes(enum: type[Enum]) -> dict[Any, int]:
+    """Map the values of an enum to their positions"""
+    return {member.value: i for i, member in enumerate(enum)}
+
+
+_ENUM_CODES: dict[str, dict[Any, int]] = {
+    column: _enum_codes(enum) for column, enum in ENUM_COLUMNS.items()
+}
+
+
+class EventStore:
+    """Append-only columnar store of point actions under `directory_path`"""
+
+    meta_file_name: str = "meta.json"
+
+    def __init__(self, directory_path: str):
+        self.directory_path: str = directory_path
+        self._lock = threading.RLock()
+        self._rows: int = 0
+        self.dictionaries: dict[str, IdDictionary] = {}
+        self._columns: dict[str, np.ndarray] = {}
+        os.makedirs(directory_path, exist_ok=True)
+        self._load_meta()
+
+    def _get_meta_path(self) -> str:
+        """Get the path of the metadata file"""
+        return os.path.join(self.directory_path, self.meta_file_name)
+
+    def _get_column_path(self, column: str) -> str:
+        """Get the path of a column file"""
+        return os.path.join(self.directory_path, f"{column}.bin")
+
+    def _load_meta(self):
+        """Load the row count and the dictionaries"""
+        try:
+            with open(self._get_meta_path(), "r") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {}
+        self._rows = meta.get("rows", 0)
+        self.dictionaries = {
+            name: IdDictionary(meta.get("dictionaries", {}).get(name))
+            for name in set(ID_COLUMNS.values())
+        }
+        self._columns = {}
+
+    def _save_meta(self):
+        """Commit the row count and the dictionaries, atomically"""
+        meta = {
+            "rows": self._rows,
+            "dictionaries": {
+                name: dictionary.values
+                for name, dictionary in self.dictionaries.items()
+            },
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.directory_path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._get_meta_path())
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _encode_action(
+        self, game_code: int, point_code: int, sequence: int, action: dict
+    ) -> tuple:
+        """Turn an action into a row of codes, in column order"""
+        players = self.dictionaries["players"]
+        return (
+            game_code,
+            point_code,
+            sequence,
+            self.dictionaries["teams"].encode(action.get("team_id")),
+            players.encode(action.get("player_id")),
+            players.encode(action.get("receiver_id")),
+            *(
+                _ENUM_CODES[column].get(action.get(column), MISSING)
+                for column in ENUM_COLUMNS
+            ),
+        )
+
+    def add_points(self, points: Iterable[tuple[dict, str]]) -> int:
+        """
+        Append the actions of (point, game id) pairs in one append, skipping
+        points already stored. Returns the number of rows added.
+        """
+        with self._lock:
+            rows: list[tuple] = []
+            new_points = 0
+            for point, game_id in points:
+                if point["id"] in self.dictionaries["points"]:
+                    continue
+                new_points += 1
+                game_code = self.dictionaries["games"].encode(game_id)
+                point_code = self.dictionaries["points"].encode(point["id"])
+                for sequence, action in enumerate(point_actions(point)):
+                    rows.append(
+                        self._encode_action(game_code, point_code, sequence, action)
+                    )
+            if new_points:
+                self._append(rows)
+            return len(rows)
+
+    def _append(self, rows: list[tuple]):
+        """Append rows to the column files, then commit them in the metadata"""
+        if rows:
+            table = list(zip(*rows))
+            for position, (column, dtype) in enumerate(COLUMNS.items()):
+                values = np.asarray(table[position], dtype=dtype)
+                with open(self._get_column_path(column), "ab") as f:
+                    # Drop the uncommitted tail of an interrupted append
+                    f.truncate(self._rows * dtype.itemsize)
+                    f.write(values.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._rows += len(rows)
+        # Points without actions still count as stored
+        self._save_meta()
+        self._columns = {}
+
+    def sync(self, game_repository, point_repository) -> int:
+        """
+        Add the finished points stored in the repositories that are not in the
+        store yet. Points already stored are skipped by id before anything is
+        read; of the others only the summaries are read until they are
+        finished. Returns the number of rows added.
+        """
+        new_ids = [
+            id for id in point_repository.ids() if id not in self.dictionaries["points"]
+        ]
+        if not new_ids:
+            return 0
+        game_ids = set(game_repository.ids())
+        summaries, _ = point_repository.find_many(
+            new_ids, fields=["id", "game_id", "status"]
+        )
+        finished = [
+            summary["id"]
+            for summary in summaries
+            if summary.get("status") == "finished"
+            and summary.get("game_id") in game_ids
+        ]
+        added = 0
+        for start in range(0, len(finished), SYNC_CHUNK_SIZE):
+            points, _ = point_repository.find_many(
+                finished[start : start + SYNC_CHUNK_SIZE]
+            )
+            added += self.add_points((point, point["game_id"]) for point in points)
+        return added
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a column, memory-mapped and read-only"""
+        with self._lock:
+            if name not in self._columns:
+                dtype = COLUMNS[name]
+                if self._rows == 0:
+                    self._columns[name] = np.empty(0, dtype=dtype)
+                else:
+                    self._columns[name] = np.memmap(
+                        self._get_column_path(name),
+                        dtype=dtype,
+                        mode="r",
+                        shape=(self._rows,),
+                    )
+            return self._columns[name]
+
+    def encode(self, column: str, value: Any) -> int | None:
+        """Get the code of a value in a column, None if it never occurs"""
+        if column in ENUM_COLUMNS:
+            return _ENUM_CODES[column].get(getattr(value, "value", value))
+        if column in ID_COLUMNS:
+            return self.dictionaries[ID_COLUMNS[column]].lookup(value)
+        return value
+
+    def decode(self, column: str, code: int) -> Any:
+        """Get the value of a code in a column"""
+        if code == MISSING:
+            return None
+        if column in ENUM_COLUMNS:
+            return list(ENUM_COLUMNS[column])[code].value
+        if column in ID_COLUMNS:
+            return self.dictionaries[ID_COLUMNS[column]].decode(code)
+        return int(code)
+
+    def mask(self, **filters: Any) -> np.ndarray:
+        """
+        Select the rows matching every filter, `column=value` or
+        `column=[values]`, e.g. `mask(event=DiscEvent.PASS, team=team_id)`
+        """
+        selected = np.ones(self._rows, dtype=bool)
+        for column, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            codes = [self.encode(column, v) for v in values]
+            selected &= np.isin(
+                self.column(column), [code for code in codes if code is not None]
+            )
+        return selected
+
+    def group_by(self, by: str | list[str], **filters: Any) -> dict[Any, int]:
+        """
+        Count the rows matching `filters` per value of the `by` columns.
+        Keys are values for a single column and tuples for several.
+        """
+        columns = [by] if isinstance(by, str) else list(by)
+        selected = self.mask(**filters)
+        if not selected.any():
+            return {}
+        # One int64 key per row: the codes (shifted so MISSING is 0) of the
+        # columns as the digits of a mixed-radix number
+        codes = [
+            np.asarray(self.column(column))[selected].astype(np.int64) + 1
+            for column in columns
+        ]
+        sizes = [int(code.max()) + 1 for code in codes]
+        keys = codes[0]
+        for code, size in zip(codes[1:], sizes[1:]):
+            keys = keys * size + code
+        unique, counts = np.unique(keys, return_counts=True)
+        digits = np.unravel_index(unique, sizes)
+        result: dict[Any, int] = {}
+        for position, count in enumerate(counts.tolist()):
+            key = tuple(
+                self.decode(column, int(digits[i][position]) - 1)
+                for i, column in enumerate(columns)
+            )
+            result[key[0] if isinstance(by, str) else key] = count
+        return result
+
+
+def main():
+    from config.settings import settings
+    from database.domain_repositories import GameRepository, PointRepository
+
+    store = EventStore(os.path.join(settings.DATA_DIR, EVENTS_DIR_NAME))
+    added = store.sync(GameRepository(), PointRepository())
+    print(f"Added {added} actions, {len(store)} in total")
+    for event, count in sorted(store.group_by("event").items(), key=lambda x: -x[1]):
+        print(f"{event}: {count}")
+
+
+if __name__ == "__main__":
+    main()
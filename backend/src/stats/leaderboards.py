@@ -0,0 +1,284 @@
+"""
+Live leaderboards of player statistics.
+
+Every metric keeps one max-heap per scope: all players, each division, each
+gender and each team. A stats change pushes the player's new value onto the
+heaps of their scopes (O(log n) each) and leaves the old entry behind; old
+entries are recognized and dropped when the top of a board is read, and a
+heap is rebuilt from the current values once it holds too many of them. No
+board is ever sorted in full.
+
+The service follows the stats projection as a listener, so the boards move as
+points are saved:
+
+    leaderboards = LeaderboardService.from_repositories(players, teams)
+    leaderboards.attach(session.stats)
+    leaderboards.top("goals", 10, division=Division.MIXED, gender=Gender.FEMALE)
+
+Usage (from backend/src):
+    python -m stats.leaderboards [--metric goals] [--top K]
+        [--division D] [--gender G] [--team TEAM_ID]
+"""
+
+import argparse
+import heapq
+import threading
+from typing import Callable, Iterable
+
+from models import Division, Gender
+
+METRICS: tuple[str, ...] = ("goals", "assists", "blocks", "plus_minus", "callahans")
+
+# Old entries a heap may hold, on top of one per player, before it is rebuilt
+COMPACT_SLACK = 64
+
+# (filter, value), or None for all players
+Scope = tuple[str, str] | None
+
+
+def _enum_value(enum: type, value) -> str | None:
+    """Get the value of an enum member or value, None if it is not one"""
+    try:
+        return enum(value).value
+    except ValueError:
+        return None
+
+
+def _filter_value(enum: type, value) -> str:
+    """Get the value of an enum member or value to filter on"""
+    result = _enum_value(enum, value)
+    if result is None:
+        raise ValueError(f"Unknown {enum.__name__.lower()}: {value}")
+    return result
+
+
+class Leaderboard:
+    """Values of one metric with a max-heap of them, invalidated lazily"""
+
+    def __init__(self):
+        self.values: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def update(self, player_id: str, value: int):
+        """Set the value of a player"""
+        if self.values.get(player_id) == value:
+            return
+        self.values[player_id] = value
+        heapq.heappush(self._heap, (-value, player_id))
+        if len(self._heap) > 2 * len(self.values) + COMPACT_SLACK:
+            self._compact()
+
+    def remove(self, player_id: str):
+        """Take a player off the board, their heap entries go stale"""
+        self.values.pop(player_id, None)
+
+    def _compact(self):
+        """Rebuild the heap from the current values"""
+        self._heap = [(-value, player_id) for player_id, value in self.values.items()]
+        heapq.heapify(self._heap)
+
+    def top(
+        self, k: int, accept: Callable[[str], bool] | None = None
+    ) -> list[tuple[str, int]]:
+        """
+        Get the k players with the highest values (accepted by `accept`, if
+        given), by popping the heap and pushing the current entries back
+        """
+        result: list[tuple[str, int]] = []
+        kept: list[tuple[int, str]] = []
+        seen: set[str] = set()
+        while self._heap and len(result) < k:
+            entry = heapq.heappop(self._heap)
+            value, player_id = -entry[0], entry[1]
+            # Stale or duplicate entries are dropped for good
+            if self.values.get(player_id) != value or player_id in seen:
+                continue
+            seen.add(player_id)
+            kept.append(entry)
+            if accept is None or accept(player_id):
+                result.append((player_id, value))
+        for entry in kept:
+            heapq.heappush(self._heap, entry)
+        return result
+
+
+class LeaderboardService:
+    """Leaderboards of every metric, overall and per division, gender and team"""
+
+    def __init__(self, metrics: tuple[str, ...] = METRICS):
+        self.metrics: tuple[str, ...] = metrics
+        self.boards: dict[tuple[str, Scope], Leaderboard] = {}
+        self._lock = threading.RLock()
+        self._stats: dict[str, dict] = {}
+        self._genders: dict[str, str | None] = {}
+        self._divisions: dict[str, str | None] = {}
+        self._teams: dict[str, set[str]] = {}
+        # Player id -> scopes the player is on the boards of
+        self._scopes: dict[str, list[Scope]] = {}
+
+    def set_player(self, player_id: str, gender: Gender | str | None = None):
+        """Register the gender of a player"""
+        with self._lock:
+            self._genders[player_id] = _enum_value(Gender, gender) if gender else None
+            self._rescope(player_id)
+
+    def set_team(
+        self,
+        team_id: str,
+        player_ids: Iterable[str],
+        division: Division | str | None = None,
+    ):
+        """Register the roster and division of a team"""
+        with self._lock:
+            self._divisions[team_id] = (
+                _enum_value(Division, division) if division else None
+            )
+            player_ids = set(player_ids)
+            moved = {
+                player_id
+                for player_id, team_ids in self._teams.items()
+                if team_id in team_ids and player_id not in player_ids
+            }
+            for player_id in moved:
+                self._teams[player_id].discard(team_id)
+            for player_id in player_ids:
+                self._teams.setdefault(player_id, set()).add(team_id)
+            for player_id in moved | player_ids:
+                self._rescope(player_id)
+
+    def _scopes_of(self, player_id: str) -> list[Scope]:
+        """Get the scopes a player belongs to"""
+        scopes: list[Scope] = [None]
+        gender = self._genders.get(player_id)
+        if gender:
+            scopes.append(("gender", gender))
+        divisions: set[str] = set()
+        for team_id in sorted(self._teams.get(player_id, ())):
+            scopes.append(("team", team_id))
+            division = self._divisions.get(team_id)
+            if division:
+                divisions.add(division)
+        scopes.extend(("division", division) for division in sorted(divisions))
+        return scopes
+
+    def _rescope(self, player_id: str):
+        """Move a player to the boards of the scopes they belong to now"""
+        scopes = self._scopes_of(player_id)
+        for scope in set(self._scopes.get(player_id, ())) - set(scopes):
+            for metric in self.metrics:
+                self._board(metric, scope).remove(player_id)
+        self._scopes[player_id] = scopes
+        if player_id in self._stats:
+            self._push(player_id, self._stats[player_id])
+
+    def _board(self, metric: str, scope: Scope) -> Leaderboard:
+        """Get the board of a metric in a scope"""
+        board = self.boards.get((metric, scope))
+        if board is None:
+            board = self.boards[(metric, scope)] = Leaderboard()
+        return board
+
+    def _push(self, player_id: str, stats: dict):
+        """Set the values of a player on the boards of their scopes"""
+        scopes = self._scopes.get(player_id)
+        if scopes is None:
+            scopes = self._scopes[player_id] = self._scopes_of(player_id)
+        for metric in self.metrics:
+            value = int(stats.get(metric, 0))
+            for scope in scopes:
+                self._board(metric, scope).update(player_id, value)
+
+    def update(self, player_id: str, stats: dict):
+        """Take in the new stats block of a player"""
+        with self._lock:
+            self._stats[player_id] = stats
+            self._push(player_id, stats)
+
+    def top(
+        self,
+        metric: str,
+        k: int = 10,
+        division: Division | str | None = None,
+        gender: Gender | str | None = None,
+        team_id: str | None = None,
+    ) -> list[tuple[str, int]]:
+        """
+        Get the k best players of a metric as (player id, value), among the
+        players matching every filter given. Raises ValueError for an unknown
+        metric, division or gender.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Unknown metric: {metric}")
+        filters: list[tuple[str, str]] = []
+        # The narrowest scope picks the board, the others filter it
+        if team_id is not None:
+            filters.append(("team", team_id))
+        if gender is not None:
+            filters.append(("gender", _filter_value(Gender, gender)))
+        if division is not None:
+            filters.append(("division", _filter_value(Division, division)))
+        with self._lock:
+            if not filters:
+                return self._board(metric, None).top(k)
+            board_scope, others = filters[0], filters[1:]
+            board = self.boards.get((metric, board_scope))
+            if board is None:
+                return []
+            if not others:
+                return board.top(k)
+            return board.top(
+                k,
+                lambda player_id: all(
+                    scope in self._scopes.get(player_id, ()) for scope in others
+                ),
+            )
+
+    def attach(self, projection):
+        """Follow the player stats changes of a StatsProjection"""
+        projection.listeners.append(self.update)
+
+    @classmethod
+    def from_repositories(
+        cls, player_repository, team_repository, metrics: tuple[str, ...] = METRICS
+    ) -> "LeaderboardService":
+        """Load the rosters, divisions, genders and stats blocks"""
+        service = cls(metrics)
+        for team in team_repository.iter_all(
+            fields=["id", "players", "division", "disivion"]
+        ):
+            service.set_team(
+                team["id"],
+                team.get("players") or [],
+                team.get("division") or team.get("disivion"),
+            )
+        for player in player_repository.iter_all(fields=["id", "gender", "stats"]):
+            service.set_player(player["id"], player.get("gender"))
+            service.update(player["id"], player.get("stats") or {})
+        return service
+
+
+def main():
+    from database.domain_repositories import PlayerRepository, TeamRepository
+
+    parser = argparse.ArgumentParser(description="Player leaderboards")
+    parser.add_argument("--metric", choices=METRICS, default="goals")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--division", choices=[d.value for d in Division])
+    parser.add_argument("--gender", choices=[g.value for g in Gender])
+    parser.add_argument("--team")
+    args = parser.parse_args()
+
+    players = PlayerRepository()
+    service = LeaderboardService.from_repositories(players, TeamRepository())
+    ranking = service.top(args.metric, args.top, args.division, args.gender, args.team)
+    found, _ = players.find_many([player_id for player_id, _ in ranking])
+    names = {player["id"]: player.get("name", player["id"]) for player in found}
+    for position, (player_id, value) in enumerate(ranking, 1):
+        print(f"{position}. {names.get(player_id, player_id)}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Bitset index of the lineups of one team, for "best line" questions.
+
+Every player of the roster gets a bit position, so a lineup is an integer
+bitmask and "was this pair on the field" is `lineup & pair == pair`. Pairs,
+trios and full lineups are counted as points are added (each 7-player lineup
+only has 21 pairs and 35 trios), so the top combinations are read from the
+counters with a heap instead of enumerating every combination of the roster.
+Any other combination is answered by AND-ing it against all lineups at once.
+
+LineupIndexStore keeps the index of every team (bitmasks, outcomes and
+counters) in a `.npz` file under DATA_DIR and follows the stats projection,
+so the indexes move as points are saved.
+
+Usage (from backend/src):
+    python -m stats.lineup_index TEAM_ID [--size N] [--top K] [--min-points M]
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+from collections import defaultdict
+from typing import Any, Iterable
+
+import numpy as np
+
+from .event_store import IdDictionary
+from .team_store import TeamArrayStore
+
+# Combination sizes counted as points are added; 0 stands for full lineups
+TRACKED_SIZES: tuple[int, ...] = (2, 3, 0)
+
+# Under DATA_DIR; hidden, so it is not taken for a directory of entities
+LINEUP_INDEXES_DIR_NAME = ".lineup_indexes"
+
+
+def _pack(masks: Iterable[int], width: int) -> np.ndarray:
+    """Turn bitmasks into rows of `width` little-endian bytes"""
+    packed = b"".join(mask.to_bytes(width, "little") for mask in masks)
+    return np.frombuffer(packed, dtype=np.uint8).reshape(-1, width)
+
+
+def _unpack(rows: np.ndarray) -> list[int]:
+    """Turn rows of little-endian bytes back into bitmasks"""
+    return [int.from_bytes(row.tobytes(), "little") for row in rows]
+
+
+class LineupIndex:
+    """Lineup bitmasks and combination counters of one team"""
+
+    def __init__(self, team_id: str, tracked_sizes: tuple[int, ...] = TRACKED_SIZES):
+        self.team_id: str = team_id
+        self.tracked_sizes: tuple[int, ...] = tracked_sizes
+        self.roster = IdDictionary()
+        self.point_ids: set[str] = set()
+        self.lineups: list[int] = []
+        # +1 the team scored the point, -1 it conceded it
+        self.outcomes: list[int] = []
+        # size -> combination mask -> [points, scored, conceded]
+        self.counters: dict[int, dict[int, list[int]]] = {
+            size: defaultdict(lambda: [0, 0, 0]) for size in tracked_sizes
+        }
+        self._arrays: tuple[np.ndarray, np.ndarray] | None = None
+
+    def mask_of(self, player_ids: Iterable[str]) -> int:
+        """Get the bitmask of players, giving new players the next bit"""
+        mask = 0
+        for player_id in player_ids:
+            mask |= 1 << self.roster.encode(player_id)
+        return mask
+
+    def players_of(self, mask: int) -> tuple[str, ...]:
+        """Get the players of a bitmask"""
+        # Bits are only ever set for players on the roster
+        return tuple(
+            self.roster.values[bit]
+            for bit in range(mask.bit_length())
+            if mask >> bit & 1
+        )
+
+    def add_point(self, point: dict, game: dict) -> bool:
+        """
+        Add a finished point of one of the team's games.
+        Returns False if it was added before or the team did not play it.
+        """
+        if point["id"] in self.point_ids or point.get("status") != "finished":
+            return False
+        if game.get("team1_id") == self.team_id:
+            player_ids = point.get("team1_players") or []
+        elif game.get("team2_id") == self.team_id:
+            player_ids = point.get("team2_players") or []
+        else:
+            return False
+        scoring_team = point.get("scoring_team")
+        if scoring_team is None:
+            return False
+
+        self.point_ids.add(point["id"])
+        lineup = self.mask_of(player_ids)
+        outcome = 1 if scoring_team == self.team_id else -1
+        self.lineups.append(lineup)
+        self.outcomes.append(outcome)
+        self._arrays = None
+
+        bits = [1 << bit for bit in range(lineup.bit_length()) if lineup >> bit & 1]
+        for size in self.tracked_sizes:
+            combinations = (
+                [lineup]
+                if size == 0
+                else (sum(combo) for combo in itertools.combinations(bits, size))
+            )
+            for combination in combinations:
+                counter = self.counters[size][combination]
+                counter[0] += 1
+                counter[1 if outcome == 1 else 2] += 1
+        return True
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the index as arrays, bitmasks packed into bytes, to store it"""
+        width = max(1, -(-len(self.roster) // 8))
+        arrays = {
+            "roster": np.array(self.roster.values, dtype=str),
+            "point_ids": np.array(sorted(self.point_ids), dtype=str),
+            "tracked_sizes": np.array(self.tracked_sizes, dtype=np.int64),
+            "lineups": _pack(self.lineups, width),
+            "outcomes": np.array(self.outcomes, dtype=np.int8),
+        }
+        for size, counter in self.counters.items():
+            arrays[f"masks_{size}"] = _pack(counter, width)
+            arrays[f"counts_{size}"] = np.array(
+                list(counter.values()), dtype=np.int64
+            ).reshape(-1, 3)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, team_id: str, arrays) -> "LineupIndex":
+        """Rebuild an index of a team from the arrays of `to_arrays`"""
+        index = cls(team_id, tuple(arrays["tracked_sizes"].tolist()))
+        index.roster = IdDictionary(arrays["roster"].tolist())
+        index.point_ids = set(arrays["point_ids"].tolist())
+        index.lineups = _unpack(arrays["lineups"])
+        index.outcomes = arrays["outcomes"].tolist()
+        for size, counter in index.counters.items():
+            masks = _unpack(arrays[f"masks_{size}"])
+            counter.update(zip(masks, arrays[f"counts_{size}"].tolist()))
+        return index
+
+    def _as_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the lineups and outcomes as arrays, uint64 while the roster fits"""
+        if self._arrays is None:
+            dtype = np.uint64 if len(self.roster) <= 64 else object
+            self._arrays = (
+                np.array(self.lineups, dtype=dtype),
+                np.array(self.outcomes, dtype=np.int64),
+            )
+        return self._arrays
+
+    def combination_stats(self, player_ids: Iterable[str]) -> dict:
+        """Count the points a combination of players was on the field together"""
+        combination = 0
+        for player_id in player_ids:
+            code = self.roster.lookup(player_id)
+            if code is None:
+                return {"points": 0, "scored": 0, "conceded": 0, "net": 0}
+            combination |= 1 << code
+        lineups, outcomes = self._as_arrays()
+        mask = (
+            lineups.dtype.type(combination) if lineups.dtype != object else combination
+        )
+        together = (lineups & mask) == mask
+        scored = int((outcomes[together] == 1).sum())
+        points = int(together.sum())
+        return {
+            "points": points,
+            "scored": scored,
+            "conceded": points - scored,
+            "net": 2 * scored - points,
+        }
+
+    def top(
+        self, size: int, k: int = 10, min_points: int = 1
+    ) -> list[tuple[tuple[str, ...], dict]]:
+        """
+        Get the k combinations of `size` players (0 for full lineups) with the
+        best net points, among those that played at least `min_points` points
+        """
+        if size not in self.counters:
+            raise ValueError(f"Combinations of {size} players are not tracked")
+        best = heapq.nlargest(
+            k,
+            (
+                (scored - conceded, points, mask)
+                for mask, (points, scored, conceded) in self.counters[size].items()
+                if points >= min_points
+            ),
+        )
+        return [
+            (
+                self.players_of(mask),
+                {
+                    "points": points,
+                    "scored": (points + net) // 2,
+                    "conceded": (points - net) // 2,
+                    "net": net,
+                },
+            )
+            for net, points, mask in best
+        ]
+
+    @classmethod
+    def from_repositories(
+        cls, team_id: str, game_repository, point_repository
+    ) -> "LineupIndex":
+        """Build the index of a team from its stored games"""
+        index = cls(team_id)
+        for field in ("team1_id", "team2_id"):
+            for game in game_repository.find_by_field(field, team_id):
+                for point in point_repository.find_by_field("game_id", game["id"]):
+                    index.add_point(point, game)
+        return index
+
+
+class LineupIndexStore(TeamArrayStore[LineupIndex]):
+    """The indexes of every team, one `.npz` file per team under `directory_path`"""
+
+    def _new(self, team_id: str) -> LineupIndex:
+        return LineupIndex(team_id)
+
+    def _to_arrays(self, item: LineupIndex) -> dict[str, Any]:
+        return item.to_arrays()
+
+    def _from_arrays(self, team_id: str, arrays) -> LineupIndex:
+        return LineupIndex.from_arrays(team_id, arrays)
+
+    def add_point(self, point: dict, game: dict) -> int:
+        """
+        Add a finished point to the stored indexes of both teams of its game,
+        skipping the teams that have it already. Returns how many were updated.
+        """
+        updated = 0
+        for field in ("team1_id", "team2_id"):
+            team_id = game.get(field)
+            if team_id:
+                updated += self._update(
+                    team_id,
+                    point["id"],
+                    lambda index: index.add_point(point, game),
+                )
+        return updated
+
+
+def main():
+    from config.settings import settings
+    from database.domain_repositories import GameRepository, PointRepository
+
+    parser = argparse.ArgumentParser(description="Best player combinations of a team")
+    parser.add_argument("team_id")
+    parser.add_argument("--size", type=int, default=2, help="2, 3 or 0 (lineups)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--min-points", type=int, default=5)
+    args = parser.parse_args()
+
+    store = LineupIndexStore(os.path.join(settings.DATA_DIR, LINEUP_INDEXES_DIR_NAME))
+    index = store.get(args.team_id)
+    if index is None:
+        # Not followed yet, e.g. games saved before the store existed
+        index = LineupIndex.from_repositories(
+            args.team_id, GameRepository(), PointRepository()
+        )
+        store.save(index)
+    for players, stats in index.top(args.size, args.top, args.min_points):
+        print(f"{', '.join(players)}: {stats['net']:+d} in {stats['points']} points")
+
+
+if __name__ == "__main__":
+    main()
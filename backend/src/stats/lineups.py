@@ -0,0 +1,319 @@
+"""
+Lineup analytics: plus/minus, holds and breaks from who was on the field.
+
+All points are turned into a signed player x point incidence matrix: +1 when
+the player was on the field for team 1 of the game, -1 for team 2, 0 when off.
+Only the non-zero entries are kept (player, point, sign), about 14 per point,
+so the matrix grows with the points played and not with players x points.
+With the outcome of each point coded the same way (+1 team 1 scored, -1 team 2
+scored) and the receiving team as well, every statistic is a product of the
+entries with the point vectors summed per player, so any subset of points (a
+game, a team's season, a tournament) is computed in one vectorized pass.
+
+Usage (from backend/src):
+    python -m stats.lineups
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from .event_store import IdDictionary
+
+
+def _side(team_id: str | None, game: dict) -> int:
+    """Code a team of a game: +1 for team 1, -1 for team 2, 0 if unknown"""
+    if team_id is None:
+        return 0
+    if team_id == game.get("team1_id"):
+        return 1
+    if team_id == game.get("team2_id"):
+        return -1
+    return 0
+
+
+def _rate(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    """Divide element-wise, 0 where the whole is 0"""
+    return np.divide(
+        part, whole, out=np.zeros(len(whole), dtype=float), where=whole > 0
+    )
+
+
+class LineupMatrix:
+    """Incidence matrices of the finished points of any number of games"""
+
+    def __init__(
+        self,
+        players: IdDictionary,
+        teams: IdDictionary,
+        point_ids: list[str],
+        game_ids: list[str],
+        rows: np.ndarray,
+        columns: np.ndarray,
+        signs: np.ndarray,
+        point_teams: np.ndarray,
+        point_games: np.ndarray,
+        scored: np.ndarray,
+        received: np.ndarray,
+    ):
+        self.players = players
+        self.teams = teams
+        self.point_ids = point_ids
+        self.game_ids = game_ids
+        # Non-zero entries of the players x points incidence matrix, by point:
+        # the player, the point and +1 on the field for team 1, -1 for team 2
+        self.rows = rows
+        self.columns = columns
+        self.signs = signs
+        # points x 2, the codes of team 1 and team 2
+        self.point_teams = point_teams
+        # points, the game code of each point
+        self.point_games = point_games
+        # points, +1 / -1 when team 1 / team 2 scored (or received the pull)
+        self.scored = scored
+        self.received = received
+
+    @classmethod
+    def from_points(
+        cls, points: Iterable[dict], games: dict[str, dict]
+    ) -> "LineupMatrix":
+        """Build the matrices from finished points and their games, by game id"""
+        players, teams, game_codes = IdDictionary(), IdDictionary(), IdDictionary()
+        point_ids: list[str] = []
+        rows: list[int] = []
+        columns: list[int] = []
+        signs: list[int] = []
+        point_teams: list[tuple[int, int]] = []
+        point_games: list[int] = []
+        scored: list[int] = []
+        received: list[int] = []
+        for point in points:
+            game_id = point.get("game_id")
+            game = games.get(game_id) if game_id else None
+            if game is None or point.get("status") != "finished":
+                continue
+            column = len(point_ids)
+            point_ids.append(point["id"])
+            for key, sign in (("team1_players", 1), ("team2_players", -1)):
+                for player_id in point.get(key) or []:
+                    rows.append(players.encode(player_id))
+                    columns.append(column)
+                    signs.append(sign)
+            point_teams.append(
+                (teams.encode(game.get("team1_id")), teams.encode(game.get("team2_id")))
+            )
+            point_games.append(game_codes.encode(game["id"]))
+            scored.append(_side(point.get("scoring_team"), game))
+            receiving_team = point.get("receiving_team") or (
+                point.get("pull_data") or {}
+            ).get("receiving_team")
+            received.append(_side(receiving_team, game))
+
+        return cls(
+            players,
+            teams,
+            point_ids,
+            game_codes.values,
+            np.asarray(rows, dtype=np.int32),
+            np.asarray(columns, dtype=np.int32),
+            np.asarray(signs, dtype=np.int8),
+            np.asarray(point_teams, dtype=np.int32).reshape(-1, 2),
+            np.asarray(point_games, dtype=np.int32),
+            np.asarray(scored, dtype=np.int8),
+            np.asarray(received, dtype=np.int8),
+        )
+
+    @classmethod
+    def from_repositories(
+        cls, game_repository, point_repository, game_ids: list[str] | None = None
+    ) -> "LineupMatrix":
+        """Build the matrices from the stored games (all of them by default)"""
+        if game_ids is None:
+            games = list(
+                game_repository.iter_all(fields=["id", "team1_id", "team2_id"])
+            )
+        else:
+            games, _ = game_repository.find_many(
+                game_ids, fields=["id", "team1_id", "team2_id"]
+            )
+        points = (
+            point
+            for game in games
+            for point in point_repository.find_by_field("game_id", game["id"])
+        )
+        return cls.from_points(points, {game["id"]: game for game in games})
+
+    def mask(
+        self, game_ids: list[str] | None = None, team_id: str | None = None
+    ) -> np.ndarray:
+        """Select the points of some games and/or of one team"""
+        selected = np.ones(len(self.point_ids), dtype=bool)
+        if game_ids is not None:
+            codes = [self.game_ids.index(id) for id in game_ids if id in self.game_ids]
+            selected &= np.isin(self.point_games, codes)
+        if team_id is not None:
+            code = self.teams.lookup(team_id)
+            selected &= (self.point_teams == code).any(axis=1)
+        return selected
+
+    def _entries(self, mask: np.ndarray | None) -> tuple[np.ndarray, ...]:
+        """Get the incidence entries (rows, columns, signs) of the selected points"""
+        if mask is None:
+            return self.rows, self.columns, self.signs.astype(np.int64)
+        keep = mask[self.columns]
+        return self.rows[keep], self.columns[keep], self.signs[keep].astype(np.int64)
+
+    def player_stats(self, mask: np.ndarray | None = None) -> dict[str, dict]:
+        """
+        Compute the stats of every player over the selected points:
+        points played, plus/minus, O points and holds, D points and breaks,
+        and the on/off split of their team's net score (over the games they
+        played in).
+        """
+        players = len(self.players)
+        rows, columns, signs = self._entries(mask)
+
+        def per_player(values: np.ndarray) -> np.ndarray:
+            return np.bincount(rows, weights=values, minlength=players).astype(np.int64)
+
+        # From the player's side: +1 when their team scored / received
+        own_score = signs * self.scored[columns]
+        own_pull = signs * self.received[columns]
+        offense = own_pull == 1
+        defense = own_pull == -1
+        won = own_score == 1
+
+        points_played = np.bincount(rows, minlength=players)
+        plus_minus = per_player(own_score)
+        o_points = per_player(offense)
+        holds = per_player(offense & won)
+        d_points = per_player(defense)
+        breaks = per_player(defense & won)
+
+        # The side each player plays on in each game (+1 / -1), from the points
+        # they played; the team's points of that game count as on or off
+        games = len(self.game_ids)
+        selected = np.ones(len(self.point_ids), dtype=bool) if mask is None else mask
+        point_games = self.point_games[selected]
+        game_points = np.bincount(point_games, minlength=games)
+        game_net = np.bincount(
+            point_games, weights=self.scored[selected], minlength=games
+        )
+        pairs, inverse = np.unique(
+            rows.astype(np.int64) * games + self.point_games[columns],
+            return_inverse=True,
+        )
+        side = np.sign(np.bincount(inverse.reshape(-1), weights=signs))
+        pair_players, pair_games = pairs // games, pairs % games
+        team_points = np.bincount(
+            pair_players,
+            weights=(side != 0) * game_points[pair_games],
+            minlength=players,
+        ).astype(np.int64)
+        team_net = np.bincount(
+            pair_players, weights=side * game_net[pair_games], minlength=players
+        ).astype(np.int64)
+        off_points = team_points - points_played
+        off_net = team_net - plus_minus
+
+        hold_rate = _rate(holds, o_points)
+        break_rate = _rate(breaks, d_points)
+        on_rate = _rate(plus_minus, points_played)
+        off_rate = _rate(off_net, off_points)
+        return {
+            player_id: {
+                "points_played": int(points_played[i]),
+                "plus_minus": int(plus_minus[i]),
+                "o_points": int(o_points[i]),
+                "holds": int(holds[i]),
+                "hold_rate": float(hold_rate[i]),
+                "d_points": int(d_points[i]),
+                "breaks": int(breaks[i]),
+                "break_rate": float(break_rate[i]),
+                "on_net_per_point": float(on_rate[i]),
+                "off_points": int(off_points[i]),
+                "off_net_per_point": float(off_rate[i]),
+            }
+            for i, player_id in enumerate(self.players.values)
+            if points_played[i]
+        }
+
+    def lineup_stats(
+        self, team_id: str, mask: np.ndarray | None = None
+    ) -> dict[tuple[str, ...], dict]:
+        """
+        Compute points played, net score, holds and breaks of every distinct
+        lineup (sorted player ids) a team put on the field
+        """
+        selected = self.mask(team_id=team_id)
+        if mask is not None:
+            selected &= mask
+        points = np.flatnonzero(selected)
+        if not len(points):
+            return {}
+        code = self.teams.lookup(team_id)
+        # The side of the team in each point
+        sides = np.where(self.point_teams[:, 0] == code, 1, -1).astype(np.int8)
+
+        # One row of player codes per selected point, padded with -1, so equal
+        # lineups are equal rows
+        keep = selected[self.columns] & (self.signs == sides[self.columns])
+        order = np.lexsort((self.rows[keep], self.columns[keep]))
+        rows = self.rows[keep][order]
+        position = np.full(len(self.point_ids), -1, dtype=np.int64)
+        position[points] = np.arange(len(points))
+        row_points = position[self.columns[keep][order]]
+        sizes = np.bincount(row_points, minlength=len(points))
+        slots = np.arange(len(rows)) - (np.cumsum(sizes) - sizes)[row_points]
+        table = np.full((len(points), max(int(sizes.max()), 1)), -1, dtype=np.int32)
+        table[row_points, slots] = rows
+        unique, inverse = np.unique(table, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        side = sides[points]
+        own_score = side * self.scored[points]
+        own_pull = side * self.received[points]
+        offense = own_pull == 1
+        defense = own_pull == -1
+        won = own_score == 1
+
+        def per_lineup(values: np.ndarray) -> np.ndarray:
+            return np.bincount(inverse, weights=values, minlength=len(unique))
+
+        played = per_lineup(np.ones(len(points)))
+        net = per_lineup(own_score)
+        o_points = per_lineup(offense)
+        holds = per_lineup(offense & won)
+        d_points = per_lineup(defense)
+        breaks = per_lineup(defense & won)
+        names = np.asarray(self.players.values, dtype=object)
+        return {
+            tuple(sorted(names[row[row >= 0]])): {
+                "points_played": int(played[i]),
+                "net": int(net[i]),
+                "o_points": int(o_points[i]),
+                "holds": int(holds[i]),
+                "d_points": int(d_points[i]),
+                "breaks": int(breaks[i]),
+            }
+            for i, row in enumerate(unique)
+        }
+
+
+def main():
+    from database.domain_repositories import GameRepository, PointRepository
+
+    matrix = LineupMatrix.from_repositories(GameRepository(), PointRepository())
+    stats = matrix.player_stats()
+    print(f"{len(matrix.point_ids)} points, {len(stats)} players")
+    for player_id, row in sorted(
+        stats.items(), key=lambda item: -item[1]["plus_minus"]
+    ):
+        print(
+            f"{player_id}: {row['plus_minus']:+d} in {row['points_played']} points, "
+            f"hold {row['hold_rate']:.0%}, break {row['break_rate']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Pass networks: who throws to whom, per team.
+
+Each team keeps two thrower x receiver count matrices indexed by roster
+position: completed passes (passes and scoring throws) and attempts (the
+completions plus drops and turnovers with an intended receiver). Actions are
+added one at a time as they are recorded, networks of different games are
+merged by summing the matrices, and every query (top connections, centrality,
+completion percentage) reads the matrices instead of the raw events.
+
+PassNetworkStore keeps the network of every team in a `.npz` file under
+DATA_DIR, next to the event store, and follows the stats projection so the
+networks move as points are saved:
+
+    networks = PassNetworkStore(directory_path)
+    networks.attach(session.stats)
+    networks.get(team_id).top_connections(10)
+
+Usage (from backend/src):
+    python -m stats.pass_network TEAM_ID [--top K]
+"""
+
+import argparse
+import os
+from typing import Any, Iterable
+
+import numpy as np
+
+from models import DiscEvent
+from .event_store import IdDictionary
+from .projection import point_actions
+from .team_store import TeamArrayStore
+
+COMPLETED_EVENTS: frozenset[str] = frozenset({DiscEvent.PASS, DiscEvent.SCORE})
+INCOMPLETE_EVENTS: frozenset[str] = frozenset({DiscEvent.DROP, DiscEvent.TURNOVER})
+
+# Rows / columns allocated at a time as the roster grows
+INITIAL_CAPACITY = 32
+
+# Under DATA_DIR; hidden, so it is not taken for a directory of entities
+PASS_NETWORKS_DIR_NAME = ".pass_networks"
+
+
+class PassNetwork:
+    """Completion and attempt matrices of the throws of one team"""
+
+    def __init__(self, team_id: str):
+        self.team_id: str = team_id
+        self.roster = IdDictionary()
+        self.point_ids: set[str] = set()
+        self.completions = np.zeros((INITIAL_CAPACITY, INITIAL_CAPACITY), np.int32)
+        self.attempts = np.zeros((INITIAL_CAPACITY, INITIAL_CAPACITY), np.int32)
+
+    def _position(self, player_id: str) -> int:
+        """Get the roster position of a player, growing the matrices if needed"""
+        position = self.roster.encode(player_id)
+        capacity = len(self.completions)
+        if position >= capacity:
+            size = max(2 * capacity, position + 1)
+            for name in ("completions", "attempts"):
+                grown = np.zeros((size, size), np.int32)
+                grown[:capacity, :capacity] = getattr(self, name)
+                setattr(self, name, grown)
+        return position
+
+    def add_action(self, action: dict) -> bool:
+        """
+        Count a throw of the team. Returns False for any other action
+        (another team, no thrower or receiver, not a throw).
+        """
+        event = action.get("event")
+        thrower, receiver = action.get("player_id"), action.get("receiver_id")
+        if (
+            action.get("team_id") != self.team_id
+            or not thrower
+            or not receiver
+            or event not in COMPLETED_EVENTS | INCOMPLETE_EVENTS
+        ):
+            return False
+        row, column = self._position(thrower), self._position(receiver)
+        self.attempts[row, column] += 1
+        if event in COMPLETED_EVENTS:
+            self.completions[row, column] += 1
+        return True
+
+    def add_point(self, point: dict) -> bool:
+        """Count the throws of a point. Returns False if it was added before."""
+        if point["id"] in self.point_ids:
+            return False
+        self.point_ids.add(point["id"])
+        for action in point_actions(point):
+            self.add_action(action)
+        return True
+
+    def merge(self, other: "PassNetwork") -> "PassNetwork":
+        """Add the throws of another network of the team, from other points"""
+        if not len(other.roster):
+            return self
+        positions = np.array([self._position(id) for id in other.roster.values])
+        size = len(other.roster)
+        block = np.ix_(positions, positions)
+        self.completions[block] += other.completions[:size, :size]
+        self.attempts[block] += other.attempts[:size, :size]
+        self.point_ids |= other.point_ids
+        return self
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the network as arrays trimmed to the roster, to store it"""
+        completions, attempts = self._matrices()
+        return {
+            "completions": completions,
+            "attempts": attempts,
+            "roster": np.array(self.roster.values, dtype=str),
+            "point_ids": np.array(sorted(self.point_ids), dtype=str),
+        }
+
+    @classmethod
+    def from_arrays(cls, team_id: str, arrays) -> "PassNetwork":
+        """Rebuild a network of a team from the arrays of `to_arrays`"""
+        network = cls(team_id)
+        network.roster = IdDictionary(arrays["roster"].tolist())
+        network.point_ids = set(arrays["point_ids"].tolist())
+        size = len(network.roster)
+        capacity = max(INITIAL_CAPACITY, size)
+        for name in ("completions", "attempts"):
+            matrix = np.zeros((capacity, capacity), np.int32)
+            matrix[:size, :size] = arrays[name]
+            setattr(network, name, matrix)
+        return network
+
+    def _matrices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the matrices trimmed to the roster"""
+        size = len(self.roster)
+        return self.completions[:size, :size], self.attempts[:size, :size]
+
+    def pair(self, thrower_id: str, receiver_id: str) -> dict:
+        """Get the completions, attempts and completion rate of a pair"""
+        row, column = self.roster.lookup(thrower_id), self.roster.lookup(receiver_id)
+        if row is None or column is None:
+            return {"completions": 0, "attempts": 0, "completion_rate": 0.0}
+        completions = int(self.completions[row, column])
+        attempts = int(self.attempts[row, column])
+        return {
+            "completions": completions,
+            "attempts": attempts,
+            "completion_rate": completions / attempts if attempts else 0.0,
+        }
+
+    def completion_rates(self) -> np.ndarray:
+        """Get the completion rate of every pair, 0 where nothing was thrown"""
+        completions, attempts = self._matrices()
+        return np.divide(
+            completions,
+            attempts,
+            out=np.zeros(attempts.shape, dtype=float),
+            where=attempts > 0,
+        )
+
+    def top_connections(self, k: int = 10) -> list[tuple[str, str, dict]]:
+        """Get the k pairs with the most completions, as (thrower, receiver, stats)"""
+        completions, _ = self._matrices()
+        flat = completions.ravel()
+        k = min(k, int(np.count_nonzero(flat)))
+        if k == 0:
+            return []
+        best = np.argpartition(flat, -k)[-k:]
+        best = best[np.argsort(-flat[best], kind="stable")]
+        rows, columns = np.unravel_index(best, completions.shape)
+        result = []
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            thrower, receiver = self.roster.values[row], self.roster.values[column]
+            result.append((thrower, receiver, self.pair(thrower, receiver)))
+        return result
+
+    def centrality(self) -> dict[str, dict]:
+        """
+        Get the involvement of every player: completions thrown and received,
+        their share of all the team's connections, and the eigenvector
+        centrality of the undirected network (high for players connected to
+        other well-connected players)
+        """
+        completions, _ = self._matrices()
+        if not completions.size:
+            return {}
+        thrown = completions.sum(axis=1)
+        received = completions.sum(axis=0)
+        total = max(int(completions.sum()), 1)
+        # The principal eigenvector of the symmetric matrix, made non-negative
+        _, vectors = np.linalg.eigh((completions + completions.T).astype(float))
+        eigenvector = np.abs(vectors[:, -1])
+        return {
+            player_id: {
+                "thrown": int(thrown[i]),
+                "received": int(received[i]),
+                "share": float((thrown[i] + received[i]) / (2 * total)),
+                "eigenvector": float(eigenvector[i]),
+            }
+            for i, player_id in enumerate(self.roster.values)
+        }
+
+    @classmethod
+    def from_repositories(
+        cls, team_id: str, game_repository, point_repository
+    ) -> "PassNetwork":
+        """Build the network of a team from its stored games"""
+        network = cls(team_id)
+        for field in ("team1_id", "team2_id"):
+            for game in game_repository.find_by_field(field, team_id):
+                for point in point_repository.find_by_field("game_id", game["id"]):
+                    network.add_point(point)
+        return network
+
+
+def team_networks(points: Iterable[dict]) -> dict[str, PassNetwork]:
+    """Build the networks of every team throwing in some points, by team id"""
+    networks: dict[str, PassNetwork] = {}
+    for point in points:
+        point_teams = set()
+        for action in point_actions(point):
+            team_id = action.get("team_id")
+            if not team_id:
+                continue
+            point_teams.add(team_id)
+            if action.get("event") in COMPLETED_EVENTS | INCOMPLETE_EVENTS:
+                if team_id not in networks:
+                    networks[team_id] = PassNetwork(team_id)
+                networks[team_id].add_action(action)
+        # Only the teams of the point have it, a team's point ids are its own
+        for team_id in point_teams & networks.keys():
+            networks[team_id].point_ids.add(point["id"])
+    return networks
+
+
+def merge_networks(
+    networks: dict[str, PassNetwork], others: dict[str, PassNetwork]
+) -> dict[str, PassNetwork]:
+    """Merge networks by team id into `networks`"""
+    for team_id, other in others.items():
+        if team_id in networks:
+            networks[team_id].merge(other)
+        else:
+            networks[team_id] = other
+    return networks
+
+
+class PassNetworkStore(TeamArrayStore[PassNetwork]):
+    """The networks of every team, one `.npz` file per team under `directory_path`"""
+
+    def _new(self, team_id: str) -> PassNetwork:
+        return PassNetwork(team_id)
+
+    def _to_arrays(self, item: PassNetwork) -> dict[str, Any]:
+        return item.to_arrays()
+
+    def _from_arrays(self, team_id: str, arrays) -> PassNetwork:
+        return PassNetwork.from_arrays(team_id, arrays)
+
+    def add_point(self, point: dict, game: dict | None = None) -> int:
+        """
+        Add the throws of a point to the stored networks of its teams,
+        skipping the teams that have it already. Returns how many were updated.
+        """
+        updated = 0
+        for team_id, other in team_networks([point]).items():
+
+            def merge(network: PassNetwork, other: PassNetwork = other) -> bool:
+                network.merge(other)
+                return True
+
+            updated += self._update(team_id, point["id"], merge)
+        return updated
+
+
+def main():
+    from config.settings import settings
+    from database.domain_repositories import GameRepository, PointRepository
+
+    parser = argparse.ArgumentParser(description="Pass network of a team")
+    parser.add_argument("team_id")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = PassNetworkStore(os.path.join(settings.DATA_DIR, PASS_NETWORKS_DIR_NAME))
+    network = store.get(args.team_id)
+    if network is None:
+        # Not followed yet, e.g. games saved before the store existed
+        network = PassNetwork.from_repositories(
+            args.team_id, GameRepository(), PointRepository()
+        )
+        store.save(network)
+    for thrower, receiver, stats in network.top_connections(args.top):
+        print(
+            f"{thrower} -> {receiver}: {stats['completions']}/{stats['attempts']} "
+            f"({stats['completion_rate']:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Streaming reconstruction of possessions from the course of each point.
+
+Actions are walked in order and cut into possession chains at every action
+that ends a possession (turnover, drop, block or score). Possessions are
+yielded one at a time as compact records, and the season summaries fold them
+into per-team counters as they stream by, so memory does not grow with the
+number of points.
+
+Usage (from backend/src):
+    python -m stats.possessions
+"""
+
+from collections import defaultdict
+from typing import Iterable, Iterator, NamedTuple
+
+from models import DiscEvent
+from .projection import point_actions
+
+# Actions that end a possession; the disc changes hands or the point ends
+POSSESSION_ENDINGS: frozenset[str] = frozenset(
+    {DiscEvent.TURNOVER, DiscEvent.DROP, DiscEvent.DEFENSE, DiscEvent.SCORE}
+)
+
+# Outcome of a possession still open when the recorded actions run out
+OPEN_OUTCOME = "open"
+
+
+class Possession(NamedTuple):
+    """One possession: who had the disc, who threw it, and how it ended"""
+
+    point_id: str
+    team_id: str | None
+    # Throwers in order, one per throw (completed or not)
+    throwers: tuple[str, ...]
+    # Completed passes, the scoring throw included
+    passes: int
+    # The DiscEvent value that ended it, or OPEN_OUTCOME
+    outcome: str
+
+
+def iter_possessions(points: Iterable[dict]) -> Iterator[Possession]:
+    """Cut the actions of each point into possessions, in order"""
+    for point in points:
+        team_id: str | None = None
+        throwers: list[str] = []
+        passes = 0
+        for action in point_actions(point):
+            event = action.get("event")
+            if event not in POSSESSION_ENDINGS and event != DiscEvent.PASS:
+                # Calls, timeouts and injuries stop play without a turnover
+                continue
+            # A block is made by the defense, the possession was the other team's
+            if event != DiscEvent.DEFENSE:
+                team_id = team_id or action.get("team_id")
+                if action.get("player_id"):
+                    throwers.append(action["player_id"])
+            if event in (DiscEvent.PASS, DiscEvent.SCORE):
+                passes += 1
+            if event in POSSESSION_ENDINGS:
+                yield Possession(point["id"], team_id, tuple(throwers), passes, event)
+                team_id, throwers, passes = None, [], 0
+        if throwers:
+            yield Possession(
+                point["id"], team_id, tuple(throwers), passes, OPEN_OUTCOME
+            )
+
+
+def iter_points(game_repository, point_repository) -> Iterator[dict]:
+    """Stream the finished points of all stored games, one game at a time"""
+    for game in game_repository.iter_all(fields=["id"]):
+        for point in point_repository.find_by_field("game_id", game["id"]):
+            if point.get("status") == "finished":
+                yield point
+
+
+def possession_summary(possessions: Iterable[Possession]) -> dict[str, dict]:
+    """
+    Fold possessions into per-team totals: possessions, passes, scores and
+    turnovers, with passes per possession and scoring / turnover rates
+    """
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for possession in possessions:
+        if possession.team_id is None:
+            continue
+        counters = totals[possession.team_id]
+        counters[0] += 1
+        counters[1] += possession.passes
+        if possession.outcome == DiscEvent.SCORE:
+            counters[2] += 1
+        elif possession.outcome != OPEN_OUTCOME:
+            counters[3] += 1
+    return {
+        team_id: {
+            "possessions": count,
+            "passes": passes,
+            "scores": scores,
+            "turnovers": turnovers,
+            "passes_per_possession": passes / count,
+            "scoring_rate": scores / count,
+            "turnover_rate": turnovers / count,
+        }
+        for team_id, (count, passes, scores, turnovers) in totals.items()
+    }
+
+
+def main():
+    from database.domain_repositories import GameRepository, PointRepository
+
+    points = iter_points(GameRepository(), PointRepository())
+    for team_id, summary in possession_summary(iter_possessions(points)).items():
+        print(
+            f"{team_id}: {summary['possessions']} possessions, "
+            f"{summary['passes_per_possession']:.1f} passes each, "
+            f"{summary['turnover_rate']:.0%} turnovers, "
+            f"{summary['scoring_rate']:.0%} scores"
+        )
+
+
+if __name__ == "__main__":
+    main()
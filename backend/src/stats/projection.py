@@ -0,0 +1,453 @@
+"""
+Incremental projection of the player and team statistics.
+
+Every finished point is folded into the `stats` block of its players and
+teams as soon as it is saved, so the statistics views read ready-made numbers
+instead of walking games and points. The projection remembers, per game, the
+points it already applied and who played, which makes applying a point again
+a no-op. The deltas of a point are kept in the game's state until every player
+and team has them, so a point interrupted halfway is finished at the next
+start (StatsProjection.finish_pending). A full rebuild is only needed when the
+statistics themselves change (bump STATS_SCHEMA_VERSION).
+
+Usage (from backend/src):
+    python -m stats.projection
+"""
+
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, Iterator
+
+from models import DiscEvent
+from models.stats import PlayerStats, TeamStats
+from .pulls import pull_contributions, pull_counts
+
+# Events that stop play without the disc changing hands
+STOPPAGES: frozenset[str] = frozenset(
+    {DiscEvent.TIMEOUT, DiscEvent.INJURY, DiscEvent.CALL}
+)
+
+# Bump whenever a statistic is added or computed differently
+STATS_SCHEMA_VERSION = 4
+
+SCHEMA_RECORD_ID = "schema"
+
+# Last points added to the stats of a player or team, kept on the entity so
+# finishing a point that was interrupted halfway does not add it twice
+APPLIED_POINTS_FIELD = "stats_points"
+APPLIED_POINTS_KEPT = 64
+
+# Times the stats writes of a point are redone after a concurrent update
+FINISH_RETRIES = 3
+
+
+def point_actions(point: dict) -> list[dict]:
+    """Get the actions of a point in order: the course of the point, then its events"""
+    course = point.get("course_of_the_point") or {}
+    # Action ids set the order of the course of the point
+    actions = [course[id] for id in sorted(course)]
+    actions.extend(point.get("events") or [])
+    return [action for action in actions if isinstance(action, dict)]
+
+
+def point_lineups(point: dict, game: dict) -> dict[str, list[str]]:
+    """
+    Get the players on the field of each team in a point, by team id.
+    A team missing from the game is left out, with its players.
+    """
+    lineups: dict[str, list[str]] = {}
+    for team_field, players_field in (
+        ("team1_id", "team1_players"),
+        ("team2_id", "team2_players"),
+    ):
+        team_id = game.get(team_field)
+        if team_id:
+            lineups[team_id] = point.get(players_field) or []
+    return lineups
+
+
+def point_contributions(
+    point: dict, game: dict
+) -> tuple[dict[str, Counter], dict[str, Counter]]:
+    """
+    Compute what a finished point adds to the stats of its players and teams.
+    Returns the player deltas and the team deltas, by id.
+    """
+    players: dict[str, Counter] = defaultdict(Counter)
+    teams: dict[str, Counter] = defaultdict(Counter)
+    lineups = point_lineups(point, game)
+    for team_id, lineup in lineups.items():
+        teams[team_id]["points_played"] += 1
+        for id in lineup:
+            players[id]["points_played"] += 1
+
+    scorer = point.get("scoring_player_id")
+    assistant = point.get("assisting_player_id")
+    callahan = None
+    previous: dict = {}
+    for action in point_actions(point):
+        event, player_id = action.get("event"), action.get("player_id")
+        if event == DiscEvent.DEFENSE and player_id:
+            players[player_id]["blocks"] += 1
+        elif event == DiscEvent.TURNOVER and player_id:
+            players[player_id]["turnovers"] += 1
+        elif event == DiscEvent.DROP:
+            # The receiver dropped it, the thrower is only known for passes
+            dropper = action.get("receiver_id") or player_id
+            if dropper:
+                players[dropper]["drops"] += 1
+        elif event == DiscEvent.SCORE:
+            scorer = scorer or action.get("receiver_id")
+            assistant = assistant or player_id
+            # A block caught in the end zone: the defender is the one who scores
+            # (a defender who picks up and throws the goal gets the assist)
+            defender = previous.get("player_id")
+            receiver = action.get("receiver_id")
+            if (
+                previous.get("event") == DiscEvent.DEFENSE
+                and defender
+                and (receiver == defender or (not receiver and player_id == defender))
+            ):
+                callahan = defender
+        if event not in STOPPAGES:
+            previous = action
+    scorer = scorer or callahan
+    if scorer:
+        players[scorer]["goals"] += 1
+    if assistant and assistant != callahan:
+        players[assistant]["assists"] += 1
+    if callahan:
+        players[callahan]["callahans"] += 1
+
+    scoring_team = point.get("scoring_team")
+    if scoring_team:
+        for team_id, lineup in lineups.items():
+            for id in lineup:
+                players[id]["plus_minus"] += 1 if team_id == scoring_team else -1
+        teams[scoring_team]["goals_for"] += 1
+        for team_id in lineups:
+            if team_id != scoring_team:
+                teams[team_id]["goals_against"] += 1
+        receiving_team = point.get("receiving_team") or (
+            point.get("pull_data") or {}
+        ).get("receiving_team")
+        if receiving_team:
+            teams[scoring_team][
+                "holds" if scoring_team == receiving_team else "breaks"
+            ] += 1
+
+    pull_players, pull_teams = pull_contributions(point, game)
+    for player_id, delta in pull_players.items():
+        players[player_id].update(delta)
+    for team_id, delta in pull_teams.items():
+        teams[team_id].update(delta)
+    return players, teams
+
+
+class StatsAccumulator:
+    """
+    Stats totals of any number of games, built in memory.
+    Accumulators of disjoint games can be merged.
+    """
+
+    def __init__(self):
+        self.players: dict[str, Counter] = defaultdict(Counter)
+        self.teams: dict[str, Counter] = defaultdict(Counter)
+        # Game id -> projection state, as stored by StatsProjection
+        self.games: dict[str, dict] = {}
+
+    def add_game(self, game: dict, points: Iterable[dict]):
+        """Add the finished points of a game"""
+        state = new_game_state(game["id"])
+        for point in points:
+            if point.get("status") != "finished" or point["id"] in state["points"]:
+                continue
+            player_deltas, team_deltas = point_contributions(point, game)
+            _count_participants(state, player_deltas, team_deltas)
+            _count_pulls(state, team_deltas)
+            for player_id, delta in player_deltas.items():
+                self.players[player_id].update(delta)
+            for team_id, delta in team_deltas.items():
+                self.teams[team_id].update(delta)
+            state["points"].append(point["id"])
+        for player_id in state["players"]:
+            self.players[player_id]["games_played"] += 1
+        for team_id in state["teams"]:
+            self.teams[team_id]["games_played"] += 1
+        self.games[game["id"]] = state
+
+    def merge(self, other: "StatsAccumulator") -> "StatsAccumulator":
+        """Add the totals of another accumulator, covering other games"""
+        for player_id, totals in other.players.items():
+            self.players[player_id].update(totals)
+        for team_id, totals in other.teams.items():
+            self.teams[team_id].update(totals)
+        self.games.update(other.games)
+        return self
+
+
+def new_game_state(game_id: str) -> dict:
+    """Get the projection state of a game no point was applied from yet"""
+    return {
+        "id": game_id,
+        "schema": STATS_SCHEMA_VERSION,
+        "points": [],
+        "players": [],
+        "teams": [],
+        # Pull counters of the game, for tournament totals
+        "pulls": {},
+        # Point id -> deltas of a claimed point not fully added to the stats
+        "pending": {},
+    }
+
+
+def _count_participants(
+    state: dict, player_deltas: dict[str, Counter], team_deltas: dict[str, Counter]
+) -> tuple[list[str], list[str]]:
+    """
+    Add the players and teams of a point to the participants of its game.
+    Returns the new ones, whose games played go up.
+    """
+    new_players = [id for id in player_deltas if id not in state["players"]]
+    new_teams = [id for id in team_deltas if id not in state["teams"]]
+    state["players"].extend(new_players)
+    state["teams"].extend(new_teams)
+    return new_players, new_teams
+
+
+def _count_pulls(state: dict, team_deltas: dict[str, Counter]):
+    """Add the pull counters of a point to the counters of its game"""
+    pulls = Counter(state.get("pulls") or {})
+    pulls.update(pull_counts(team_deltas))
+    state["pulls"] = dict(pulls)
+
+
+def _with_totals(stats: dict | None, model: type, delta: dict) -> dict:
+    """Add a delta to a stats block, filling in statistics it does not have yet"""
+    result = {**model().model_dump(), **(stats or {})}
+    for key, value in delta.items():
+        result[key] = result.get(key, 0) + value
+    return result
+
+
+class StatsProjection:
+    """
+    Keeps the `stats` blocks of players and teams up to date from finished
+    points. `state_repository` stores the per-game bookkeeping. Listeners get
+    the id and new stats block of every player whose stats changed; point
+    listeners get every finished point saved, with its game, and skip the
+    points they already have.
+    """
+
+    def __init__(
+        self,
+        player_repository,
+        team_repository,
+        game_repository,
+        point_repository,
+        state_repository,
+    ):
+        self.players = player_repository
+        self.teams = team_repository
+        self.games = game_repository
+        self.points = point_repository
+        self.state = state_repository
+        self.listeners: list[Callable[[str, dict], None]] = []
+        self.point_listeners: list[Callable[[dict, dict], None]] = []
+
+    def needs_rebuild(self) -> bool:
+        """Check whether the stored stats were computed by another schema"""
+        found, _ = self.state.find_many([SCHEMA_RECORD_ID])
+        return not found or found[0].get("version") != STATS_SCHEMA_VERSION
+
+    def _load_state(self, game_id: str) -> dict | None:
+        """Load the projection state of a game"""
+        found, _ = self.state.find_many([game_id])
+        return found[0] if found else None
+
+    def apply_point(self, point: dict, game: dict | None = None) -> bool:
+        """
+        Add a finished point to the stats of its players and teams.
+        Returns False if it was applied already (or is not finished).
+        """
+        if point.get("status") != "finished":
+            return False
+        game = game or self.games.find_header(point["game_id"])
+        player_deltas, team_deltas = point_contributions(point, game)
+
+        # The point is claimed, with its deltas, before the stats are touched:
+        # two scorekeepers saving the same point cannot both count it, and the
+        # deltas of a point interrupted halfway are still there to finish
+        def claim(state: dict):
+            if point["id"] in state["points"]:
+                return
+            state["points"].append(point["id"])
+            new_players, new_teams = _count_participants(
+                state, player_deltas, team_deltas
+            )
+            _count_pulls(state, team_deltas)
+            pending = {
+                "players": {id: dict(delta) for id, delta in player_deltas.items()},
+                "teams": {id: dict(delta) for id, delta in team_deltas.items()},
+            }
+            for player_id in new_players:
+                delta = pending["players"][player_id]
+                delta["games_played"] = delta.get("games_played", 0) + 1
+            for team_id in new_teams:
+                delta = pending["teams"][team_id]
+                delta["games_played"] = delta.get("games_played", 0) + 1
+            state.setdefault("pending", {})[point["id"]] = pending
+
+        state = self.state.modify(game["id"], claim)
+        if state is None:
+            # First point of the game
+            state = new_game_state(game["id"])
+            claim(state)
+            self.state.create(state)
+        pending = (state.get("pending") or {}).get(point["id"])
+        if pending is not None:
+            self._finish(game["id"], point["id"], pending)
+        # Also when it was applied already: the process that applied it may
+        # have stopped before its point listeners had it
+        for listener in self.point_listeners:
+            listener(point, game)
+        return pending is not None
+
+    def finish_pending(self) -> int:
+        """
+        Finish applying the points that were claimed but not fully added to
+        the stats, e.g. when the app stopped halfway. Returns how many.
+        """
+        finished = 0
+        for state in self.state.iter_all(fields=["id", "pending"]):
+            for point_id, pending in (state.get("pending") or {}).items():
+                self._finish(state["id"], point_id, pending)
+                finished += 1
+        return finished
+
+    def _finish(self, game_id: str, point_id: str, pending: dict):
+        """Add the pending deltas of a claimed point, then drop them from the state"""
+        from database.repository import ConcurrentUpdateError
+
+        # A batch another writer got in the way of is dropped whole when it is
+        # flushed, so it is redone; entities it did reach skip the point
+        for attempt in range(FINISH_RETRIES + 1):
+            try:
+                with self.players.batch(), self.teams.batch():
+                    players = self._add(
+                        self.players, PlayerStats, pending["players"], point_id
+                    )
+                    self._add(self.teams, TeamStats, pending["teams"], point_id)
+                break
+            except ConcurrentUpdateError:
+                if attempt < FINISH_RETRIES:
+                    continue
+                # Still busy: one write per entity, each redone on its own
+                players = self._add(
+                    self.players, PlayerStats, pending["players"], point_id
+                )
+                self._add(self.teams, TeamStats, pending["teams"], point_id)
+        for player in players:
+            self._notify(player)
+
+        def done(state: dict):
+            (state.get("pending") or {}).pop(point_id, None)
+
+        self.state.modify(game_id, done)
+
+    def _notify(self, player: dict):
+        """Pass the new stats block of a player to the listeners"""
+        for listener in self.listeners:
+            listener(player["id"], player.get("stats") or {})
+
+    @staticmethod
+    def _add(
+        repository, model: type, deltas: dict[str, dict], point_id: str
+    ) -> list[dict]:
+        """
+        Add the deltas of a point to the stats blocks of a repository's
+        entities, skipping those the point was added to already.
+        Returns the updated entities.
+        """
+        updated = []
+        for id, delta in deltas.items():
+
+            def add(entity: dict, delta: dict = delta):
+                applied = entity.get(APPLIED_POINTS_FIELD) or []
+                if point_id in applied:
+                    return
+                entity["stats"] = _with_totals(entity.get("stats"), model, delta)
+                entity[APPLIED_POINTS_FIELD] = (applied + [point_id])[
+                    -APPLIED_POINTS_KEPT:
+                ]
+
+            entity = repository.modify(id, add)
+            if entity is not None:
+                updated.append(entity)
+        return updated
+
+    def iter_games(self) -> Iterator[tuple[dict, list[dict]]]:
+        """Stream the games with their points, one game at a time"""
+        for game in self.games.iter_all(fields=["id", "team1_id", "team2_id"]):
+            yield game, self.points.find_by_field("game_id", game["id"])
+
+    def rebuild(self, accumulator: StatsAccumulator | None = None) -> StatsAccumulator:
+        """
+        Recompute all stats from the stored games and points and write them.
+        A ready accumulator (e.g. computed in parallel) can be passed in.
+        """
+        if accumulator is None:
+            accumulator = StatsAccumulator()
+            for game, points in self.iter_games():
+                accumulator.add_game(game, points)
+        self.write(accumulator)
+        return accumulator
+
+    def write(self, accumulator: StatsAccumulator):
+        """Replace every stats block and the projection state with the totals"""
+        for repository, model, totals in (
+            (self.players, PlayerStats, accumulator.players),
+            (self.teams, TeamStats, accumulator.teams),
+        ):
+            for entity in repository.iter_all(fields=["id"]):
+                stats = _with_totals(None, model, totals.get(entity["id"], Counter()))
+
+                def replace(entity: dict, stats: dict = stats):
+                    entity["stats"] = stats
+                    entity[APPLIED_POINTS_FIELD] = []
+
+                entity = repository.modify(entity["id"], replace)
+                if entity is not None and repository is self.players:
+                    self._notify(entity)
+
+        with self.state.batch():
+            stale = {record["id"] for record in self.state.iter_all(fields=["id"])}
+            for game_id, state in accumulator.games.items():
+                stale.discard(game_id)
+                if self._load_state(game_id) is None:
+                    self.state.create(dict(state))
+                else:
+                    self.state.update(game_id, dict(state))
+            stale.discard(SCHEMA_RECORD_ID)
+            for game_id in stale:
+                self.state.delete(game_id)
+            # Written last: an interrupted rebuild runs again at the next start
+            schema = {"id": SCHEMA_RECORD_ID, "version": STATS_SCHEMA_VERSION}
+            if self._load_state(SCHEMA_RECORD_ID) is None:
+                self.state.create(schema)
+            else:
+                self.state.update(SCHEMA_RECORD_ID, schema)
+
+
+def main():
+    from database.session import Session
+
+    session = Session()
+    accumulator = session.stats.rebuild()
+    print(
+        f"Rebuilt stats of {len(accumulator.players)} players and "
+        f"{len(accumulator.teams)} teams from {len(accumulator.games)} games"
+    )
+
+
+if __name__ == "__main__":
+    main()
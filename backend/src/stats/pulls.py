@@ -0,0 +1,172 @@
+"""
+Pull analytics: how pulls land and what the pulling team makes of them.
+
+Every finished point with pull data adds to the pull counters of the puller
+(player stats), of the pulling team (team stats) and of its game (projection
+state), through the same incremental projection as the other statistics.
+Counters are split by pull outcome (caught, lifted, out of bounds, brick), and
+the pulling team's breaks are split the same way, so in-bounds and brick
+rates and the break rate after each kind of pull are ratios of stored
+counters. Tournament totals add up the game counters, without reading points.
+
+Usage (from backend/src):
+    python -m stats.pulls [--team TEAM_ID] [--tournament TOURNAMENT_ID]
+"""
+
+import argparse
+from collections import Counter
+
+from models import PullCatchOrLift, PullLocation
+
+# How a pull ended up, in order
+PULL_OUTCOMES: tuple[str, ...] = ("caught", "lifted", "out_of_bounds", "bricked")
+IN_BOUNDS_OUTCOMES: tuple[str, ...] = ("caught", "lifted")
+
+# Counters of the puller, and of the pulling team (with breaks per outcome)
+PLAYER_PULL_FIELDS: tuple[str, ...] = ("pulls",) + tuple(
+    f"pulls_{outcome}" for outcome in PULL_OUTCOMES
+)
+TEAM_PULL_FIELDS: tuple[str, ...] = PLAYER_PULL_FIELDS + tuple(
+    f"breaks_after_{outcome}" for outcome in PULL_OUTCOMES
+)
+
+# The pull view stores the labels of its radio buttons
+_CAUGHT_VALUES = {PullCatchOrLift.CATCH.value, "caught"}
+_LIFTED_VALUES = {PullCatchOrLift.LIFT.value, "lifted"}
+_BRICK_VALUES = {True, "yes", "true"}
+
+
+def pull_outcome(pull_data: dict) -> str | None:
+    """Get the outcome of a pull, None if the pull data does not tell"""
+    location = pull_data.get("pull_location")
+    if location == PullLocation.IN_BOUNDS:
+        catch_or_lift = pull_data.get("catch_or_lift")
+        if catch_or_lift in _CAUGHT_VALUES:
+            return "caught"
+        if catch_or_lift in _LIFTED_VALUES:
+            return "lifted"
+        return None
+    if location == PullLocation.OUT_OF_BOUNDS:
+        return (
+            "bricked"
+            if pull_data.get("brick_called") in _BRICK_VALUES
+            else "out_of_bounds"
+        )
+    return None
+
+
+def pull_contributions(
+    point: dict, game: dict
+) -> tuple[dict[str, Counter], dict[str, Counter]]:
+    """
+    Compute what the pull of a finished point adds to the stats of the puller
+    and the pulling team. Returns the player deltas and the team deltas, by id.
+    """
+    pull_data = point.get("pull_data") or {}
+    outcome = pull_outcome(pull_data)
+    receiving_team = point.get("receiving_team") or pull_data.get("receiving_team")
+    teams = (game.get("team1_id"), game.get("team2_id"))
+    pulling_team = pull_data.get("pulling_team") or next(
+        (team_id for team_id in teams if receiving_team and team_id != receiving_team),
+        None,
+    )
+    if outcome is None or pulling_team is None:
+        return {}, {}
+
+    delta = Counter({"pulls": 1, f"pulls_{outcome}": 1})
+    team_delta = Counter(delta)
+    if point.get("scoring_team") == pulling_team:
+        team_delta[f"breaks_after_{outcome}"] += 1
+    pulling_player = pull_data.get("pulling_player")
+    players = {pulling_player: delta} if pulling_player else {}
+    return players, {pulling_team: team_delta}
+
+
+def pull_counts(team_deltas: dict[str, Counter]) -> Counter:
+    """Sum the pull counters of team deltas, e.g. into the counters of a game"""
+    counts: Counter = Counter()
+    for delta in team_deltas.values():
+        counts.update({key: delta[key] for key in TEAM_PULL_FIELDS if delta[key]})
+    return counts
+
+
+def _ratio(part: int, whole: int) -> float:
+    """Divide, 0 when the whole is 0"""
+    return part / whole if whole else 0.0
+
+
+def pull_rates(counters: dict) -> dict:
+    """
+    Turn pull counters (a player or team stats block, or tournament totals)
+    into rates: in-bounds and brick rates and, when the breaks are counted,
+    the break rate after each pull outcome
+    """
+    pulls = counters.get("pulls", 0)
+    rates = {
+        "pulls": pulls,
+        "in_bounds_rate": _ratio(
+            sum(counters.get(f"pulls_{outcome}", 0) for outcome in IN_BOUNDS_OUTCOMES),
+            pulls,
+        ),
+        "brick_rate": _ratio(counters.get("pulls_bricked", 0), pulls),
+    }
+    if any(f"breaks_after_{outcome}" in counters for outcome in PULL_OUTCOMES):
+        rates["break_rate_after"] = {
+            outcome: _ratio(
+                counters.get(f"breaks_after_{outcome}", 0),
+                counters.get(f"pulls_{outcome}", 0),
+            )
+            for outcome in PULL_OUTCOMES
+        }
+    return rates
+
+
+def tournament_pull_counts(
+    game_repository, state_repository, tournament_id: str
+) -> Counter:
+    """Add up the pull counters of the games of a tournament"""
+    game_ids = [
+        game["id"]
+        for game in game_repository.iter_all(fields=["id", "tournament_id"])
+        if game.get("tournament_id") == tournament_id
+    ]
+    states, _ = state_repository.find_many(game_ids)
+    counts: Counter = Counter()
+    for state in states:
+        counts.update(state.get("pulls") or {})
+    return counts
+
+
+def main():
+    from database.domain_repositories import (
+        GameRepository,
+        PlayerRepository,
+        StatsStateRepository,
+        TeamRepository,
+    )
+
+    parser = argparse.ArgumentParser(description="Pull statistics")
+    parser.add_argument("--team", help="Rates of one team and its pullers")
+    parser.add_argument("--tournament", help="Rates of all pulls of a tournament")
+    args = parser.parse_args()
+
+    if args.tournament:
+        counts = tournament_pull_counts(
+            GameRepository(), StatsStateRepository(), args.tournament
+        )
+        print(f"{args.tournament}: {pull_rates(counts)}")
+        return
+    teams = TeamRepository()
+    team_ids = [args.team] if args.team else [t["id"] for t in teams.iter_all()]
+    team_list, _ = teams.find_many(team_ids)
+    for team in team_list:
+        print(f"{team.get('name', team['id'])}: {pull_rates(team.get('stats') or {})}")
+        players, _ = PlayerRepository().find_many(team.get("players") or [])
+        for player in players:
+            rates = pull_rates(player.get("stats") or {})
+            if rates["pulls"]:
+                print(f"  {player.get('name', player['id'])}: {rates}")
+
+
+if __name__ == "__main__":
+    main()
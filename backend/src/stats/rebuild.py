@@ -0,0 +1,161 @@
+"""
+Full stats rebuild spread over a process pool.
+
+The games are cut into shards and each worker process reads the games and
+points of its shards from storage and folds them into a partial StatsAccumulator
+(player stats, team stats, per-game projection state) and the pass networks of
+their teams. Partial aggregates cover disjoint games, so they are merged in
+whatever order the shards finish; the totals are then written once through
+StatsProjection.rebuild, as a single-process rebuild would, and the networks
+replace the stored ones.
+
+Usage (from backend/src):
+    python -m stats.rebuild [--workers N] [--shard-size GAMES]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+from .pass_network import PassNetwork, merge_networks, team_networks
+from .projection import StatsAccumulator
+
+# Shards per worker, so fast workers pick up the slack of slow ones
+SHARDS_PER_WORKER = 4
+
+GAME_FIELDS = ["id", "team1_id", "team2_id"]
+
+
+class ShardResult:
+    """Partial aggregates of the games of one shard"""
+
+    def __init__(self):
+        self.accumulator = StatsAccumulator()
+        self.networks: dict[str, PassNetwork] = {}
+        self.games: int = 0
+        self.points: int = 0
+
+    def merge(self, other: "ShardResult") -> "ShardResult":
+        """Add the aggregates of a shard covering other games"""
+        self.accumulator.merge(other.accumulator)
+        merge_networks(self.networks, other.networks)
+        self.games += other.games
+        self.points += other.points
+        return self
+
+
+def rebuild_shard(game_ids: list[str]) -> ShardResult:
+    """Compute the partial aggregates of some games, reading them from storage"""
+    # Imported here: the worker processes open their own repositories
+    from database.domain_repositories import GameRepository, PointRepository
+
+    game_repository, point_repository = GameRepository(), PointRepository()
+    games, _ = game_repository.find_many(game_ids, fields=GAME_FIELDS)
+    result = ShardResult()
+    for game in games:
+        points = [
+            point
+            for point in point_repository.find_by_field("game_id", game["id"])
+            if point.get("status") == "finished"
+        ]
+        result.accumulator.add_game(game, points)
+        merge_networks(result.networks, team_networks(points))
+        result.games += 1
+        result.points += len(points)
+    return result
+
+
+def shard(
+    game_ids: list[str], workers: int, shard_size: int | None = None
+) -> list[list[str]]:
+    """Cut game ids into shards, a few per worker unless a size is given"""
+    if shard_size is None:
+        shard_size = max(1, -(-len(game_ids) // (workers * SHARDS_PER_WORKER)))
+    return [
+        game_ids[start : start + shard_size]
+        for start in range(0, len(game_ids), shard_size)
+    ]
+
+
+def parallel_aggregate(
+    game_ids: list[str],
+    workers: int | None = None,
+    shard_size: int | None = None,
+    progress: Callable[[ShardResult, float], None] | None = None,
+) -> ShardResult:
+    """
+    Aggregate games over a process pool. `progress` gets the running totals
+    and the elapsed seconds each time a shard is merged.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = ShardResult()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(rebuild_shard, shard_ids)
+            for shard_ids in shard(game_ids, workers, shard_size)
+        ]
+        for future in as_completed(futures):
+            total.merge(future.result())
+            if progress:
+                progress(total, time.perf_counter() - started)
+    return total
+
+
+def parallel_rebuild(
+    projection,
+    workers: int | None = None,
+    shard_size: int | None = None,
+    progress: Callable[[ShardResult, float], None] | None = None,
+    network_store=None,
+) -> ShardResult:
+    """
+    Recompute all stats over a process pool and write them through
+    `projection`; the pass networks replace those of `network_store`, if given
+    """
+    game_ids = [game["id"] for game in projection.games.iter_all(fields=["id"])]
+    result = parallel_aggregate(game_ids, workers, shard_size, progress)
+    projection.rebuild(result.accumulator)
+    if network_store is not None:
+        network_store.replace_all(result.networks)
+    return result
+
+
+def main():
+    from database.session import Session
+
+    parser = argparse.ArgumentParser(description="Rebuild all stats in parallel")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, help="Games per shard")
+    args = parser.parse_args()
+
+    session = Session()
+    game_count = sum(1 for _ in session.games.iter_all(fields=["id"]))
+
+    def progress(total: ShardResult, elapsed: float):
+        rate = total.points / elapsed if elapsed else 0.0
+        sys.stderr.write(
+            f"\r{total.games}/{game_count} games, {total.points} points "
+            f"({rate:,.0f} points/s)"
+        )
+        sys.stderr.flush()
+
+    started = time.perf_counter()
+    result = parallel_rebuild(
+        session.stats, args.workers, args.shard_size, progress, session.pass_networks
+    )
+    sys.stderr.write("\n")
+    print(
+        f"Rebuilt stats of {len(result.accumulator.players)} players and "
+        f"{len(result.accumulator.teams)} teams ({len(result.networks)} pass "
+        f"networks) from {result.games} games "
+        f"with {args.workers} workers "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Per-team arrays stored next to the event store.
+
+Team analytics that are kept current as points are saved (pass networks,
+lineup indexes) are stored as one `.npz` file per team. A file is replaced
+atomically and only under the team's lock file, so several processes can add
+points at once; a loaded object is kept until its file is replaced by
+another writer.
+"""
+
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+import numpy as np
+
+# A per-team object with the ids of the points it holds
+T = TypeVar("T")
+
+
+def _signature(path: str) -> tuple[int, int, int] | None:
+    """Get what changes when a file is replaced, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class TeamArrayStore(Generic[T]):
+    """
+    One `.npz` file per team under `directory_path`. Subclasses turn their
+    objects into arrays and back, and add points through `_update`.
+    """
+
+    def __init__(self, directory_path: str):
+        self.directory_path: str = directory_path
+        self._lock = threading.RLock()
+        # team id -> (signature of the file it was loaded from, object)
+        self._cache: dict[str, tuple[tuple[int, int, int] | None, T]] = {}
+        os.makedirs(directory_path, exist_ok=True)
+
+    def _new(self, team_id: str) -> T:
+        """Create the empty object of a team"""
+        raise NotImplementedError
+
+    def _to_arrays(self, item: T) -> dict[str, Any]:
+        """Turn an object into named arrays"""
+        raise NotImplementedError
+
+    def _from_arrays(self, team_id: str, arrays) -> T:
+        """Rebuild the object of a team from its named arrays"""
+        raise NotImplementedError
+
+    def _team_id(self, item: T) -> str:
+        """Get the team of an object"""
+        return getattr(item, "team_id")
+
+    def _get_path(self, team_id: str) -> str:
+        """Get the path of the file of a team"""
+        return os.path.join(self.directory_path, f"{team_id}.npz")
+
+    def _get_lock_path(self, team_id: str) -> str:
+        """Get the path of the lock file of a team"""
+        return os.path.join(self.directory_path, f"{team_id}.lock")
+
+    def team_ids(self) -> list[str]:
+        """Get the ids of the teams with a stored object"""
+        return sorted(
+            file_name[: -len(".npz")]
+            for file_name in os.listdir(self.directory_path)
+            if file_name.endswith(".npz")
+        )
+
+    def get(self, team_id: str) -> T | None:
+        """
+        Get the stored object of a team, None if it has none.
+        The object is shared with the store, it must not be changed.
+        """
+        with self._lock:
+            path = self._get_path(team_id)
+            signature = _signature(path)
+            if signature is None:
+                self._cache.pop(team_id, None)
+                return None
+            cached = self._cache.get(team_id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            with np.load(path, allow_pickle=False) as arrays:
+                item = self._from_arrays(team_id, arrays)
+            self._cache[team_id] = (signature, item)
+            return item
+
+    def save(self, item: T):
+        """Store the object of a team, replacing the stored one atomically"""
+        team_id = self._team_id(item)
+        with self._lock:
+            path = self._get_path(team_id)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory_path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **self._to_arrays(item))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            self._cache[team_id] = (_signature(path), item)
+
+    def _update(self, team_id: str, point_id: str, change: Callable[[T], bool]) -> bool:
+        """
+        Change the stored object of a team with a point it does not have yet,
+        under the team's lock. `change` returns False when it left the object
+        as it was. Returns whether the object was changed and stored.
+        """
+        from database.locking import file_lock
+
+        with self._lock, file_lock(self._get_lock_path(team_id)):
+            item = self.get(team_id)
+            if item is None:
+                item = self._new(team_id)
+            elif point_id in getattr(item, "point_ids"):
+                return False
+            try:
+                if not change(item):
+                    return False
+                self.save(item)
+            except BaseException:
+                # The cached object may hold the point, load it again
+                self._cache.pop(team_id, None)
+                raise
+            return True
+
+    def replace_all(self, items: dict[str, T]):
+        """Store freshly built objects by team id, dropping the other teams"""
+        from database.locking import file_lock
+
+        for team_id in set(self.team_ids()) - items.keys():
+            with self._lock, file_lock(self._get_lock_path(team_id)):
+                os.remove(self._get_path(team_id))
+                self._cache.pop(team_id, None)
+        for team_id, item in items.items():
+            with self._lock, file_lock(self._get_lock_path(team_id)):
+                self.save(item)
+
+    def add_point(self, point: dict, game: dict) -> int:
+        """Add a finished point to the stored objects of its teams"""
+        raise NotImplementedError
+
+    def attach(self, projection):
+        """Follow the points saved through a StatsProjection"""
+        projection.point_listeners.append(self.add_point)
@@ -1,6 +1,8 @@
 # Main application class for Ultimate Frisbee statistics gathering.
 import flet as ft
 
+from src.database.session import Session
+from src.stats.leaderboards import LeaderboardService
 from src.ui.components.theme import create_theme_switch
 from src.ui.views.game_view import GameView
 from src.ui.views.start_page import StartPage
@@ -17,6 +19,12 @@ class UltiStatsApp:
 
     def __init__(self, page: ft.Page):
         self.page = page
+        self.session = Session()
+        # Keep the leaderboards live as points are saved
+        self.leaderboards = LeaderboardService.from_repositories(
+            self.session.players, self.session.teams
+        )
+        self.leaderboards.attach(self.session.stats)
         self.setup_page()
         self.current_view = None
         self.initialize_app()
@@ -37,11 +45,32 @@ class UltiStatsApp:
         )
 
     def initialize_app(self):
-        """Show initial view"""
-        self.navigate_to("start")
+        """Recover an interrupted point capture, or show the initial view"""
+        in_progress = self.session.recover()
+        # Only the latest capture can be resumed, older ones are abandoned
+        for capture in in_progress[:-1]:
+            self.session.journal.record(capture["capture_id"], "capture_discarded")
+        if in_progress:
+            capture = in_progress[-1]
+            self.navigate_to(
+                "point",
+                game_id=capture["game_id"],
+                team1_id=capture["team1_id"],
+                team2_id=capture["team2_id"],
+                selected_players=capture["selected_players"],
+                offensive_team=capture["offensive_team"],
+                pull_data=capture["pull_data"],
+                capture_id=capture["capture_id"],
+                player_positions=capture["player_positions"],
+                receiving_team=capture.get("receiving_team"),
+            )
+        else:
+            self.navigate_to("start")
 
     def navigate_to(self, view_name: str, **kwargs):
         """Navigate to specified view"""
+        # Write out whatever the previous view changed, once
+        self.session.commit()
         self.page.clean()
 
         views = {
@@ -56,6 +85,8 @@ class UltiStatsApp:
         }
         current_view = views.get(view_name)
         if current_view is not None:
-            self.current_view = current_view(self.page, self.navigate_to, **kwargs)
+            self.current_view = current_view(
+                self.page, self.navigate_to, self.session, **kwargs
+            )
         else:
             raise ValueError(f"View not found: {view_name}")
@@ -1,14 +1,16 @@
 # This file contains the base class for all views in the application
 import flet as ft
 from typing import Callable
+from src.database.session import Session
 
 
 class BaseView:
     """Base class for all views in the application"""
 
-    def __init__(self, page: ft.Page, navigation_callback: Callable):
+    def __init__(self, page: ft.Page, navigation_callback: Callable, session: Session):
         self.page = page
         self.navigate_to = navigation_callback
+        self.session = session  # Shared storage session, owned by the app
         self.initialize_view()
 
     def initialize_view(self):
@@ -4,8 +4,8 @@ This module contains the GameView class, which is responsible for rendering the
 
 import flet as ft
 from src.ui.views.base_view import BaseView
-from src.database.domain_repositories import TeamRepository, GameRepository
-from src.models import Team, Game, Scores, TeamScore, GameViewState
+from src.database.session import Session
+from src.models import Game, Scores, TeamScore, GameViewState
 from typing import Callable
 
 
@@ -14,12 +14,12 @@ class GameView(BaseView):
     Game view - allows selecting teams and starting points
     """
 
-    def __init__(self, page: ft.Page, navigation_callback: Callable):
-        self.team_repo = TeamRepository()
-        self.game_repo = GameRepository()
+    def __init__(self, page: ft.Page, navigation_callback: Callable, session: Session):
+        self.team_repo = session.teams
+        self.game_repo = session.async_games
         self.state = GameViewState()
-        self.teams: list[Team] = []
-        super().__init__(page, navigation_callback)
+        self.teams: list[dict] = []
+        super().__init__(page, navigation_callback, session)
 
     def initialize_view(self):
         # Title
@@ -29,13 +29,17 @@ class GameView(BaseView):
         self.team1_dropdown = ft.Dropdown(
             label="Team 1",
             width=300,
-            on_change=lambda e: self.update_team_selection("selected_team1", e.data),
+            on_change=lambda e: self.page.run_task(
+                self.update_team_selection, "selected_team1", e.data
+            ),
         )
 
         self.team2_dropdown = ft.Dropdown(
             label="Team 2",
             width=300,
-            on_change=lambda e: self.update_team_selection("selected_team2", e.data),
+            on_change=lambda e: self.page.run_task(
+                self.update_team_selection, "selected_team2", e.data
+            ),
         )
 
         # Start point button
@@ -91,13 +95,13 @@ class GameView(BaseView):
 
     def load_teams(self):
         """Load teams into dropdowns"""
-        self.teams = [Team.model_validate(team) for team in self.team_repo.find_all()]
-        options = [ft.dropdown.Option(team.id, team.name) for team in self.teams]
+        self.teams = self.team_repo.find_all(fields=["id", "name"])
+        options = [ft.dropdown.Option(team["id"], team["name"]) for team in self.teams]
         self.team1_dropdown.options = options
         self.team2_dropdown.options = options
         self.page.update()
 
-    def update_team_selection(self, team_key: str, team_id: str):
+    async def update_team_selection(self, team_key: str, team_id: str):
         """Handle team selection"""
         # Update state using Pydantic model
         self.state = GameViewState(**{**self.state.model_dump(), team_key: team_id})
@@ -118,14 +122,19 @@ class GameView(BaseView):
                 # Create new game using Pydantic models
                 if not self.state.selected_team1 or not self.state.selected_team2:
                     raise ValueError("Both teams must be selected to create a game")
-                game_dict = self.game_repo.create_game(
+                game_dict = await self.game_repo.create_game(
                     team1_id=self.state.selected_team1,
                     team2_id=self.state.selected_team2,
                 )
+                self.session.add("games", game_dict)
 
                 # Get team names for scores
-                team1 = next(t for t in self.teams if t.id == self.state.selected_team1)
-                team2 = next(t for t in self.teams if t.id == self.state.selected_team2)
+                team1 = next(
+                    t for t in self.teams if t["id"] == self.state.selected_team1
+                )
+                team2 = next(
+                    t for t in self.teams if t["id"] == self.state.selected_team2
+                )
 
                 # Create Game model with proper score initialization
                 self.state.current_game = Game(
@@ -133,12 +142,12 @@ class GameView(BaseView):
                     score=Scores(
                         team_1=TeamScore(
                             team_id=self.state.selected_team1,
-                            team_name=team1.name,
+                            team_name=team1["name"],
                             score=0,
                         ),
                         team_2=TeamScore(
                             team_id=self.state.selected_team2,
-                            team_name=team2.name,
+                            team_name=team2["name"],
                             score=0,
                         ),
                     ),
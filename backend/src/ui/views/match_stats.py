@@ -3,7 +3,9 @@ This module contains the MatchStatsView class, which displays statistics for com
 """
 
 import flet as ft
+from typing import Callable
 from src.ui.views.base_view import BaseView
+from src.database.session import Session
 
 
 class MatchStatsView(BaseView):
@@ -11,6 +13,13 @@ class MatchStatsView(BaseView):
     Match statistics view - displays statistics for completed matches
     """
 
+    page_size = 20  # Matches loaded per page
+
+    def __init__(self, page: ft.Page, navigation_callback: Callable, session: Session):
+        self.game_repository = session.games
+        self.last_game_id = None  # Last match shown, the next page starts after it
+        super().__init__(page, navigation_callback, session)
+
     def initialize_view(self):
         # Back button
         back_btn = ft.IconButton(
@@ -41,6 +50,13 @@ class MatchStatsView(BaseView):
             padding=20,
         )
 
+        # Next page of matches
+        self.load_more_btn = ft.TextButton(
+            text="Load more",
+            icon=ft.icons.EXPAND_MORE,
+            on_click=self.load_more_matches,
+        )
+
         # Layout
         self.page.add(
             ft.Row(
@@ -67,28 +83,52 @@ class MatchStatsView(BaseView):
         self.load_matches()
 
     def load_matches(self):
-        """Load matches from database"""
-        # TODO: Implement database integration
-        # For now, show sample matches
-        sample_matches = [
-            {
-                "date": "2024-03-15",
-                "team1": "Team A",
-                "team2": "Team B",
-                "score1": 15,
-                "score2": 12,
-            },
-            {
-                "date": "2024-03-14",
-                "team1": "Team C",
-                "team2": "Team D",
-                "score1": 15,
-                "score2": 8,
-            },
-        ]
-
-        for match in sample_matches:
+        """Load the first page of matches from database"""
+        self.matches_list.controls.clear()
+        self.last_game_id = None
+        self.load_more_matches()
+
+    def load_more_matches(self, e=None):
+        """Load the next page of matches, newest first"""
+        games = list(
+            self.game_repository.iter_all(
+                order_by="-id",
+                limit=self.page_size,
+                after=self.last_game_id,
+                fields=[
+                    "id",
+                    "created_at",
+                    "team1_id",
+                    "team2_id",
+                    "team1_score",
+                    "team2_score",
+                ],
+            )
+        )
+        if self.load_more_btn in self.matches_list.controls:
+            self.matches_list.controls.remove(self.load_more_btn)
+
+        team_ids = list(
+            {game[key] for game in games for key in ("team1_id", "team2_id")}
+        )
+        teams = self.session.get_many("teams", team_ids)
+        team_names = {team["id"]: team["name"] for team in teams}
+
+        for game in games:
+            match = {
+                "id": game["id"],
+                "date": (game["created_at"] or "")[:10],
+                "team1": team_names.get(game["team1_id"], "Unknown team"),
+                "team2": team_names.get(game["team2_id"], "Unknown team"),
+                "score1": game["team1_score"] or 0,
+                "score2": game["team2_score"] or 0,
+            }
             self.matches_list.controls.append(self.create_match_card(match))
+
+        if games:
+            self.last_game_id = games[-1]["id"]
+        if len(games) == self.page_size:
+            self.matches_list.controls.append(self.load_more_btn)
         self.page.update()
 
     def create_match_card(self, match_data: dict) -> ft.Card:
@@ -2,8 +2,11 @@
 This module contains the PlayerStatsView class, which is responsible for displaying player statistics.
 """
 
+import bisect
 import flet as ft
+from typing import Callable
 from src.ui.views.base_view import BaseView
+from src.database.session import Session
 
 
 class PlayerStatsView(BaseView):
@@ -11,6 +14,14 @@ class PlayerStatsView(BaseView):
     Player statistics view - displays individual player statistics
     """
 
+    page_size = 20  # Players loaded per page
+
+    def __init__(self, page: ft.Page, navigation_callback: Callable, session: Session):
+        self.player_repository = session.players
+        self.team_repository = session.teams
+        self.last_player_id = None  # Last player shown, the next page starts after it
+        super().__init__(page, navigation_callback, session)
+
     def initialize_view(self):
         # Back button
         back_btn = ft.IconButton(
@@ -29,10 +40,8 @@ class PlayerStatsView(BaseView):
 
         self.team_dropdown = ft.Dropdown(
             label="Filter by Team",
-            options=[
-                ft.dropdown.Option("All Teams"),
-                # TODO: Load actual teams from database
-            ],
+            options=[ft.dropdown.Option("All Teams")],
+            value="All Teams",
             width=200,
             on_change=self.filter_players,
         )
@@ -44,6 +53,13 @@ class PlayerStatsView(BaseView):
             padding=20,
         )
 
+        # Next page of players
+        self.load_more_btn = ft.TextButton(
+            text="Load more",
+            icon=ft.icons.EXPAND_MORE,
+            on_click=self.load_more_players,
+        )
+
         # Layout
         self.page.add(
             ft.Row(
@@ -66,40 +82,98 @@ class PlayerStatsView(BaseView):
         self.load_players()
 
     def load_players(self):
-        """Load players from database"""
-        # TODO: Implement database integration
-        # For now, show sample players
-        sample_players = [
-            {
-                "name": "John Doe",
-                "number": 7,
-                "team": "Team A",
-                "stats": {
-                    "games": 10,
-                    "points": 25,
-                    "assists": 15,
-                    "catches": 45,
-                },
-            },
-            {
-                "name": "Jane Smith",
-                "number": 14,
-                "team": "Team B",
-                "stats": {
-                    "games": 8,
-                    "points": 18,
-                    "assists": 22,
-                    "catches": 38,
-                },
-            },
+        """Load the teams and the first page of players from database"""
+        teams = self.team_repository.find_all(fields=["id", "name", "players"])
+        # Players only know their team through the team's player list
+        self.player_teams = {
+            player_id: team["name"]
+            for team in teams
+            for player_id in team["players"] or []
+        }
+        # Sorted like the player pages, so a team's players page the same way
+        self.team_players = {
+            team["id"]: sorted(team["players"] or []) for team in teams
+        }
+        self.team_dropdown.options = [ft.dropdown.Option("All Teams")] + [
+            ft.dropdown.Option(key=team["id"], text=team["name"]) for team in teams
         ]
+        self.filter_players()
+
+    def load_more_players(self, e=None):
+        """Load the next page of players matching the filters, after the last one shown"""
+        players: list[dict] = []
+        exhausted = False
+        while len(players) < self.page_size and not exhausted:
+            candidates, last_id, exhausted = self._next_candidates()
+            if last_id is not None:
+                self.last_player_id = last_id
+            players.extend(player for player in candidates if self._matches(player))
+        if len(players) > self.page_size:
+            # The next page starts after the last player shown
+            players = players[: self.page_size]
+            self.last_player_id = players[-1]["id"]
+            exhausted = False
+
+        if self.load_more_btn in self.players_list.controls:
+            self.players_list.controls.remove(self.load_more_btn)
 
-        for player in sample_players:
-            self.players_list.controls.append(self.create_player_card(player))
+        for player in players:
+            self.players_list.controls.append(
+                self.create_player_card(
+                    {**player, "team": self.player_teams.get(player["id"], "-")}
+                )
+            )
+
+        if not exhausted:
+            self.players_list.controls.append(self.load_more_btn)
         self.page.update()
 
+    def _next_candidates(self) -> tuple[list[dict], str | None, bool]:
+        """
+        Get the next page of players of the selected team (all players if
+        none is), with the last id it covers and whether no page follows
+        """
+        fields = ["id", "name", "number", "stats"]
+        roster = self.team_players.get(self.team_dropdown.value)
+        if roster is not None:
+            # Only the team's players are read, not every player
+            start = (
+                bisect.bisect_right(roster, self.last_player_id)
+                if self.last_player_id
+                else 0
+            )
+            ids = roster[start : start + self.page_size]
+            players, _ = self.player_repository.find_many(ids, fields=fields)
+            return (
+                players,
+                ids[-1] if ids else None,
+                start + self.page_size >= len(roster),
+            )
+        players = list(
+            self.player_repository.iter_all(
+                limit=self.page_size, after=self.last_player_id, fields=fields
+            )
+        )
+        return (
+            players,
+            players[-1]["id"] if players else None,
+            len(players) < self.page_size,
+        )
+
+    def _matches(self, player: dict) -> bool:
+        """Check whether a player's name contains the search text"""
+        search = (self.search_field.value or "").strip().lower()
+        return not search or search in (player.get("name") or "").lower()
+
+    def filter_players(self, e=None):
+        """Show the players matching the search and team, from the first page"""
+        self.players_list.controls.clear()
+        self.last_player_id = None
+        self.load_more_players()
+
     def create_player_card(self, player_data: dict) -> ft.Card:
         """Create a card display for a player"""
+        stats = player_data.get("stats") or {}
         return ft.Card(
             content=ft.Container(
                 content=ft.Column(
@@ -117,10 +191,12 @@ class PlayerStatsView(BaseView):
                         ft.Divider(),
                         ft.Row(
                             [
-                                ft.Text(f"Games: {player_data['stats']['games']}"),
-                                ft.Text(f"Points: {player_data['stats']['points']}"),
-                                ft.Text(f"Assists: {player_data['stats']['assists']}"),
-                                ft.Text(f"Catches: {player_data['stats']['catches']}"),
+                                ft.Text(f"Games: {stats.get('games_played', 0)}"),
+                                ft.Text(f"Points: {stats.get('points_played', 0)}"),
+                                ft.Text(f"Goals: {stats.get('goals', 0)}"),
+                                ft.Text(f"Assists: {stats.get('assists', 0)}"),
+                                ft.Text(f"Blocks: {stats.get('blocks', 0)}"),
+                                ft.Text(f"Turnovers: {stats.get('turnovers', 0)}"),
                             ],
                             alignment=ft.MainAxisAlignment.CENTER,
                         ),
@@ -2,18 +2,16 @@
 This module contains the PointView class, which is responsible for handling the tracking of individual points in the game.
 """
 
+from datetime import datetime
+
 import flet as ft
 from src.ui.views.base_view import BaseView
 from src.ui.components.player_circle import (
     PlayerCircleGroup,
     create_draggable_player_circle,
 )
-from src.database.domain_repositories import (
-    TeamRepository,
-    PlayerRepository,
-    PointRepository,
-    GameRepository,
-)
+from src.database.journal import save_point
+from src.database.session import Session
 
 
 class PointView(BaseView):
@@ -25,23 +23,27 @@ class PointView(BaseView):
         self,
         page: ft.Page,
         navigation_callback,
+        session: Session,
         game_id: str,
         team1_id: str,
         team2_id: str,
         selected_players: dict[str, list[str]],
         offensive_team: str,
         pull_data: dict,
+        capture_id: str | None = None,
+        player_positions: dict[str, str] | None = None,
+        receiving_team: str | None = None,
     ):
         self.game_id = game_id
         self.team1_id = team1_id
         self.team2_id = team2_id
         self.selected_players = selected_players
         self.offensive_team = offensive_team
+        # The team on offense when the point started, it received the pull
+        self.receiving_team = receiving_team or offensive_team
         self.pull_data = pull_data
-        self.team_repo = TeamRepository()
-        self.player_repo = PlayerRepository()
-        self.point_repo = PointRepository()
-        self.game_repo = GameRepository()
+        self.point_repo = session.points
+        self.game_repo = session.games
 
         # Field state
         self.field_positions: dict[str, None | str] = {
@@ -50,12 +52,34 @@ class PointView(BaseView):
         }
         self.player_positions: dict[str, None | str] = {}  # player_id: position_id
 
-        super().__init__(page, navigation_callback)
+        # Every capture action is journaled, so a killed app can resume the point
+        self.journal = session.journal
+        if capture_id is None:
+            self.capture_id = self.point_repo.id_generator()
+            self.journal.record(
+                self.capture_id,
+                "point_started",
+                game_id=game_id,
+                team1_id=team1_id,
+                team2_id=team2_id,
+                selected_players=selected_players,
+                offensive_team=offensive_team,
+                receiving_team=self.receiving_team,
+                pull_data=pull_data,
+            )
+        else:
+            # Resumed after a crash, restore the positions captured so far
+            self.capture_id = capture_id
+            for player_id, position_id in (player_positions or {}).items():
+                self.player_positions[player_id] = position_id
+                self.field_positions[position_id] = player_id
+
+        super().__init__(page, navigation_callback, session)
 
     def initialize_view(self):
         # Load teams
-        team1: dict | None = self.team_repo.find_by_id(self.team1_id)
-        team2: dict | None = self.team_repo.find_by_id(self.team2_id)
+        team1: dict | None = self.session.get("teams", self.team1_id)
+        team2: dict | None = self.session.get("teams", self.team2_id)
 
         if not team1 or not team2:
             self.show_error("Teams not found")
@@ -80,14 +104,7 @@ class PointView(BaseView):
         # Back button
         back_btn = ft.IconButton(
             icon=ft.icons.ARROW_BACK,
-            on_click=lambda _: self.navigate_to(
-                "setup_point",
-                {
-                    "game_id": self.game_id,
-                    "team1_id": self.team1_id,
-                    "team2_id": self.team2_id,
-                },
-            ),
+            on_click=self.handle_back,
             tooltip="Back to setup point",
         )
 
@@ -119,7 +136,10 @@ class PointView(BaseView):
                 position_id = f"pos_{row * positions_per_row + pos}"
                 drop_target = ft.DragTarget(
                     content=ft.Container(
-                        content=None,  # Will be filled when a player is dropped
+                        # Filled when a player is dropped (or restored)
+                        content=self.create_position_circle(
+                            self.field_positions[position_id]
+                        ),
                         width=60,
                         height=60,
                         border=ft.border.all(1, ft.colors.GREY_400),
@@ -155,7 +175,7 @@ class PointView(BaseView):
     def create_team_bench(self, team, team_key: str) -> ft.Container:
         """Create a team's bench with draggable player circles"""
         players = [
-            self.player_repo.find_by_id(player_id)
+            self.session.get("players", player_id)
             for player_id in self.selected_players[team_key]
         ]
 
@@ -172,15 +192,11 @@ class PointView(BaseView):
             draggable = ft.Draggable(
                 content=create_draggable_player_circle(
                     number=player_number,
-                    bgcolor=team.primary_color
-                    if hasattr(team, "primary_color")
-                    else ft.colors.BLUE,
+                    bgcolor=team.get("primary_color", ft.colors.BLUE),
                 ),
                 content_feedback=create_draggable_player_circle(
                     number=player_number,
-                    bgcolor=team.
-                    if hasattr(team, "primary_color")
-                    else ft.colors.BLUE,
+                    bgcolor=team.get("primary_color", ft.colors.BLUE),
                 ),
                 data={"player_id": player.get("id"), "team": team_key},
             )
@@ -199,6 +215,19 @@ class PointView(BaseView):
             border_radius=10,
         )
 
+    def create_position_circle(self, player_id: str | None) -> ft.Container | None:
+        """Create the circle of a player standing on a field position"""
+        if player_id is None:
+            return None
+        player = self.session.get("players", player_id)
+        if player is None or player.get("number") is None:
+            return None
+        team = self.team1 if player_id in self.selected_players["team1"] else self.team2
+        return create_draggable_player_circle(
+            number=int(player["number"]),
+            bgcolor=team.get("primary_color", ft.colors.BLUE),
+        )
+
     def create_score_display(self) -> ft.Row:
         """Create the score display row"""
         return ft.Row(
@@ -252,9 +281,15 @@ class PointView(BaseView):
         # Update position mappings
         self.field_positions[position_id] = player_data["player_id"]
         self.player_positions[player_data["player_id"]] = position_id
+        self.journal.record(
+            self.capture_id,
+            "player_moved",
+            player_id=player_data["player_id"],
+            position_id=position_id,
+        )
 
         # Update the visual representation
-        player = self.player_repo.find_by_id(player_data["player_id"])
+        player = self.session.get("players", player_data["player_id"])
         team = self.team1 if player_data["team"] == "team1" else self.team2
 
         if player is None:
@@ -280,36 +315,69 @@ class PointView(BaseView):
         )
         self.page.update()
 
+    def team_id(self, team_key: str) -> str:
+        """Get the team id of a team key ("team1" or "team2")"""
+        return self.team1_id if team_key == "team1" else self.team2_id
+
     def handle_score(self, e):
         """Handle a scoring event"""
-        # Save point data
         point_data = {
+            "id": self.capture_id,
             "game_id": self.game_id,
-            "scoring_team": self.offensive_team,
+            "scoring_team": self.team_id(self.offensive_team),
+            "team1_players": self.selected_players["team1"],
+            "team2_players": self.selected_players["team2"],
+            "receiving_team": self.team_id(self.receiving_team),
             "players": self.player_positions,
             "pull_data": self.pull_data,
+            "status": "finished",
+            "end_time": datetime.now().isoformat(),
         }
-        # TODO: Save point data to database
+        # Durable in the journal first, then stored
+        self.journal.record(self.capture_id, "point_scored", point=point_data)
+        self.journal.sync()
+        save_point(
+            self.session.games, self.session.points, point_data, self.session.stats
+        )
+        self.session.evict("games", self.game_id)
+        # Their stats blocks just changed
+        for player_id in point_data["team1_players"] + point_data["team2_players"]:
+            self.session.evict("players", player_id)
+        self.session.evict("teams", self.team1_id)
+        self.session.evict("teams", self.team2_id)
+        self.journal.record(self.capture_id, "point_saved", point_id=self.capture_id)
+        self.journal.checkpoint()
 
         # Navigate back to setup point
         self.navigate_to(
             "setup_point",
-            {
-                "game_id": self.game_id,
-                "team1_id": self.team1_id,
-                "team2_id": self.team2_id,
-            },
+            game_id=self.game_id,
+            team1_id=self.team1_id,
+            team2_id=self.team2_id,
+        )
+
+    def handle_back(self, e):
+        """Abandon the point and go back to setup point"""
+        self.journal.record(self.capture_id, "capture_discarded")
+        self.navigate_to(
+            "setup_point",
+            game_id=self.game_id,
+            team1_id=self.team1_id,
+            team2_id=self.team2_id,
         )
 
     def handle_turnover(self, e):
         """Handle a turnover event"""
         # Swap offensive team
         self.offensive_team = "team2" if self.offensive_team == "team1" else "team1"
-        # TODO: Record turnover in point data
+        self.journal.record(
+            self.capture_id, "turnover", offensive_team=self.offensive_team
+        )
         self.page.update()
 
     def reset_positions(self, e):
         """Reset all player positions on the field"""
         self.field_positions = {pos: None for pos in self.field_positions}
         self.player_positions = {}
+        self.journal.record(self.capture_id, "positions_reset")
         self.initialize_view()
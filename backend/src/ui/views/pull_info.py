@@ -4,7 +4,7 @@ This module contains the PullInfoView class, which is responsible for capturing
 
 import flet as ft
 from src.ui.views.base_view import BaseView
-from src.database.domain_repositories import TeamRepository, PlayerRepository
+from src.database.session import Session
 
 
 class PullInfoView(BaseView):
@@ -16,6 +16,7 @@ class PullInfoView(BaseView):
         self,
         page: ft.Page,
         navigation_callback,
+        session: Session,
         game_id: str,
         team1_id: str,
         team2_id: str,
@@ -27,8 +28,6 @@ class PullInfoView(BaseView):
         self.team2_id: str = team2_id
         self.selected_players: dict[str, list[str]] = selected_players
         self.offensive_team = offensive_team
-        self.team_repo = TeamRepository()
-        self.player_repo = PlayerRepository()
         self.pull_data: dict[str, None | str] = {
             "pulling_player": None,
             "pull_location": None,
@@ -36,12 +35,12 @@ class PullInfoView(BaseView):
             "brick_called": None,
             "receiving_player": None,
         }
-        super().__init__(page, navigation_callback)
+        super().__init__(page, navigation_callback, session)
 
     def initialize_view(self):
         # Load teams
-        self.team1 = self.team_repo.find_by_id(self.team1_id)
-        self.team2 = self.team_repo.find_by_id(self.team2_id)
+        self.team1 = self.session.get("teams", self.team1_id)
+        self.team2 = self.session.get("teams", self.team2_id)
 
         # Determine pulling and receiving teams
         pulling_team = self.team2 if self.offensive_team == "team1" else self.team1
@@ -52,13 +51,12 @@ class PullInfoView(BaseView):
             return
 
         # Pulling player selection
-        pulling_players: list[dict] = []
-        for player_id in self.selected_players[
-            "team2" if self.offensive_team == "team1" else "team1"
-        ]:
-            player = self.player_repo.find_by_id(player_id)
-            if player is not None:
-                pulling_players.append(player)
+        pulling_players = self.session.get_many(
+            "players",
+            self.selected_players[
+                "team2" if self.offensive_team == "team1" else "team1"
+            ],
+        )
         self.pulling_player_dropdown = ft.Dropdown(
             label="Select pulling player",
             options=[
@@ -119,13 +117,12 @@ class PullInfoView(BaseView):
         )
 
         # Receiving player selection
-        receiving_players: list[dict] = []
-        for player_id in self.selected_players[
-            "team1" if self.offensive_team == "team1" else "team2"
-        ]:
-            player = self.player_repo.find_by_id(player_id)
-            if player is not None:
-                receiving_players.append(player)
+        receiving_players = self.session.get_many(
+            "players",
+            self.selected_players[
+                "team1" if self.offensive_team == "team1" else "team2"
+            ],
+        )
 
         self.receiving_player_dropdown = ft.Dropdown(
             label="Select receiving/lifting player",
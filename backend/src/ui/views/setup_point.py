@@ -1,6 +1,8 @@
+import asyncio
+
 import flet as ft
 from src.ui.views.base_view import BaseView
-from src.database.domain_repositories import TeamRepository, PlayerRepository
+from src.database.session import Session
 
 
 class SetupPointView(BaseView):
@@ -12,6 +14,7 @@ class SetupPointView(BaseView):
         self,
         page: ft.Page,
         navigation_callback,
+        session: Session,
         game_id: str,
         team1_id: str,
         team2_id: str,
@@ -19,8 +22,6 @@ class SetupPointView(BaseView):
         self.game_id = game_id
         self.team1_id = team1_id
         self.team2_id = team2_id
-        self.team_repo = TeamRepository()
-        self.player_repo = PlayerRepository()
 
         # Initialize all dictionaries in __init__
         self.selected_players: dict[str, list] = {"team1": [], "team2": []}
@@ -35,24 +36,30 @@ class SetupPointView(BaseView):
         self.all_players: dict[str, list] = {"team1": [], "team2": []}
 
         self.starting_offensive_team: str | None = None
-        super().__init__(page, navigation_callback)
+        super().__init__(page, navigation_callback, session)
 
     def initialize_view(self):
-        # Load teams
-        self.team1 = self.team_repo.find_by_id(self.team1_id)
-        self.team2 = self.team_repo.find_by_id(self.team2_id)
+        # Load data in the background so the page stays responsive
+        self.show_loading()
+        self.page.run_task(self.load_view)
+
+    async def load_view(self):
+        """Load teams and players off the UI thread, then build the view"""
+        # Load teams, then the players of each team
+        self.team1, self.team2 = await asyncio.gather(
+            self.session.get_async("teams", self.team1_id),
+            self.session.get_async("teams", self.team2_id),
+        )
+        if self.team1 and self.team2:
+            self.all_players["team1"], self.all_players["team2"] = await asyncio.gather(
+                self.session.get_many_async("players", self.team1.get("players", [])),
+                self.session.get_many_async("players", self.team2.get("players", [])),
+            )
+        self.page.clean()
         if not self.team1 or not self.team2:
             self.show_error("Teams not found")
             return
 
-        # Load players for each team
-        self.all_players["team1"] = self.player_repo.find_by_team_id(
-            team_id=self.team1_id
-        )
-        self.all_players["team2"] = self.player_repo.find_by_team_id(
-            team_id=self.team2_id
-        )
-
         # Create player selection sections for each team
         team1_selection = self.create_team_selection_section(
             self.team1, "team1", "Select Team 1 Players"
@@ -138,6 +145,7 @@ class SetupPointView(BaseView):
 
         # Add content to page
         self.page.add(content)
+        self.page.update()
 
     def create_team_selection_section(
         self, team, team_key: str, title: str
@@ -1,7 +1,8 @@
 import flet as ft
 from src.ui.views.base_view import BaseView
 from typing import Callable
-from src.database.domain_repositories import TeamRepository, PlayerRepository
+from src.database.repository import ConcurrentUpdateError
+from src.database.session import Session
 from enum import Enum
 
 
@@ -16,12 +17,14 @@ class PlayerRole(str, Enum):
 class PlayerManager:
     """Nested view for managing players within a team"""
 
-    def __init__(self, page: ft.Page, team_id: str, on_close: Callable):
+    def __init__(
+        self, page: ft.Page, session: Session, team_id: str, on_close: Callable
+    ):
         self.page = page
+        self.session = session
         self.team_id = team_id
         self.on_close = on_close
-        self.team_repository = TeamRepository()
-        self.player_repository = PlayerRepository()
+        self.player_repository = session.players
         self.container = ft.Container()
         self.initialize_view()
 
@@ -65,7 +68,7 @@ class PlayerManager:
             tooltip="Close player management",
         )
 
-        team = self.team_repository.find_by_id(self.team_id)
+        team = self.session.get("teams", self.team_id)
         team_name = team["name"] if team else "Unknown Team"
 
         # Layout
@@ -108,14 +111,13 @@ class PlayerManager:
 
     def load_players(self):
         """Load players for the current team"""
-        team = self.team_repository.find_by_id(self.team_id)
+        team = self.session.get("teams", self.team_id)
         self.players_list.controls.clear()
 
         if team and "players" in team:
-            for player_id in team["players"]:
-                player = self.player_repository.find_by_id(player_id)
-                if player:
-                    self.players_list.controls.append(self.create_player_card(player))
+            players = self.session.get_many("players", team["players"])
+            for player in players:
+                self.players_list.controls.append(self.create_player_card(player))
 
         self.page.update()
 
@@ -141,9 +143,22 @@ class PlayerManager:
                 number=number,
                 role=self.player_role_dropdown.value,
             )
-
-            # Add player to team
-            self.team_repository.add_player_to_team(self.team_id, player["id"])
+            self.session.add("players", player)
+
+            # Add player to team, on top of the stored roster so concurrent
+            # roster changes are kept; the session's copy is stale after that
+            try:
+                team = self.session.teams.add_player_to_team(self.team_id, player["id"])
+            except ConcurrentUpdateError:
+                team = None
+            finally:
+                self.session.evict("teams", self.team_id)
+            if team is None:
+                # Not on any roster, the player would be lost
+                self.player_repository.delete(player["id"])
+                self.session.evict("players", player["id"])
+                self.show_error("Could not add the player to the team, try again")
+                return
 
             # Add to list
             self.players_list.controls.append(self.create_player_card(player))
@@ -181,14 +196,18 @@ class PlayerManager:
 
     def delete_player(self, player_id: str):
         """Delete a player from the team and repository"""
-        team = self.team_repository.find_by_id(self.team_id)
-        if team and "players" in team:
-            # Remove player from team
-            team["players"].remove(player_id)
-            self.team_repository.update(self.team_id, team)
-
+        # Remove player from team, on top of the stored roster
+        try:
+            team = self.session.teams.remove_player_from_team(self.team_id, player_id)
+        except ConcurrentUpdateError:
+            self.show_error("The team was changed elsewhere, try again")
+            return
+        finally:
+            self.session.evict("teams", self.team_id)
+        if team is not None:
             # Delete player from repository
             self.player_repository.delete(player_id)
+            self.session.evict("players", player_id)
 
             # Refresh the player list
             self.load_players()
@@ -203,11 +222,15 @@ class PlayerManager:
 class TeamManager(BaseView):
     """Team management view - allows creating, editing, and managing teams"""
 
-    def __init__(self, page: ft.Page, navigation_callback: Callable):
-        self.team_repository = TeamRepository()
-        self.player_repository = PlayerRepository()
+    page_size = 20  # Teams loaded per page
+
+    def __init__(self, page: ft.Page, navigation_callback: Callable, session: Session):
+        self.team_repository = session.teams
+        self.async_team_repository = session.async_teams
+        self.player_repository = session.players
         self.current_view = "teams"  # Track current view: "teams" or "players"
-        super().__init__(page, navigation_callback)
+        self.last_team_id = None  # Last team shown, the next page starts after it
+        super().__init__(page, navigation_callback, session)
 
     def initialize_view(self):
         # Create main container for swapping views
@@ -250,6 +273,13 @@ class TeamManager(BaseView):
             on_click=self.add_team,
         )
 
+        # Next page of teams
+        self.load_more_btn = ft.TextButton(
+            text="Load more",
+            icon=ft.icons.EXPAND_MORE,
+            on_click=self.load_more_teams,
+        )
+
         # Back button
         back_btn = ft.IconButton(
             icon=ft.icons.ARROW_BACK,
@@ -301,34 +331,51 @@ class TeamManager(BaseView):
         """Show the player manager view for a specific team"""
         self.current_view = "players"
         self.player_manager = PlayerManager(
-            self.page, team_id, on_close=self.show_teams_view
+            self.page, self.session, team_id, on_close=self.show_teams_view
         )
         self.main_container.content = self.player_manager.container
         self.page.update()
 
     def load_teams(self):
-        """Load teams from repository"""
-        teams_data = self.team_repository.find_all()
+        """Load the first page of teams from repository"""
         self.teams_list.controls.clear()
+        self.last_team_id = None
+        self.load_more_teams()
+
+    def load_more_teams(self, e=None):
+        """Load the next page of teams, after the last one shown"""
+        teams_data = list(
+            self.team_repository.iter_all(limit=self.page_size, after=self.last_team_id)
+        )
+        if self.load_more_btn in self.teams_list.controls:
+            self.teams_list.controls.remove(self.load_more_btn)
 
         for team in teams_data:
             self.teams_list.controls.append(self.create_team_card(team))
 
+        if teams_data:
+            self.last_team_id = teams_data[-1]["id"]
+        if len(teams_data) == self.page_size:
+            self.teams_list.controls.append(self.load_more_btn)
+
         self.page.update()
 
-    def add_team(self, e):
+    async def add_team(self, e):
         """Add a new team"""
         if not self.team_name_field.value:
             self.show_error("Team name is required")
             return
 
         # Create team using repository
-        new_team = self.team_repository.create_team(
+        new_team = await self.async_team_repository.create_team(
             name=self.team_name_field.value, city=self.team_city_field.value
         )
+        self.session.add("teams", new_team)
 
-        # Add to list
-        self.teams_list.controls.append(self.create_team_card(new_team))
+        # Add to list, unless it will come with a page that is not loaded yet
+        if self.load_more_btn not in self.teams_list.controls:
+            self.teams_list.controls.append(self.create_team_card(new_team))
+            self.last_team_id = new_team["id"]
 
         # Clear form
         self.team_name_field.value = ""
@@ -381,13 +428,15 @@ class TeamManager(BaseView):
     def delete_team(self, team_id: str):
         """Delete a team"""
         # Get team data before deletion to handle player cleanup
-        team = self.team_repository.find_by_id(team_id)
+        team = self.session.get("teams", team_id)
         if team:
             # Delete all players first
             for player_id in team.get("players", []):
                 self.player_repository.delete(player_id)
+                self.session.evict("players", player_id)
 
             # Delete the team
+            self.session.evict("teams", team_id)
             if self.team_repository.delete(team_id):
                 # Refresh the team list
                 self.load_teams()
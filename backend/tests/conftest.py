@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The backend is imported from its source root, like `python -m` does from there
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Settings are read once, on first import: keep the tests out of the real data
+_data_dir = tempfile.mkdtemp(prefix="ultistats-tests-")
+os.environ.setdefault("DATA_DIR", _data_dir)
+os.environ.setdefault("TEAMS_DIR", os.path.join(_data_dir, "teams"))
+os.environ.setdefault("GAMES_DIR", os.path.join(_data_dir, "games"))
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from database.instrumentation import (
+    disable_instrumentation,
+    enable_instrumentation,
+    metrics,
+)
+from database.sqlite_repository import SqliteRepository
+
+
+class GameRepository(SqliteRepository):
+    log_fields = ("events",)
+
+
+@pytest.fixture
+def instrumented():
+    enable_instrumentation()
+    metrics.reset()
+    yield metrics
+    disable_instrumentation()
+    metrics.reset()
+
+
+def test_sqlite_writes_are_counted(tmp_path, instrumented):
+    repository = GameRepository(os.path.join(tmp_path, "games"))
+    game = repository.create({"id": "game", "status": "active"})
+    repository.update("game", {**game, "score": 1})
+    repository.patch("game", {"status": "finished"})
+    event = {"event": "pass", "player_id": "a"}
+    repository.append_to_log("game", "events", event)
+    repository.find_by_id("game")
+
+    stats = instrumented.snapshot()["GameRepository"]
+    assert stats["create"]["files_written"] == 1
+    assert stats["create"]["bytes_written"] >= len(json.dumps(game))
+    # The document, then its log emptied
+    assert stats["update"]["files_written"] == 2
+    assert stats["patch"]["files_written"] == 1
+    assert stats["patch"]["bytes_written"] > len('"finished"')
+    assert stats["append_to_log"]["files_written"] == 1
+    assert stats["append_to_log"]["bytes_written"] >= len(json.dumps(event))
+    assert stats["find_by_id"]["files_written"] == 0
+    assert stats["find_by_id"]["files_read"] > 0
@@ -0,0 +1,50 @@
+import os
+
+from database.repository import JsonRepository
+from stats.lineup_index import LineupIndex, LineupIndexStore
+from stats.projection import StatsProjection
+
+GAME = {"id": "game", "team1_id": "t1", "team2_id": "t2"}
+# Wider than 64 players, so bitmasks do not fit a machine word
+ROSTER = [f"p{number}" for number in range(70)]
+
+
+def _point(number: int) -> dict:
+    return {
+        "id": f"point{number}",
+        "game_id": GAME["id"],
+        "status": "finished",
+        "scoring_team": "t1" if number % 3 else "t2",
+        "scoring_player_id": ROSTER[number % 70],
+        "team1_players": [ROSTER[(number * 5 + i) % 70] for i in range(7)],
+        "team2_players": ["c", "d"],
+    }
+
+
+def test_saved_points_are_stored_in_the_lineup_indexes(tmp_path):
+    projection = StatsProjection(
+        *(
+            JsonRepository(os.path.join(tmp_path, kind))
+            for kind in ("players", "teams", "games", "points", "state")
+        )
+    )
+    store = LineupIndexStore(os.path.join(tmp_path, "indexes"))
+    store.attach(projection)
+    expected = LineupIndex("t1")
+    for number in range(40):
+        projection.apply_point(_point(number), GAME)
+        expected.add_point(_point(number), GAME)
+    # Saved again, e.g. by another scorekeeper
+    projection.apply_point(_point(0), GAME)
+
+    reloaded = LineupIndexStore(os.path.join(tmp_path, "indexes"))
+    assert reloaded.team_ids() == ["t1", "t2"]
+    index = reloaded.get("t1")
+    assert index.lineups == expected.lineups
+    assert index.outcomes == expected.outcomes
+    for size in (2, 3, 0):
+        assert index.top(size, 20) == expected.top(size, 20)
+    assert index.combination_stats(["p0", "p1"]) == expected.combination_stats(
+        ["p0", "p1"]
+    )
+    assert reloaded.get("t2").combination_stats(["c", "d"])["points"] == 40
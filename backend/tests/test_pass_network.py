@@ -0,0 +1,50 @@
+import os
+
+from database.repository import JsonRepository
+from stats.pass_network import PassNetworkStore
+from stats.projection import StatsProjection
+
+GAME = {"id": "game", "team1_id": "t1", "team2_id": "t2"}
+
+
+def _point(number: int) -> dict:
+    return {
+        "id": f"point{number}",
+        "game_id": GAME["id"],
+        "status": "finished",
+        "scoring_team": "t1",
+        "scoring_player_id": "a",
+        "assisting_player_id": "b",
+        "team1_players": ["a", "b"],
+        "team2_players": ["c", "d"],
+        "events": [
+            {"event": "pass", "team_id": "t1", "player_id": "b", "receiver_id": "a"},
+            {"event": "drop", "team_id": "t2", "player_id": "c", "receiver_id": "d"},
+            {"event": "score", "team_id": "t1", "player_id": "b", "receiver_id": "a"},
+        ],
+    }
+
+
+def test_saved_points_are_stored_in_the_pass_networks(tmp_path):
+    projection = StatsProjection(
+        *(
+            JsonRepository(os.path.join(tmp_path, kind))
+            for kind in ("players", "teams", "games", "points", "state")
+        )
+    )
+    store = PassNetworkStore(os.path.join(tmp_path, "networks"))
+    store.attach(projection)
+    for number in range(3):
+        projection.apply_point(_point(number), GAME)
+    # Saved again, e.g. by another scorekeeper
+    projection.apply_point(_point(0), GAME)
+
+    reloaded = PassNetworkStore(os.path.join(tmp_path, "networks"))
+    assert reloaded.team_ids() == ["t1", "t2"]
+    assert reloaded.get("t1").pair("b", "a") == {
+        "completions": 6,
+        "attempts": 6,
+        "completion_rate": 1.0,
+    }
+    assert reloaded.get("t2").pair("c", "d")["attempts"] == 3
+    assert reloaded.get("t2").point_ids == {"point0", "point1", "point2"}
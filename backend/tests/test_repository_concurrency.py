@@ -0,0 +1,59 @@
+import multiprocessing
+
+import pytest
+
+from database.repository import ConcurrentUpdateError, JsonRepository
+
+PROCESSES = 4
+INCREMENTS = 50
+
+
+def _increment(entity: dict):
+    entity["count"] = entity.get("count", 0) + 1
+
+
+def _increment_in_batches(directory_path: str, per_batch: int):
+    """Add INCREMENTS to the counter, `per_batch` modifies per batch"""
+    repository = JsonRepository(directory_path)
+    done = 0
+    while done < INCREMENTS:
+        try:
+            with repository.batch():
+                for _ in range(per_batch):
+                    repository.modify("player", _increment)
+        except ConcurrentUpdateError:
+            continue
+        done += per_batch
+
+
+@pytest.mark.parametrize("per_batch", [1, 5])
+def test_batched_modifies_from_several_processes_are_not_lost(tmp_path, per_batch):
+    JsonRepository(str(tmp_path)).create({"id": "player", "count": 0})
+    processes = [
+        multiprocessing.Process(
+            target=_increment_in_batches, args=(str(tmp_path), per_batch)
+        )
+        for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    stored = JsonRepository(str(tmp_path)).find_header("player")
+    assert stored["count"] == PROCESSES * INCREMENTS
+
+
+def test_flush_drops_the_batch_when_a_document_changed_meanwhile(tmp_path):
+    repository = JsonRepository(str(tmp_path))
+    other = JsonRepository(str(tmp_path))
+    repository.create({"id": "player", "count": 0})
+
+    with pytest.raises(ConcurrentUpdateError):
+        with repository.batch():
+            repository.modify("player", _increment)
+            other.modify("player", _increment)
+
+    assert repository.find_header("player")["count"] == 1
+    assert repository.find_header("player")["_version"] == 2
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+
+import database.repository
+from database.repository import JsonRepository
+
+PROCESSES = 4
+GAMES = 30
+
+
+class GameRepository(JsonRepository):
+    indexed_fields = ("status", "team_id")
+
+
+def _journal_size(repository: JsonRepository) -> int:
+    return os.path.getsize(repository._get_index_journal_path())
+
+
+def _create_games(directory_path: str, team_id: str):
+    repository = GameRepository(directory_path)
+    for number in range(GAMES):
+        game = repository.create(
+            {"id": f"{team_id}-{number}", "team_id": team_id, "status": "active"}
+        )
+        if number % 2:
+            repository.patch(game["id"], {"status": "finished"})
+        repository.find_by_field("status", "active")
+
+
+def test_writes_keeping_the_indexed_values_write_no_index(tmp_path):
+    repository = GameRepository(str(tmp_path))
+    game = repository.create({"team_id": "t1", "status": "active"})
+    size = _journal_size(repository)
+
+    repository.patch(game["id"], {"score": 3})
+    repository.update(game["id"], {"team_id": "t1", "status": "active", "score": 4})
+    assert _journal_size(repository) == size
+
+    repository.patch(game["id"], {"status": "finished"})
+    assert _journal_size(repository) > size
+    assert [
+        found["id"]
+        for found in GameRepository(str(tmp_path)).find_by_field("status", "finished")
+    ] == [game["id"]]
+
+
+def test_other_instances_read_the_journal_and_it_is_folded(tmp_path, monkeypatch):
+    monkeypatch.setattr(database.repository, "INDEX_JOURNAL_MIN_LINES", 10)
+    writer, reader = GameRepository(str(tmp_path)), GameRepository(str(tmp_path))
+    assert reader.find_by_field("team_id", "t1") == []
+    for _ in range(25):
+        writer.create({"team_id": "t1", "status": "active"})
+        assert len(reader.find_by_field("team_id", "t1")) == len(
+            writer.find_by_field("team_id", "t1")
+        )
+    # Folded into the side file whenever the journal outgrew the indexes
+    assert writer._index_journal_lines < 15
+    assert len(GameRepository(str(tmp_path)).find_by_field("team_id", "t1")) == 25
+
+
+def test_indexes_written_from_several_processes_are_complete(tmp_path):
+    processes = [
+        multiprocessing.Process(
+            target=_create_games, args=(str(tmp_path), f"t{number}")
+        )
+        for number in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    repository = GameRepository(str(tmp_path))
+    assert len(repository.find_by_field("status", "finished")) == PROCESSES * (
+        GAMES // 2
+    )
+    assert len(repository.find_by_field("team_id", "t1")) == GAMES
+    repository.rebuild_indexes()
+    assert len(repository.find_by_field("status", "active")) == PROCESSES * (GAMES // 2)
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+
+from database.repository import JsonRepository
+from stats.projection import StatsProjection
+
+PROCESSES = 4
+POINTS = 10
+PLAYERS = ["a", "b", "c", "d"]
+
+
+def _projection(directory_path: str) -> StatsProjection:
+    return StatsProjection(
+        *(
+            JsonRepository(os.path.join(directory_path, kind))
+            for kind in ("players", "teams", "games", "points", "state")
+        )
+    )
+
+
+def _game(number: int) -> dict:
+    return {"id": f"game{number}", "team1_id": "t1", "team2_id": "t2"}
+
+
+def _point(game: dict, number: int) -> dict:
+    return {
+        "id": f"{game['id']}-point{number}",
+        "game_id": game["id"],
+        "status": "finished",
+        "scoring_team": "t1",
+        "scoring_player_id": "a",
+        "assisting_player_id": "b",
+        "team1_players": ["a", "b"],
+        "team2_players": ["c", "d"],
+    }
+
+
+def _apply_game(directory_path: str, number: int):
+    projection = _projection(directory_path)
+    game = _game(number)
+    for point in range(POINTS):
+        projection.apply_point(_point(game, point), game)
+
+
+def test_points_applied_from_several_processes_all_count(tmp_path):
+    projection = _projection(str(tmp_path))
+    for player_id in PLAYERS:
+        projection.players.create({"id": player_id})
+    for team_id in ("t1", "t2"):
+        projection.teams.create({"id": team_id})
+
+    processes = [
+        multiprocessing.Process(target=_apply_game, args=(str(tmp_path), number))
+        for number in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    scorer = projection.players.find_header("a")["stats"]
+    assert scorer["goals"] == PROCESSES * POINTS
+    assert scorer["games_played"] == PROCESSES
+    assert projection.players.find_header("c")["stats"]["plus_minus"] == -(
+        PROCESSES * POINTS
+    )
+    assert projection.teams.find_header("t1")["stats"]["goals_for"] == (
+        PROCESSES * POINTS
+    )
+    assert projection.finish_pending() == 0